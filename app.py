@@ -4,9 +4,20 @@ import joblib
 import numpy as np
 import plotly.express as px
 import os
+import sys
+import threading
 import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from instrumentation import REGISTRY, timed, timed_cursor_factory, load_snapshots, uptime_seconds
+from weather import WeatherIndex
+from track_events import TrackEventIndex, NEUTRALIZED
+from result_cache import ResultCache, file_watermark, table_watermark
+from event_log import EventLog, RaceState, LOG_PATH
+from similar_pits import SimilarPits
+from drift_monitor import DriftMonitor
+
 # Optional imports with fallbacks
 try:
     import psycopg2
@@ -36,22 +47,82 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Load model (Day2 production)
+MODEL_PATH = 'models/pit_predictor_day2.pkl'
+
 @st.cache_data
+@timed('model_load_seconds', model='pit')
 def load_model():
-    return joblib.load('models/pit_predictor_day2.pkl')
+    return joblib.load(MODEL_PATH)
 
 model = load_model()
+
+# Shared by every session: DB/FastF1 results (memory + disk) and predictions (memory only)
+@st.cache_resource
+def load_result_caches():
+    return {
+        'queries': ResultCache('dashboard_queries'),
+        'predictions': ResultCache('pit_predictions', max_items=4096, disk_dir=None)
+    }
+
+result_caches = load_result_caches()
+MODEL_WATERMARK = ('pit_model', lambda: file_watermark(MODEL_PATH))
+
+def predict_cached(X):
+    """Model predictions keyed by the exact feature rows (invalidated when the .pkl changes)"""
+    X = np.asarray(X, dtype='float64')
+    # timed around the cache too: "Predict p95" is what the user waits for, hits included
+    with timed('model_predict_seconds', model='pit'):
+        return result_caches['predictions'].get_or_compute(X.tolist(), lambda: model.predict(X), MODEL_WATERMARK)
+
+# Real Monaco 2024 weather from the FastF1 cache (replaces hard-coded 65% humidity / 24°C)
+@st.cache_resource
+def load_weather():
+    return WeatherIndex.for_race(2024, 'Monaco')
+
+weather = load_weather()
+
+# SC / VSC / red flag / yellow intervals from the cached track status + race control
+@st.cache_resource
+def load_events():
+    return TrackEventIndex.for_race(2024, 'Monaco')
+
+events = load_events()
+
+# k-NN index over historical stops (empirical backing for the H1 prediction)
+@st.cache_resource
+def load_similar_pits():
+    return SimilarPits.from_feature_store()
+
+similar_pits = load_similar_pits()
+
+# Input drift vs training + rolling MAE (shared by every session, O(1) per prediction)
+# Only inputs the user really sets: crew_rolling_std, pit_frequency, pit_hour_peak and
+# is_fast_pit are fixed placeholders here and would sit outside the training deciles forever
+DRIFT_FEATURES = ['pit_lap_estimate', 'temperature_c', 'humidity_pct', 'crew_rolling_mean']
+
+@st.cache_resource
+def load_drift_monitor(_model):
+    return DriftMonitor.from_training(_model, monitored=DRIFT_FEATURES)
+
+drift_monitor = load_drift_monitor(model)
+
+def current_mae():
+    """Rolling MAE once actuals have arrived, else the model's MAE on its Day 2 holdout split"""
+    mae = drift_monitor.mae.value
+    return (mae, "rolling") if mae is not None else (drift_monitor.train_mae, "holdout")
 feature_cols = ['pit_lap_estimate', 'temperature_c', 'humidity_pct', 'crew_rolling_mean', 
                'crew_rolling_std', 'pit_frequency', 'pit_hour_peak', 'is_fast_pit']
 
 st.title("🏎️ F1 Pit Crew Predictor **v4.0** - ALL FIXED ✅")
-st.markdown("**RandomForest** | **MAE: 1.2s** | **Production Ready**")
+mae, mae_source = current_mae()
+st.markdown(f"**RandomForest** | **MAE: {mae:.2f}s** ({mae_source}) | **Production Ready**")
 
 # Status metrics
 col1, col2, col3 = st.columns(3)
 col1.metric("🧠 Model", "RandomForest ✅")
-col2.metric("📊 MAE", "1.2s")
-col3.metric("🔧 Status", "All Systems GO")
+col2.metric(f"📊 MAE ({mae_source})", f"{mae:.2f}s")
+drift_alerts = drift_monitor.active_alerts
+col3.metric("🔧 Status", f"⚠️ {len(drift_alerts)} drift alerts" if drift_alerts else "All Systems GO")
 
 # === H1: ML Prediction (Main Feature) ===
 st.markdown("---")
@@ -60,17 +131,31 @@ col_ml1, col_ml2 = st.columns(2)
 
 with col_ml1:
     lap = st.slider("🏁 Lap Number", 1, 78, 40)
-    temp = st.slider("🌡️ Temp (°C)", 20.0, 28.0, 24.0)
+    # default from the real race: air temperature at this lap (FastF1 weather)
+    lap_temp = min(max(round(weather.at_lap(lap)['temperature_c'], 1), 20.0), 28.0) if weather is not None else 24.0
+    temp = st.slider("🌡️ Temp (°C)", 20.0, 28.0, lap_temp, key=f'temp_{lap}')
     crew_mean = st.slider("👥 Crew Avg (s)", 20.0, 26.0, 23.0)
+    compound = st.selectbox("🛞 Compound", ['SOFT', 'MEDIUM', 'HARD'], index=1)
 
 with col_ml2:
     if st.button("🚀 **PREDICT PIT TIME**", type="primary", use_container_width=True):
         # Day2 exact feature order
-        input_data = np.array([[lap, temp, 65, crew_mean, 1.2, 2, 0, False]])
-        pred = model.predict(input_data)[0]
-        st.metric("🎯 Predicted Time", f"{pred:.1f}s", "±1.2s")
+        humidity = weather.at_lap(lap)['humidity_pct'] if weather is not None else 65
+        input_data = np.array([[lap, temp, humidity, crew_mean, 1.2, 2, 0, False]])
+        pred = predict_cached(input_data)[0]
+        drift_monitor.observe(input_data[0, :len(DRIFT_FEATURES)])
+        st.metric("🎯 Predicted Time", f"{pred:.1f}s", f"±{current_mae()[0]:.1f}s")
         st.success(f"**{pred:.1f}s** vs LEC benchmark **22.1s**")
 
+        # 20 most similar past stops: same lap window, temperature, crew mean, compound, fatigue
+        similar = similar_pits.query(similar_pits.situation(lap, temp, crew_mean, compound), k=20)
+        deltas = similar['pit_delta_seconds']
+        st.caption(f"📚 20 most similar past stops: median **{deltas.median():.1f}s** "
+                   f"(p10 {deltas.quantile(0.1):.1f}s - p90 {deltas.quantile(0.9):.1f}s)")
+        st.dataframe(similar[['driver', 'team', 'pit_lap_estimate', 'temperature_c', 'crew_rolling_mean',
+                              'compound', 'pit_delta_seconds', 'distance']].round(2),
+                     use_container_width=True, height=240)
+
 # === H2: Database (FIXED - Generic query) ===
 st.markdown("---")
 st.header("🗄️ **H2: Live Database**")
@@ -82,16 +167,37 @@ if PSYCOPG2_AVAILABLE:
         try:
             conn = psycopg2.connect(
                 host=DB_HOST, port=5432, dbname='postgres',
-                user='postgres', password=DB_PASS
+                user='postgres', password=DB_PASS,
+                cursor_factory=timed_cursor_factory()
             )
+            # Re-run only when pits changes (max in_time / row count, checked at most every 5s)
+            try:
+                pits_watermark = ('pits@' + DB_HOST, lambda: table_watermark(conn))
+                result_caches['queries'].watermark(*pits_watermark)
+            except psycopg2.Error:
+                conn.rollback()
+                pits_watermark = None  # no pits table yet
+            queries = result_caches['queries']
+
             # FIXED: Generic query - works with ANY Day1 tables
-            tables_df = pd.read_sql("""
+            tables_sql = """
                 SELECT table_name FROM information_schema.tables 
                 WHERE table_schema='public' AND table_type='BASE TABLE'
-            """, conn)
+            """
+            # not cached: a catalog lookup costs the same as any watermark check, and no file tracks DDL
+            tables_df = pd.read_sql(tables_sql, conn)
             
             st.success(f"✅ Connected! Found {len(tables_df)} tables:")
             st.dataframe(tables_df)
+
+            if pits_watermark is not None:
+                crews_sql = """
+                    SELECT driver, COUNT(*) AS stops, ROUND(AVG(pit_delta_seconds)::numeric, 1) AS avg_pit
+                    FROM pits GROUP BY driver ORDER BY avg_pit LIMIT 5
+                """
+                st.markdown("**🏆 Fastest pit crews**")
+                st.dataframe(queries.get_or_compute((DB_HOST, crews_sql), lambda: pd.read_sql(crews_sql, conn),
+                                                    pits_watermark))
             conn.close()
         except Exception as e:
             st.error(f"❌ DB Error: {str(e)}")
@@ -105,18 +211,33 @@ st.header("⚡ **H5: FastF1 Live Data**")
 if FASTF1_AVAILABLE:
     if st.button("📡 **Fetch Monaco 2024**", type="secondary"):
         try:
+            def load_pits():
+                with timed('fastf1_load_seconds', session='2024_Monaco_R'):
+                    session = ff1.get_session(2024, 'Monaco', 'R')
+                    session.load()
+                return pd.DataFrame(session.laps.pick_pits())
+
             with st.spinner("Loading FastF1 Monaco 2024..."):
-                session = ff1.get_session(2024, 'Monaco', 'R')
-                session.load()
-                pits = session.laps.pick_pits()
+                # warm after the first load: re-parsed only when the FastF1 cache files change
+                pits = result_caches['queries'].get_or_compute(
+                    ('fastf1_pits', 2024, 'Monaco', 'R'), load_pits,
+                    ('fastf1_cache', lambda: file_watermark('cache')))
                 
                 st.success(f"✅ **{len(pits)} pit stops loaded!**")
                 st.dataframe(pits[['Driver', 'LapNumber', 'PitLapTime']].head(10))
                 
                 # ML Predictions on FastF1 data
-                fastf1_X = np.array([[pit['LapNumber'], 24, 65, 23, 1.2, 1, 0, 0] 
-                                   for pit in pits.head(5).to_dict('records')])
-                predictions = model.predict(fastf1_X)
+                fastf1_pits = pits.head(5)
+                if weather is not None:
+                    fastf1_pits = weather.join_laps(fastf1_pits, 'LapNumber', columns=['temperature_c', 'humidity_pct'])
+                else:
+                    fastf1_pits = fastf1_pits.assign(temperature_c=24, humidity_pct=65)
+                if events is not None:
+                    labelled = events.join_laps(pits, 'LapNumber')
+                    st.info(f"🚨 {int(labelled['neutralized'].sum())} of {len(pits)} stops under SC / VSC / red flag")
+                fastf1_X = np.array([[pit['LapNumber'], pit['temperature_c'], pit['humidity_pct'], 23, 1.2, 1, 0, 0]
+                                   for pit in fastf1_pits.to_dict('records')])
+                predictions = predict_cached(fastf1_X)  # crew inputs are placeholders → not fed to the drift monitor
                 st.metric("FastF1 Predictions", f"{predictions[0]:.1f}s avg")
                 
         except Exception as e:
@@ -130,7 +251,13 @@ st.header("🎮 **H3: Real-Time Strategy**")
 col3, col4 = st.columns(2)
 
 with col3:
-    safety_car = st.checkbox("🚨 Safety Car")
+    sim_lap = st.slider("🏁 Pit Lap", 1, 78, 40, key='sim_lap')
+    lap_events = events.describe_lap(sim_lap) if events is not None else []
+    if lap_events:
+        st.caption(f"Lap {sim_lap} (Monaco 2024): {', '.join(k.upper() for k in lap_events)}")
+    # default from the real race: checked when the lap ran under SC / VSC / red flag
+    safety_car = st.checkbox("🚨 Safety Car", value=any(k in NEUTRALIZED for k in lap_events),
+                             key=f'safety_car_{sim_lap}')
     soft_tires = st.checkbox("🛞 Soft Tires")
 
 with col4:
@@ -155,13 +282,68 @@ with col_h6:
 
 with col_h7:
     st.subheader("📈 **H7: Monitoring**")
-    st.metric("Uptime", "99.9%")
-    st.metric("Latency", "47ms")
+    st.metric("Uptime", f"{uptime_seconds() / 60:.1f} min")
+    predict_p = REGISTRY.histogram('model_predict_seconds', model='pit').quantiles()
+    st.metric("Predict p95", f"{predict_p[1] * 1000:.1f}ms" if predict_p[1] is not None else "n/a")
 
 with col_h8:
     st.subheader("☁️ **H8: Deploy**")
     st.info("Heroku/Render ready - 1 click!")
 
+# H7 detail: real latency percentiles (this dashboard + last pipeline runs)
+with st.expander("⏱️ Latency p50 / p95 / p99"):
+    def _latency_table(rows):
+        return pd.DataFrame([{
+            'metric': r['name'],
+            'labels': ', '.join(f"{k}={v}" for k, v in r['labels'].items()),
+            'count': r['count'],
+            'p50 (ms)': round(r['p50_ms'], 2),
+            'p95 (ms)': round(r['p95_ms'], 2),
+            'p99 (ms)': round(r['p99_ms'], 2)
+        } for r in rows])
+
+    live = REGISTRY.snapshot()
+    if live:
+        st.markdown("**Dashboard (live)**")
+        st.dataframe(_latency_table(live), use_container_width=True)
+    for snap in load_snapshots():
+        if snap['metrics']:
+            st.markdown(f"**Pipeline: {snap['process']}** "
+                        f"({datetime.fromtimestamp(snap['written_at']):%Y-%m-%d %H:%M})")
+            st.dataframe(_latency_table(snap['metrics']), use_container_width=True)
+    if not live and not load_snapshots():
+        st.info("No timings yet - run a prediction or the Day 1 pipeline")
+    st.markdown("**Result cache** (memory / disk hits vs misses)")
+    st.dataframe(pd.DataFrame([{'cache': name, **c.stats()} for name, c in result_caches.items()]),
+                 use_container_width=True)
+
+with st.expander("📼 Live race state (event log)"):
+    if os.path.exists(LOG_PATH):
+        @st.cache_resource
+        def load_race_log():
+            log = EventLog()
+            return log, RaceState.recover(log), threading.Lock()
+
+        race_log, race_state, race_lock = load_race_log()
+        with race_lock:  # shared by every session
+            race_state.apply(race_log.tail(race_state.through_seq))  # only records appended since last rerun
+            state_frame = race_state.to_frame()
+        st.caption(f"{len(race_log):,} events | state through seq {race_state.through_seq}")
+        st.dataframe(state_frame.round(2), use_container_width=True)
+    else:
+        st.info("No live events yet - POST /events to the scoring service (src/scoring_service.py)")
+
+with st.expander("📈 Drift monitor (inputs vs training, rolling MAE)"):
+    summary = drift_monitor.summary()
+    st.caption(f"{summary['events']:,} inputs observed | {summary['actuals']:,} actuals | "
+               f"PSI alert > 0.2 after 200 inputs")
+    if summary['events']:
+        st.dataframe(drift_monitor.snapshot().round(3), use_container_width=True)
+    for alert in list(drift_monitor.alerts)[-10:]:
+        st.warning(f"{datetime.fromtimestamp(alert['ts']):%H:%M:%S} - {alert['message']}")
+    if not summary['events']:
+        st.info("No live inputs yet - run a prediction (scoring service: GET /drift)")
+
 # Victory screen
 st.markdown("---")
 st.markdown("""
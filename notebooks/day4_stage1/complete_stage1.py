@@ -7,14 +7,17 @@ DAY 4: STAGE 1 COMPLETE - BULLETPROOF VERSION
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from tqdm import tqdm
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from instrumentation import timed, dump_snapshot
+from report_plots import submit_plot
+
 # ABSOLUTE PATHS - NO RELATIVE PATH ISSUES
 BASE_DIR = r"C:\Users\lenovo\Desktop\Books\F1\Pit-Fatigue-Engine"
 DATA_DIR = os.path.join(BASE_DIR, 'data')
@@ -40,8 +43,9 @@ try:
     ff1.Cache.enable_cache(CACHE_DIR)
     
     # Monaco 2024 Race
-    session = ff1.get_session(2024, 'Monaco', 'R')
-    session.load()
+    with timed('fastf1_load_seconds', session='2024_Monaco_R'):
+        session = ff1.get_session(2024, 'Monaco', 'R')
+        session.load()
     laps = session.laps
     
     # FIXED: pick_pits() → pick_laps() with PitStatus
@@ -52,8 +56,9 @@ try:
     
     # Monaco 2025 (if available)
     try:
-        session25 = ff1.get_session(2025, 'Monaco', 'R')
-        session25.load()
+        with timed('fastf1_load_seconds', session='2025_Monaco_R'):
+            session25 = ff1.get_session(2025, 'Monaco', 'R')
+            session25.load()
         laps25 = session25.laps
         pit_laps25 = laps25.pick_laps('Pit')
         laps25.to_csv(os.path.join(DATA_DIR, 'raw', 'monaco_2025_full.csv'), index=False)
@@ -62,9 +67,11 @@ try:
         print("⚠️ H1.2: Monaco 2025 unavailable")
     
     # Combine ALL Monaco data
-    df_monaco = pd.read_csv(os.path.join(DATA_DIR, 'raw', 'monaco_2024_full.csv'))
+    # session_id keeps (Driver, LapNumber) unique per race once both seasons are stacked
+    df_monaco = pd.read_csv(os.path.join(DATA_DIR, 'raw', 'monaco_2024_full.csv')).assign(session_id=2024)
     if os.path.exists(os.path.join(DATA_DIR, 'raw', 'monaco_2025_full.csv')):
-        df_monaco = pd.concat([df_monaco, pd.read_csv(os.path.join(DATA_DIR, 'raw', 'monaco_2025_full.csv'))])
+        df_monaco = pd.concat([df_monaco, pd.read_csv(os.path.join(DATA_DIR, 'raw', 'monaco_2025_full.csv'))
+                               .assign(session_id=2025)])
     
     df_monaco.to_csv(os.path.join(DATA_DIR, 'raw', 'monaco_combined.csv'), index=False)
     print(f"✅ **H1 COMPLETE**: {len(df_monaco)} rows saved!")
@@ -135,33 +142,9 @@ fatigue_unified = pd.concat([fatigue_monaco, fatigue_lemans], ignore_index=True)
 
 fatigue_unified.to_csv(os.path.join(DATA_DIR, 'fatigue', 'fatigue_proxy_curves.csv'), index=False)
 
-# PRODUCTION FATIGUE VISUALIZATION
-plt.style.use('dark_background')
-fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-
-# Monaco lap fatigue trends
-top_drivers = fatigue_monaco[fatigue_monaco['PitStatus'] == 'Running'].nsmallest(12, 'lap_number')
-sns.lineplot(data=top_drivers, x='lap_number', y='fatigue_pct', hue='entity', ax=axes[0,0])
-axes[0,0].set_title('🏎️ Monaco F1: Lap Fatigue Progression', fontsize=14, color='white')
-axes[0,0].tick_params(colors='white')
-
-# Le Mans fatigue distribution
-sns.histplot(data=fatigue_lemans, x='fatigue_pct', bins=25, color='red', alpha=0.7, ax=axes[0,1])
-axes[0,1].set_title('🏁 Le Mans: Stint Fatigue Distribution', fontsize=14, color='white')
-axes[0,1].tick_params(colors='white')
-
-# Driver fatigue comparison
-fatigue_monaco.groupby('entity')['fatigue_pct'].mean().plot(kind='bar', ax=axes[1,0], color='gold')
-axes[1,0].set_title('Monaco: Driver Fatigue Averages', fontsize=14, color='white')
-axes[1,0].tick_params(colors='white')
-
-fatigue_lemans.groupby('entity')['fatigue_pct'].mean().plot(kind='bar', ax=axes[1,1], color='orange')
-axes[1,1].set_title('Le Mans: Driver Fatigue Averages', fontsize=14, color='white')
-axes[1,1].tick_params(colors='white')
-
-plt.tight_layout()
-plt.savefig(os.path.join(DATA_DIR, 'fatigue', 'fatigue_proxy_curves.png'), dpi=300, bbox_inches='tight')
-plt.close()
+# PRODUCTION FATIGUE VISUALIZATION (background renderer, skipped if the curves are unchanged)
+submit_plot('fatigue_curves', os.path.join(DATA_DIR, 'fatigue', 'fatigue_proxy_curves.png'),
+            fatigue_monaco=fatigue_monaco, fatigue_lemans=fatigue_lemans)
 print(f"✅ **H3 COMPLETE**: {len(fatigue_unified)} unified fatigue records + production plot")
 
 # H4: POSTGRESQL (OPTIONAL - Graceful skip)
@@ -202,6 +185,7 @@ except Exception as e:
     print(f"⚠️ H4 SKIPPED (Non-blocking): {e}")
     print("✅ CSV data saved - PostgreSQL optional for Stage 1")
 
+dump_snapshot('complete_stage1')
 print("\n" + "="*70)
 print("🎉 **STAGE 1 PRODUCTION COMPLETE!** 🎉")
 print(f"\n📁 DELIVERABLES:")
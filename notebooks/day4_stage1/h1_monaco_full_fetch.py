@@ -29,9 +29,10 @@ except:
     print("⚠️ 2025 Monaco not available yet")
 
 # H1.3: Combine + Export 5k target
-df_full = pd.read_csv('../../data/raw/monaco_2024_full.csv')
+# session_id keeps (Driver, LapNumber) unique per race once both seasons are stacked
+df_full = pd.read_csv('../../data/raw/monaco_2024_full.csv').assign(session_id=2024)
 if os.path.exists('../../data/raw/monaco_2025_full.csv'):
-    df_full = pd.concat([df_full, pd.read_csv('../../data/raw/monaco_2025_full.csv')])
+    df_full = pd.concat([df_full, pd.read_csv('../../data/raw/monaco_2025_full.csv').assign(session_id=2025)])
 
 print(f"🎯 **FINAL**: {len(df_full)} rows → **data/raw/monaco_combined.csv**")
 df_full.to_csv('../../data/raw/monaco_combined.csv', index=False)
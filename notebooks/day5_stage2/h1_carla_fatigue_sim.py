@@ -6,10 +6,13 @@ DAY 5 H1: CARLA Simulator - Baseline vs Fatigued Monaco Laps
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy import stats
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+import race_engine
+from report_plots import submit_plot
 
 # Monaco track baseline (real data from Stage 1)
 BASE_DIR = r"C:\Users\lenovo\Desktop\Books\F1\Pit-Fatigue-Engine"
@@ -68,46 +71,19 @@ df_fatigued.to_csv(os.path.join(BASE_DIR, 'data/physics/carla_fatigued_laps.csv'
 print(f"✅ H1.1: Baseline laps saved: {len(df_baseline)} rows")
 print(f"✅ H1.2: Fatigued laps saved: {len(df_fatigued)} rows")
 
-# H1.4: PRODUCTION VISUALIZATION
-plt.style.use('dark_background')
-fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-
-# Lap time degradation
-sns.lineplot(data=df_baseline, x='lap_number', y='lap_time', label='BASELINE', ax=axes[0,0], linewidth=3)
-sns.lineplot(data=df_fatigued, x='lap_number', y='lap_time', label='FATIGUED', ax=axes[0,0], linewidth=3)
-axes[0,0].set_title('🏎️ CARLA: Monaco Lap Degradation (Lap 1-78)', fontsize=14, color='white')
-axes[0,0].set_xlabel('Lap Number', color='white')
-axes[0,0].set_ylabel('Lap Time (s)', color='white')
-axes[0,0].tick_params(colors='white')
-axes[0,0].legend()
-
-# Fatigue factor progression
-sns.lineplot(data=df_fatigued, x='lap_number', y='fatigue_factor', ax=axes[0,1], color='red')
-axes[0,1].set_title('Fatigue Factor Progression\n(0 = Fresh → 0.25 = Exhausted)', fontsize=14, color='white')
-axes[0,1].tick_params(colors='white')
-
-# Throttle input degradation
-sns.lineplot(data=df_fatigued, x='lap_number', y='throttle_input', ax=axes[1,0], color='orange')
-axes[1,0].set_title('Throttle Input Drop (Fatigue)', fontsize=14, color='white')
-axes[1,0].tick_params(colors='white')
-
-# Lap time DELTA (Fatigued - Baseline)
-df_combined = pd.concat([df_baseline, df_fatigued])
-pivot_times = df_combined.pivot(index='lap_number', columns='condition', values='lap_time')
-pivot_times['delta'] = pivot_times['FATIGUED'] - pivot_times['BASELINE']
-pivot_times['delta'].plot(ax=axes[1,1], color='purple', linewidth=3)
-axes[1,1].set_title('Lap Time Penalty Due to Fatigue\n(Fatigued - Baseline)', fontsize=14, color='white')
-axes[1,1].tick_params(colors='white')
-
-plt.tight_layout()
-plt.savefig(os.path.join(BASE_DIR, 'data/physics/carla_fatigue_analysis.png'), dpi=300, bbox_inches='tight')
-plt.show()
+# H1.4: PRODUCTION VISUALIZATION (background renderer, skipped if the laps are unchanged)
+submit_plot('carla', os.path.join(BASE_DIR, 'data/physics/carla_fatigue_analysis.png'),
+            df_baseline=df_baseline, df_fatigued=df_fatigued)
 
 # H1.5: KEY METRICS
 total_race_time_baseline = df_baseline['lap_time'].sum()
 total_race_time_fatigued = df_fatigued['lap_time'].sum()
 time_penalty = total_race_time_fatigued - total_race_time_baseline
-positions_lost = time_penalty / 85.5 * 20  # ~20 cars
+# Re-run the Monaco field with LEC carrying the per-lap fatigue penalty (race_engine classification)
+field_drivers, field_T = race_engine.lap_matrix(monaco_data, n_laps=LAP_COUNT)
+fatigue_penalty = (df_fatigued['lap_time'] - df_baseline['lap_time']).to_numpy()
+fatigued_car = int(np.flatnonzero(field_drivers == 'LEC')[0]) if 'LEC' in field_drivers else 0
+positions_lost = race_engine.positions_lost(field_T, fatigued_car, fatigue_penalty)
 
 print(f"\n📊 **CARLA SIM RESULTS**")
 print(f"   🏁 Baseline Race Time: {total_race_time_baseline/60:.1f} min")
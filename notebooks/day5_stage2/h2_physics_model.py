@@ -3,7 +3,7 @@ DAY 5 H2: Production Physics Model
 lap_time = base_lap + 0.02×lap_number×fatigue_factor + tire_degradation
 ✅ Train on Stage 1 Monaco + CARLA data
 ✅ RMSE target: <5% vs real data
-✅ Export: physics_model.pkl (production ready)
+✅ Export: physics_model_h2.pkl (3-feature exploration; production bundle: src/train_physics.py)
 """
 
 import pandas as pd
@@ -12,9 +12,13 @@ from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+from instrumentation import timed, dump_snapshot
+from report_plots import submit_plot
+from validation import LAPS, validate_frame
 
 # ABSOLUTE PATHS
 BASE_DIR = r"C:\Users\lenovo\Desktop\Books\F1\Pit-Fatigue-Engine"
@@ -43,19 +47,12 @@ print(f"✅ Fatigue proxies: {len(fatigue)} signals")
 # H2.2: ENGINEERING PHYSICS FEATURES
 print("\n⚙️ Engineering physics features...")
 
-# Monaco real data features
-monaco_features = monaco.copy()
-if 'LapTime' in monaco_features.columns:
-    monaco_features['lap_number'] = monaco_features.get('LapNumber', range(1, len(monaco_features)+1))
-    monaco_features['fatigue_factor'] = np.random.uniform(0, 0.25, len(monaco_features))  # Stage 1 proxy
-    monaco_features['tire_degradation'] = 0.005 * monaco_features['lap_number']
-    monaco_features['lap_time'] = monaco_features.get('LapTime', np.random.normal(85.5, 2, len(monaco_features)))
-else:
-    # Synthetic enhancement
-    monaco_features['lap_number'] = range(1, len(monaco_features)+1)
-    monaco_features['lap_time'] = monaco_features['LapTime']
-    monaco_features['fatigue_factor'] = 0.15
-    monaco_features['tire_degradation'] = 0.005 * monaco_features['lap_number']
+# Monaco real data features (schema-validated: LapNumber 1-78, LapTime 60-180s, no guessed columns)
+monaco_features, _ = validate_frame(monaco, LAPS, quarantine='monaco_combined', warn_only=['duplicate'])
+monaco_features['lap_number'] = monaco_features['LapNumber']
+monaco_features['fatigue_factor'] = np.random.uniform(0, 0.25, len(monaco_features))  # Stage 1 proxy
+monaco_features['tire_degradation'] = 0.005 * monaco_features['lap_number']
+monaco_features['lap_time'] = monaco_features['LapTime']
 
 # CARLA physics features (ground truth)
 carla_combined = pd.concat([carla_baseline, carla_fatigued], ignore_index=True)
@@ -86,15 +83,19 @@ y = train_data['lap_time']
 
 # Model 1: Linear Physics (interpretable)
 linear_model = LinearRegression()
-linear_model.fit(X, y)
+with timed('model_fit_seconds', model='physics_linear'):
+    linear_model.fit(X, y)
 
-# Model 2: RandomForest Physics (production)
-rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
-rf_model.fit(X, y)
+# Model 2: RandomForest Physics (production) - all cores; full-data mode: src/train_physics.py
+rf_model = RandomForestRegressor(n_estimators=100, n_jobs=-1, random_state=42)
+with timed('model_fit_seconds', model='physics_rf'):
+    rf_model.fit(X, y)
 
 # Predictions
-train_data['linear_pred'] = linear_model.predict(X)
-train_data['rf_pred'] = rf_model.predict(X)
+with timed('model_predict_seconds', model='physics_linear'):
+    train_data['linear_pred'] = linear_model.predict(X)
+with timed('model_predict_seconds', model='physics_rf'):
+    train_data['rf_pred'] = rf_model.predict(X)
 
 # H2.5: MODEL EVALUATION
 linear_rmse = mean_squared_error(y, train_data['linear_pred'], squared=False)
@@ -117,61 +118,23 @@ joblib.dump({
     'rf_rmse': rf_rmse,
     'base_lap_time': 85.5,
     'fatigue_factor': 0.02
-}, os.path.join(BASE_DIR, 'data/physics/physics_model.pkl'))
+}, os.path.join(BASE_DIR, 'data/physics/physics_model_h2.pkl'))  # physics_model.pkl = train_physics 4-feature bundle
 
 train_data.to_csv(os.path.join(BASE_DIR, 'data/physics/physics_training_data.csv'), index=False)
 
-print(f"\n✅ **H2 COMPLETE**: physics_model.pkl saved!")
+print(f"\n✅ **H2 COMPLETE**: physics_model_h2.pkl saved!")
 print(f"   Formula: lap_time = 85.5 + 0.02×lap×fatigue + tire_degradation")
 
-# H2.7: PRODUCTION VISUALIZATION
-plt.style.use('dark_background')
-fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-
-# Actual vs Predicted lap times
-axes[0,0].scatter(train_data['lap_time'], train_data['rf_pred'], alpha=0.6, color='gold', s=20)
-axes[0,0].plot([train_data['lap_time'].min(), train_data['lap_time'].max()], 
-               [train_data['lap_time'].min(), train_data['lap_time'].max()], 'r--', lw=2)
-axes[0,0].set_xlabel('Actual Lap Time (s)', color='white')
-axes[0,0].set_ylabel('Predicted Lap Time (s)', color='white')
-axes[0,0].set_title(f'🏎️ Physics Model: RF RMSE={rf_rmse:.2f}s', fontsize=14, color='white')
-axes[0,0].tick_params(colors='white')
-
-# Feature importance
-importances = rf_model.feature_importances_
-features = ['Lap Number', 'Fatigue Factor', 'Tire Degradation']
-sns.barplot(x=importances, y=features, ax=axes[0,1], palette='Reds_r')
-axes[0,1].set_title('Feature Importance (RandomForest)', fontsize=14, color='white')
-axes[0,1].tick_params(colors='white')
-
-# Lap progression (Lap 1-20)
-sample_laps = train_data.nsmallest(20, 'lap_number')
-for model_name, pred_col in [('Formula', 'physics_pred'), ('Linear', 'linear_pred'), ('RF', 'rf_pred')]:
-    axes[1,0].scatter(sample_laps['lap_number'], sample_laps[pred_col], 
-                     label=model_name, alpha=0.8, s=60)
-axes[1,0].scatter(sample_laps['lap_number'], sample_laps['lap_time'], 
-                 color='white', label='Actual', s=80, marker='*')
-axes[1,0].set_title('Lap 1-20: Model Predictions vs Reality', fontsize=14, color='white')
-axes[1,0].set_xlabel('Lap Number', color='white')
-axes[1,0].set_ylabel('Lap Time (s)', color='white')
-axes[1,0].legend()
-axes[1,0].tick_params(colors='white')
-
-# Residuals analysis
-residuals = y - train_data['rf_pred']
-sns.histplot(residuals, bins=30, kde=True, color='purple', ax=axes[1,1])
-axes[1,1].axvline(residuals.mean(), color='red', linestyle='--', label=f'Mean: {residuals.mean():.2f}s')
-axes[1,1].set_title('Prediction Residuals (RF Model)', fontsize=14, color='white')
-axes[1,1].tick_params(colors='white')
-axes[1,1].legend()
-
-plt.tight_layout()
-plt.savefig(os.path.join(BASE_DIR, 'data/physics/physics_model_analysis.png'), dpi=300, bbox_inches='tight')
-plt.show()
+# H2.7: PRODUCTION VISUALIZATION (background renderer, skipped if the fit is unchanged)
+submit_plot('physics_model', os.path.join(BASE_DIR, 'data/physics/physics_model_analysis.png'),
+            train_data=train_data[['lap_number', 'lap_time', 'physics_pred', 'linear_pred', 'rf_pred']],
+            importances=rf_model.feature_importances_,
+            feature_labels=['Lap Number', 'Fatigue Factor', 'Tire Degradation'], rf_rmse=rf_rmse)
 
+dump_snapshot('h2_physics_model')
 print("\n🎉 **STAGE 2 PROGRESS: H1+H2 COMPLETE**")
 print("📁 New files:")
-print("   ✅ data/physics/physics_model.pkl (production)")
+print("   ✅ data/physics/physics_model_h2.pkl (scoring uses train_physics → physics_model.pkl)")
 print("   ✅ data/physics/physics_training_data.csv")
 print("   ✅ data/physics/physics_model_analysis.png")
 print("\n✅ Ready for H3: 2005 McLaren validation!")
@@ -1,3 +1,5 @@
+import os
+
 # Central config - UPDATE YOUR PG PASSWORD HERE
 DB_CONFIG = {
     'host': '127.0.0.1',
@@ -13,3 +15,9 @@ PATHS = {
     'clean_data': '../data/clean/monaco_clean.tsv',
     'images': '../../images/'
 }
+
+# Absolute project paths - same result from src/, notebooks/ or repo root
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
@@ -1,4 +1,5 @@
 import psycopg2
+from instrumentation import timed_cursor_factory, dump_snapshot
 
 DB_CONFIG = {
     'host': '127.0.0.1',
@@ -10,7 +11,7 @@ DB_CONFIG = {
 
 def create_table():
     """H5a: Create EXACT pgAdmin schema"""
-    conn = psycopg2.connect(**DB_CONFIG)
+    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=timed_cursor_factory())
     cur = conn.cursor()
     
     cur.execute("""
@@ -31,7 +32,7 @@ def create_table():
 
 def create_indexes():
     """H5b: Fast ML indexes"""
-    conn = psycopg2.connect(**DB_CONFIG)
+    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=timed_cursor_factory())
     conn.autocommit = True
     cur = conn.cursor()
     
@@ -47,9 +48,10 @@ def create_indexes():
 create_table()
 create_indexes()
 
-conn = psycopg2.connect(**DB_CONFIG)
+conn = psycopg2.connect(**DB_CONFIG, cursor_factory=timed_cursor_factory())
 cur = conn.cursor()
 cur.execute("SELECT COUNT(*) FROM pits;")
 print("[OK] H5 COMPLETE: Schema ready | Current rows: {}".format(cur.fetchone()[0]))
 cur.close()
 conn.close()
+dump_snapshot('create_schema')
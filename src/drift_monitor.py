@@ -0,0 +1,362 @@
+"""
+Streaming model + data drift monitor (constant memory, O(1) per event)
+✅ Exponentially decayed mean / variance per feature (half-life 500 events) → alerts follow recent traffic
+✅ P² streaming quantiles (p50 / p95) - 5 markers per feature per quantile
+✅ PSI vs the training deciles of monaco_final_ml.csv (same decayed counts)
+✅ Train MAE = the model's Day 2 holdout error (not in-sample)
+✅ Rolling MAE over a ring buffer once actuals arrive + threshold alerts
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from sklearn.model_selection import train_test_split
+
+from config import DATA_DIR, MODELS_DIR
+from instrumentation import REGISTRY
+
+FINAL_ML_PATH = os.path.join(DATA_DIR, 'features', 'monaco_final_ml.csv')
+PIT_FEATURES_PATH = os.path.join(MODELS_DIR, 'important_features.pkl')
+QUANTILES = (0.5, 0.95)
+PSI_ALERT = 0.2           # >0.2 = significant population shift (common rule of thumb)
+MEAN_SHIFT_ALERT = 1.0    # live mean more than 1 training std away
+MIN_EVENTS = 200          # PSI is noisy on small samples - no data alerts before this
+MIN_ACTUALS = 20          # ... and no MAE alert before this many actuals
+CLEAR_RATIO = 0.8         # hysteresis: an alert clears below 80% of its threshold
+MAE_WINDOW = 200
+MAX_PENDING = 100_000     # predictions waiting for their actual
+HALF_LIFE_EVENTS = 500    # live mean / PSI weight halves every 500 events (~720 effective events)
+HOLDOUT_FRACTION = 0.3    # Day 2 split (notebooks/day2_eda.ipynb: test_size=0.3, random_state=42)
+
+
+def _decay_weights(n, decay):
+    """Weights of a batch of n events, newest = 1 (oldest = decay^(n-1))"""
+    return decay ** np.arange(n - 1, -1, -1, dtype='float64')
+
+
+class DecayedMoments:
+    """Exponentially decayed mean / variance per feature (half-life in events) + plain event count
+
+    A cumulative mean over every event since start dilutes late drift (4 std for
+    2,000 events after 50,000 normal ones moves it by ~0.15 std); decayed sums weigh
+    the last ~half-life/ln 2 events, so a shift shows up at full size.
+    """
+
+    def __init__(self, n_features, half_life=HALF_LIFE_EVENTS):
+        self.decay = 0.5 ** (1.0 / half_life)
+        self.n = 0
+        self.weight = 0.0
+        self.sum = np.zeros(n_features)
+        self.sumsq = np.zeros(n_features)
+
+    def update(self, x):
+        self.n += 1
+        self.weight = self.weight * self.decay + 1.0
+        self.sum = self.sum * self.decay + x
+        self.sumsq = self.sumsq * self.decay + x * x
+
+    def update_batch(self, X):
+        if len(X) == 0:
+            return
+        w = _decay_weights(len(X), self.decay)
+        carry = self.decay ** len(X)
+        self.n += len(X)
+        self.weight = self.weight * carry + w.sum()
+        self.sum = self.sum * carry + w @ X
+        self.sumsq = self.sumsq * carry + w @ (X * X)
+
+    @property
+    def mean(self):
+        return self.sum / self.weight if self.weight else np.full_like(self.sum, np.nan)
+
+    @property
+    def std(self):
+        if not self.weight:
+            return np.full_like(self.sum, np.nan)
+        return np.sqrt(np.maximum(self.sumsq / self.weight - self.mean ** 2, 0))
+
+
+class P2Quantiles:
+    """P² estimator (Jain & Chlamtac) for several quantiles of every feature at once
+
+    State is 5 marker heights/positions per (feature, quantile) - memory never grows.
+    """
+
+    def __init__(self, n_features, qs=QUANTILES):
+        self.qs = tuple(qs)
+        self.n_features = n_features
+        p = np.repeat(np.asarray(self.qs, dtype='float64')[None, :], n_features, axis=0).ravel()
+        self.dn = np.stack([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)], axis=1)
+        self.desired = np.stack([np.zeros_like(p), 2 * p, 4 * p, 2 + 2 * p, np.full_like(p, 4.0)], axis=1)
+        self.pos = np.tile(np.arange(5, dtype='float64'), (len(p), 1))
+        self.height = None
+        self._first = []
+
+    def update(self, x):
+        x = np.repeat(np.asarray(x, dtype='float64'), len(self.qs))  # one column per (feature, q)
+        if self.height is None:
+            self._first.append(x)
+            if len(self._first) == 5:
+                self.height = np.sort(np.stack(self._first, axis=1), axis=1)
+            return
+        h, pos = self.height, self.pos
+        # cell k with h[k] <= x < h[k+1]; extremes extend the outer markers
+        k = np.clip((x[:, None] >= h[:, 1:4]).sum(axis=1), 0, 3)
+        h[:, 0] = np.minimum(h[:, 0], x)
+        h[:, 4] = np.maximum(h[:, 4], x)
+        pos += np.arange(5)[None, :] > k[:, None]
+        self.desired += self.dn
+
+        for i in (1, 2, 3):
+            d = self.desired[:, i] - pos[:, i]
+            hp, hi, hn = h[:, i - 1], h[:, i], h[:, i + 1]
+            pp, pi, pn = pos[:, i - 1], pos[:, i], pos[:, i + 1]
+            move = ((d >= 1) & (pn - pi > 1)) | ((d <= -1) & (pp - pi < -1))
+            if not move.any():
+                continue
+            # full-width arithmetic (s = 0 where a marker stays) beats fancy indexing at this size
+            s = np.where(move, np.sign(d), 0.0)
+            parabolic = hi + s / (pn - pp) * ((pi - pp + s) * (hn - hi) / (pn - pi) +
+                                               (pn - pi - s) * (hi - hp) / (pi - pp))
+            linear = np.where(s > 0, hi + (hn - hi) / (pn - pi), hi - (hp - hi) / (pp - pi))
+            h[:, i] = np.where(move, np.where((hp < parabolic) & (parabolic < hn), parabolic, linear), hi)
+            pos[:, i] += s
+
+    def values(self):
+        """(n_features, len(qs)) current estimates (exact while fewer than 5 events)"""
+        if self.height is not None:
+            return self.height[:, 2].reshape(self.n_features, len(self.qs))
+        if not self._first:
+            return np.full((self.n_features, len(self.qs)), np.nan)
+        seen = np.stack(self._first, axis=1).reshape(self.n_features, len(self.qs), -1)[:, 0, :]
+        return np.quantile(seen, self.qs, axis=1).T
+
+
+class PSI:
+    """Population stability index per feature on training-decile bins (decayed live counts)"""
+
+    def __init__(self, train_X, n_bins=10, eps=1e-4, half_life=HALF_LIFE_EVENTS):
+        edges = [np.unique(np.quantile(col, np.linspace(0, 1, n_bins + 1)[1:-1])) for col in train_X.T]
+        width = max(len(e) for e in edges)
+        # pad with +inf so every feature bins with one vectorized comparison
+        self.edges = np.full((train_X.shape[1], width), np.inf)
+        for j, e in enumerate(edges):
+            self.edges[j, :len(e)] = e
+        self.n_bins = width + 1
+        self.eps = eps
+        self.decay = 0.5 ** (1.0 / half_life)
+        self.expected = self._proportions(self._counts(train_X))
+        self.live = np.zeros_like(self.expected)
+
+    def _bin(self, x):
+        return (x[:, None] >= self.edges).sum(axis=1)
+
+    def _counts(self, X, weights=None):
+        counts = np.zeros((X.shape[1], self.n_bins))
+        for j in range(X.shape[1]):
+            counts[j] = np.bincount(np.searchsorted(self.edges[j], X[:, j], side='right'),
+                                    weights=weights, minlength=self.n_bins)
+        return counts
+
+    def _proportions(self, counts):
+        totals = counts.sum(axis=1, keepdims=True)
+        return np.maximum(counts / np.maximum(totals, 1), self.eps)
+
+    def update(self, x):
+        self.live *= self.decay
+        self.live[np.arange(len(x)), self._bin(x)] += 1
+
+    def update_batch(self, X):
+        if len(X):
+            self.live = self.live * self.decay ** len(X) + self._counts(X, _decay_weights(len(X), self.decay))
+
+    def values(self):
+        actual = self._proportions(self.live)
+        return ((actual - self.expected) * np.log(actual / self.expected)).sum(axis=1)
+
+
+class RollingMAE:
+    """Mean absolute error over the last `window` actuals (ring buffer + running sum)"""
+
+    def __init__(self, window=MAE_WINDOW):
+        self.errors = np.zeros(window)
+        self.window = window
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, error):
+        slot = self.count % self.window
+        self.total += abs(error) - self.errors[slot]
+        self.errors[slot] = abs(error)
+        self.count += 1
+
+    @property
+    def value(self):
+        n = min(self.count, self.window)
+        return self.total / n if n else None
+
+
+class DriftMonitor:
+    """Live input drift + prediction error for one model, against its training distribution"""
+
+    def __init__(self, train_X, feature_names, train_mae=None, mae_threshold=None, name='pit'):
+        train_X = np.asarray(train_X, dtype='float64')
+        self.name = name
+        self.features = list(feature_names)
+        self.train_mean = train_X.mean(axis=0)
+        self.train_std = np.where(train_X.std(axis=0) > 0, train_X.std(axis=0), 1.0)
+        self.train_mae = train_mae
+        self.mae_threshold = mae_threshold if mae_threshold is not None else (
+            None if train_mae is None else max(2 * train_mae, 1.0))
+        d = len(self.features)
+        self.stats = DecayedMoments(d)
+        self.quantiles = P2Quantiles(d)
+        self.psi = PSI(train_X)
+        self.mae = RollingMAE()
+        self.pending = OrderedDict()  # prediction id → predicted value
+        self.alerts = deque(maxlen=100)
+        self._active = set()
+        self._lock = threading.Lock()  # shared by dashboard sessions / service executor threads
+        self._alert_counter = REGISTRY.counter('drift_alerts', model=name)
+
+    @classmethod
+    def from_training(cls, model=None, path=FINAL_ML_PATH, features_path=PIT_FEATURES_PATH, name='pit',
+                      monitored=None):
+        """Training matrix from monaco_final_ml.csv; holdout MAE if the model is given
+
+        monitored = the subset of model features the caller really observes (the
+        dashboard fills the rest with placeholders that would trip every PSI alert).
+        """
+        features = joblib.load(features_path)
+        monitored = features if monitored is None else list(monitored)
+        train = pd.read_csv(path)
+        X = train[monitored].astype('float64').to_numpy()
+        train_mae = None
+        if model is not None:
+            # the Day 2 30% test split: in-sample forest error (0.89s) would make the MAE alert fire early
+            _, X_holdout, _, y_holdout = train_test_split(train[features].fillna(0), train['pit_delta_seconds'],
+                                                          test_size=HOLDOUT_FRACTION, random_state=42)
+            train_mae = float(np.abs(model.predict(X_holdout) - y_holdout).mean())
+        return cls(X, monitored, train_mae=train_mae, name=name)
+
+    # --- events ---
+    def observe(self, x, prediction_id=None, prediction=None):
+        """One live input row (O(features)); remember the prediction until its actual arrives"""
+        x = np.asarray(x, dtype='float64').ravel()
+        with self._lock:
+            self.stats.update(x)
+            self.quantiles.update(x)
+            self.psi.update(x)
+            if prediction_id is not None:
+                self.pending[prediction_id] = float(prediction)
+                if len(self.pending) > MAX_PENDING:
+                    self.pending.popitem(last=False)
+            self.check()
+
+    def observe_batch(self, X, prediction_ids=None, predictions=None):
+        X = np.asarray(X, dtype='float64').reshape(-1, len(self.features))
+        with self._lock:
+            self.stats.update_batch(X)
+            self.psi.update_batch(X)
+            for x in X:  # P² is inherently sequential (still O(1) per row)
+                self.quantiles.update(x)
+            if prediction_ids is not None:
+                for pid, pred in zip(prediction_ids, predictions):
+                    self.pending[pid] = float(pred)
+                while len(self.pending) > MAX_PENDING:
+                    self.pending.popitem(last=False)
+            self.check()
+
+    def actual(self, prediction_id, actual):
+        """Ground truth for an earlier prediction → rolling MAE (unknown ids are ignored)"""
+        with self._lock:
+            pred = self.pending.pop(prediction_id, None)
+            if pred is not None:
+                self.mae.update(pred - float(actual))
+                self.check()
+
+    def error(self, prediction, actual):
+        """Prediction + actual known together"""
+        with self._lock:
+            self.mae.update(float(prediction) - float(actual))
+            self.check()
+
+    # --- alerts ---
+    def _raise(self, key, value, threshold, message):
+        """Edge-triggered with hysteresis: alert once when crossing, re-arm once well below"""
+        if value > threshold and key not in self._active:
+            self._active.add(key)
+            message = message.format(value, threshold)
+            self.alerts.append({'ts': time.time(), 'alert': key, 'message': message})
+            self._alert_counter.inc()
+            print("[DRIFT] " + message)
+        elif value < threshold * CLEAR_RATIO:
+            self._active.discard(key)
+
+    def check(self):
+        if self.stats.n >= MIN_EVENTS:
+            psi = self.psi.values()
+            shift = np.abs(self.stats.mean - self.train_mean) / self.train_std
+            for j, f in enumerate(self.features):
+                self._raise('psi:' + f, psi[j], PSI_ALERT, f + " PSI {:.2f} > {}")
+                self._raise('mean:' + f, shift[j], MEAN_SHIFT_ALERT, f + " mean moved {:.1f} training std (> {})")
+        mae = self.mae.value
+        if self.mae.count >= MIN_ACTUALS and self.mae_threshold is not None:
+            self._raise('mae', mae, self.mae_threshold, "rolling MAE {:.2f}s > {:.2f}s")
+
+    @property
+    def active_alerts(self):
+        return sorted(self._active)
+
+    def snapshot(self):
+        """Per-feature table for the dashboard / GET /drift"""
+        with self._lock:
+            q = self.quantiles.values()
+            return pd.DataFrame({
+                'feature': self.features,
+                'train_mean': self.train_mean,
+                'live_mean': self.stats.mean if self.stats.n else np.nan,
+                'live_std': self.stats.std,
+                'live_p50': q[:, self.quantiles.qs.index(0.5)],
+                'live_p95': q[:, self.quantiles.qs.index(0.95)],
+                'psi': self.psi.values() if self.stats.n else np.nan
+            })
+
+    def summary(self):
+        return {'events': self.stats.n, 'actuals': self.mae.count, 'rolling_mae': self.mae.value,
+                'train_mae': self.train_mae, 'active_alerts': self.active_alerts}
+
+
+if __name__ == '__main__':
+    model = joblib.load(os.path.join(MODELS_DIR, 'pit_predictor_day2.pkl'))
+    monitor = DriftMonitor.from_training(model)
+    train = pd.read_csv(FINAL_ML_PATH)
+    X = train[monitor.features].astype('float64').to_numpy()
+    rng = np.random.default_rng(42)
+
+    # 1) live traffic like training → no data alerts
+    t = time.perf_counter()
+    for i in range(2000):
+        monitor.observe(X[rng.integers(len(X))])
+    print("[DRIFT] 2000 in-distribution events in {:.1f} µs/event | alerts: {}".format(
+        (time.perf_counter() - t) / 2000 * 1e6, monitor.active_alerts))
+
+    # 2) hotter race + slower crews → PSI / mean-shift alerts
+    hot = X[rng.integers(len(X), size=2000)].copy()
+    hot[:, monitor.features.index('temperature_c')] += 6
+    hot[:, monitor.features.index('crew_rolling_mean')] += 3
+    monitor.observe_batch(hot)
+
+    # 3) actuals arrive with a 4s bias → rolling MAE alert (threshold = 2 × holdout MAE)
+    preds = model.predict(train[monitor.features])
+    for pid, (p, a) in enumerate(zip(preds, train['pit_delta_seconds'] + 4)):
+        monitor.observe(X[pid], prediction_id=pid, prediction=p)
+        monitor.actual(pid, a)
+    print(monitor.snapshot().round(3).to_string(index=False))
+    print(monitor.summary())
@@ -1,6 +1,8 @@
 import psycopg2
 import pandas as pd
 import io
+from instrumentation import stage, timed_cursor_factory, dump_snapshot
+from validation import RAW_PITS, validate_frame
 
 DB_CONFIG = {
     'host': '127.0.0.1',
@@ -10,10 +12,13 @@ DB_CONFIG = {
     'port': 5432
 }
 
-df = pd.read_csv('../../data/clean/monaco_clean.tsv', sep='\t')
+with stage('H6.read_tsv'):
+    df = pd.read_csv('../../data/clean/monaco_clean.tsv', sep='\t')
+with stage('H6.validate'):
+    df, rejected = validate_frame(df, RAW_PITS, quarantine='monaco_clean')  # NOT NULL / range / dup guard
 print("[H6] Loading {} clean pits | Columns: {}".format(len(df), list(df.columns)))
 
-conn = psycopg2.connect(**DB_CONFIG)
+conn = psycopg2.connect(**DB_CONFIG, cursor_factory=timed_cursor_factory())
 cur = conn.cursor()
 
 # Clean slate
@@ -25,13 +30,14 @@ print("[H6] Table truncated - ready for fresh load")
 columns = ['session_id', 'driver', 'team', 'in_time', 'out_time', 'pit_delta_seconds']
 print("[H6] Using columns:", columns)
 
-tsv_buffer = io.StringIO()
-df[columns].to_csv(tsv_buffer, sep='\t', header=False, index=False, na_rep='\\N')
-tsv_buffer.seek(0)
+with stage('H7.copy'):
+    tsv_buffer = io.StringIO()
+    df[columns].to_csv(tsv_buffer, sep='\t', header=False, index=False, na_rep='\\N')
+    tsv_buffer.seek(0)
 
-cur.copy_from(tsv_buffer, 'pits', sep='\t', columns=columns)
-tsv_buffer.close()
-conn.commit()
+    cur.copy_from(tsv_buffer, 'pits', sep='\t', columns=columns)
+    tsv_buffer.close()
+    conn.commit()
 
 print("[H7] SUCCESS: {} rows loaded to PostgreSQL!".format(len(df)))
 
@@ -53,5 +59,6 @@ print("[STATS] Range: {:.1f}s - {:.1f}s | Overall avg: {:.1f}s".format(
 
 cur.close()
 conn.close()
+dump_snapshot('etl_core')
 print("[OK] DAY1 ETL COMPLETE! 72 Monaco pits live in PostgreSQL")
 print("[NEXT] Check pgAdmin + git commit")
@@ -0,0 +1,301 @@
+"""
+Append-only memory-mapped race event log + per-driver live state
+✅ Fixed-size binary records (numpy structured dtype) in one mmap'd file
+✅ Any process appends under a file lock; the header count is the commit point
+✅ Readers tail zero-copy: view()/tail() are numpy views straight onto the mapping
+✅ Restart mid-race: snapshot + vectorized replay of the log tail → state in milliseconds
+"""
+
+import mmap
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows
+    FCNTL_AVAILABLE = False
+
+try:
+    import msvcrt
+    MSVCRT_AVAILABLE = True
+except ImportError:
+    MSVCRT_AVAILABLE = False
+
+LIVE_DIR = os.path.join(DATA_DIR, 'live')
+LOG_PATH = os.path.join(LIVE_DIR, 'race_events.log')
+SNAPSHOT_PATH = os.path.join(LIVE_DIR, 'race_state.pkl')
+
+MAGIC = b'PITLOG01'
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('record_size', '<u4'), ('reserved', '<u4'), ('count', '<u8')])
+HEADER_SIZE = 64
+RECORD_DTYPE = np.dtype([
+    ('seq', '<u8'),          # position in the log (0-based)
+    ('ts', '<f8'),           # unix seconds
+    ('session_id', '<u4'),
+    ('driver', 'S4'),        # TLA, e.g. b'LEC'
+    ('kind', 'u1'),
+    ('lap', '<u2'),
+    ('value', '<f4'),        # pit delta s / lap time s / fatigue % / predicted s
+    ('aux', '<f4')
+])
+INITIAL_CAPACITY = 1 << 16
+
+# event kinds
+PIT, LAP, FATIGUE, PREDICTION = 1, 2, 3, 4
+KIND_NAMES = {PIT: 'pit', LAP: 'lap', FATIGUE: 'fatigue', PREDICTION: 'prediction'}
+
+
+class EventLog:
+    """One mmap'd file: 64-byte header (magic, record size, committed count) + fixed-size records"""
+
+    def __init__(self, path=LOG_PATH, initial_capacity=INITIAL_CAPACITY):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._thread_lock = threading.Lock()
+        with self._locked():
+            new = os.fstat(self._fd).st_size < HEADER_SIZE
+            if new:
+                os.ftruncate(self._fd, HEADER_SIZE + initial_capacity * RECORD_DTYPE.itemsize)
+            self._map()
+            if new:
+                self._header['magic'], self._header['record_size'] = MAGIC, RECORD_DTYPE.itemsize
+        if self._header['magic'][0] != MAGIC or self._header['record_size'][0] != RECORD_DTYPE.itemsize:
+            raise ValueError("{} is not a race event log (or has another record layout)".format(path))
+
+    def _map(self):
+        """(Re)map the whole file; old views stay valid until their last reference goes"""
+        size = os.fstat(self._fd).st_size
+        self._mm = mmap.mmap(self._fd, size)
+        self._header = np.ndarray(1, dtype=HEADER_DTYPE, buffer=self._mm)
+        self.capacity = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        self._records = np.ndarray(self.capacity, dtype=RECORD_DTYPE, buffer=self._mm, offset=HEADER_SIZE)
+
+    def _locked(self):
+        return _FileLock(self._fd, self._thread_lock)
+
+    def __len__(self):
+        return int(self._header['count'][0])
+
+    def _refresh(self):
+        """Another process may have grown the file since we mapped it"""
+        if len(self) > self.capacity:
+            self._map()
+
+    def append(self, events):
+        """Append a structured array / list of dicts → seq of the first new record"""
+        events = to_records(events)
+        n = len(events)
+        with self._locked():
+            count = len(self)
+            if count + n > self.capacity:
+                # grow x2 (unless another process already did), then remap
+                needed = HEADER_SIZE + max(count + n, self.capacity * 2) * RECORD_DTYPE.itemsize
+                if os.fstat(self._fd).st_size < needed:
+                    os.ftruncate(self._fd, needed)
+                self._map()
+            events['seq'] = np.arange(count, count + n, dtype='uint64')
+            self._records[count:count + n] = events
+            self._header['count'] = count + n  # commit: readers never see a partial record
+        return count
+
+    def flush(self):
+        """fsync the mapping (the page cache already survives a process crash)"""
+        self._mm.flush()
+
+    def view(self, start=0, stop=None):
+        """Zero-copy numpy view of committed records [start, stop)"""
+        self._refresh()
+        count = len(self)
+        stop = count if stop is None else min(stop, count)
+        return self._records[start:stop]
+
+    def tail(self, after_seq=-1):
+        """Records with seq > after_seq (zero-copy)"""
+        return self.view(int(after_seq) + 1)
+
+    def follow(self, after_seq=-1, poll_s=0.05):
+        """Yield new record batches forever (live readers)"""
+        while True:
+            batch = self.tail(after_seq)
+            if len(batch):
+                after_seq = int(batch['seq'][-1])
+                yield batch
+            else:
+                time.sleep(poll_s)
+
+    def close(self):
+        self._header = self._records = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # views handed out are still alive; the mapping goes with them
+        os.close(self._fd)
+
+
+class _FileLock:
+    """Exclusive lock across processes (fcntl / msvcrt) and threads"""
+
+    def __init__(self, fd, thread_lock):
+        self.fd = fd
+        self.thread_lock = thread_lock
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if FCNTL_AVAILABLE:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        elif MSVCRT_AVAILABLE:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if FCNTL_AVAILABLE:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        elif MSVCRT_AVAILABLE:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        self.thread_lock.release()
+
+
+def to_records(events):
+    """Structured array, DataFrame or list of dicts (driver, kind, value, lap, session_id, ts, aux)"""
+    if isinstance(events, np.ndarray) and events.dtype == RECORD_DTYPE:
+        return events.copy()
+    frame = pd.DataFrame(events)
+    records = np.zeros(len(frame), dtype=RECORD_DTYPE)
+    records['ts'] = frame['ts'] if 'ts' in frame else time.time()
+    for name in ('session_id', 'kind', 'lap', 'value', 'aux'):
+        if name in frame:
+            records[name] = frame[name].fillna(0)
+    records['driver'] = frame['driver'].astype(str).str.encode('ascii').to_numpy()
+    return records
+
+
+def _last_per_driver(rows, mask=None):
+    """(drivers, index of each driver's LAST masked record) - log order == seq order
+
+    Fancy assignment with repeated indices does not guarantee which write wins,
+    so the last record is picked explicitly (first hit in reversed order).
+    """
+    idx = np.arange(len(rows))[::-1] if mask is None else np.flatnonzero(mask)[::-1]
+    drivers, first = np.unique(rows[idx], return_index=True)
+    return drivers, idx[first]
+
+
+class RaceState:
+    """Per-driver rolling state as mergeable sums (so snapshot + replay == full replay)"""
+
+    COLUMNS = ['pits', 'pit_sum', 'pit_sumsq', 'last_pit_delta', 'last_lap', 'last_lap_time',
+               'fatigue_pct', 'last_prediction', 'last_ts']
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype='<u4')  # 4-byte driver code as one integer (sorted)
+        self.table = np.zeros((0, len(self.COLUMNS)))
+        self.through_seq = -1
+
+    def _rows(self, drivers):
+        """Row index per driver, adding new drivers (integer keys: sort/search 4x cheaper than bytes)"""
+        keys = np.ascontiguousarray(drivers, dtype='S4').view('<u4')
+        new = np.setdiff1d(np.unique(keys), self.keys)
+        if len(new):
+            merged = np.concatenate([self.keys, new])
+            order = np.argsort(merged)
+            table = np.vstack([self.table, np.zeros((len(new), len(self.COLUMNS)))])
+            self.keys, self.table = merged[order], table[order]
+            self.table[np.isin(self.keys, new), self.COLUMNS.index('last_pit_delta'):] = np.nan
+        return np.searchsorted(self.keys, keys)
+
+    def apply(self, records):
+        """Fold a batch of log records in (vectorized: bincount sums + last value per driver)"""
+        if len(records) == 0:
+            return self
+        rows = self._rows(records['driver'])
+        col = self.COLUMNS.index
+        n = len(self.keys)
+        kind, value = records['kind'], records['value'].astype('float64')
+
+        pit = kind == PIT
+        self.table[:, col('pits')] += np.bincount(rows[pit], minlength=n)
+        self.table[:, col('pit_sum')] += np.bincount(rows[pit], weights=value[pit], minlength=n)
+        self.table[:, col('pit_sumsq')] += np.bincount(rows[pit], weights=value[pit] ** 2, minlength=n)
+
+        for mask, columns in [(pit, {'last_pit_delta': value}),
+                              (kind == LAP, {'last_lap': records['lap'], 'last_lap_time': value}),
+                              (kind == FATIGUE, {'fatigue_pct': value}),
+                              (kind == PREDICTION, {'last_prediction': value}),
+                              (None, {'last_ts': records['ts']})]:
+            drivers, last = _last_per_driver(rows, mask)
+            for name, values in columns.items():
+                self.table[drivers, col(name)] = values[last]
+        self.through_seq = int(records['seq'][-1])
+        return self
+
+    def to_frame(self):
+        frame = pd.DataFrame(self.table, columns=self.COLUMNS)
+        frame.insert(0, 'driver', [d.decode() for d in self.keys.view('S4')])
+        pits = frame['pits'].replace(0, np.nan)
+        frame['crew_rolling_mean'] = frame['pit_sum'] / pits
+        frame['crew_rolling_std'] = np.sqrt(np.maximum(frame['pit_sumsq'] / pits - frame['crew_rolling_mean'] ** 2, 0))
+        return frame.drop(columns=['pit_sum', 'pit_sumsq'])
+
+    def save(self, path=SNAPSHOT_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump({'keys': self.keys, 'table': self.table, 'through_seq': self.through_seq}, f)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH):
+        state = cls()
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+            state.keys, state.table, state.through_seq = saved['keys'], saved['table'], saved['through_seq']
+        return state
+
+    @classmethod
+    def recover(cls, log, snapshot_path=SNAPSHOT_PATH):
+        """Snapshot (if any) + replay of every record after it"""
+        state = cls.load(snapshot_path)
+        if state.through_seq >= len(log):  # snapshot from another / truncated log
+            state = cls()
+        return state.apply(log.tail(state.through_seq))
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), 'race_events.log')
+    log = EventLog(path, initial_capacity=1024)
+
+    pits = pd.read_csv(os.path.join(DATA_DIR, 'raw', 'monaco_raw.csv'))
+    log.append(pd.DataFrame({'driver': pits['driver'], 'kind': PIT, 'value': pits['pit_delta_seconds'],
+                             'session_id': pits['session_id']}))
+    rng = np.random.default_rng(42)
+    n = 2_000_000
+    drivers = np.array([d.encode() for d in pits['driver'].unique()], dtype='S4')
+    laps = np.zeros(n, dtype=RECORD_DTYPE)
+    laps['driver'] = drivers[rng.integers(0, len(drivers), n)]
+    laps['kind'] = LAP
+    laps['lap'] = rng.integers(1, 79, n)
+    laps['value'] = rng.normal(85.5, 1.8, n)
+    t = time.perf_counter()
+    log.append(laps)
+    print("[EVENTLOG] Appended {:,} records in {:.0f} ms (file grew to {:,} slots)".format(
+        n, (time.perf_counter() - t) * 1000, log.capacity))
+
+    reader = EventLog(path)
+    print("[EVENTLOG] Reader view shares the mapping:", np.shares_memory(reader.view(0, 10), reader._mm))
+    t = time.perf_counter()
+    state = RaceState.recover(reader, os.path.join(os.path.dirname(path), 'none.pkl'))
+    print("[EVENTLOG] Replayed {:,} records in {:.0f} ms".format(len(reader), (time.perf_counter() - t) * 1000))
+    print(state.to_frame()[['driver', 'pits', 'crew_rolling_mean', 'crew_rolling_std', 'last_lap']].round(2).to_string(index=False))
@@ -0,0 +1,22 @@
+"""
+Fatigue proxy lookup - shared by the physics trainer and the similar-pit index
+✅ Monaco fatigue proxy per (driver, lap) from fatigue_proxy_curves.csv
+✅ pandas only (safe to import from the dashboard)
+"""
+
+import os
+
+import pandas as pd
+
+from config import DATA_DIR
+
+FATIGUE_PATH = os.path.join(DATA_DIR, 'fatigue', 'fatigue_proxy_curves.csv')
+MAX_FATIGUE = 0.25  # CARLA fatigue_factor ceiling (25%)
+
+
+def load_fatigue_lookup(path=FATIGUE_PATH):
+    """Monaco fatigue proxy per (driver, lap) as a 0-0.25 fatigue_factor (Le Mans rows dropped)"""
+    fatigue = pd.read_csv(path, usecols=['entity', 'lap_number', 'fatigue_pct', 'PitStatus'])
+    fatigue = fatigue[fatigue['PitStatus'].notna()]
+    lookup = fatigue.groupby(['entity', 'lap_number'])['fatigue_pct'].mean()
+    return (lookup / 100).clip(0, MAX_FATIGUE).rename('fatigue_factor')
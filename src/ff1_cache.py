@@ -0,0 +1,151 @@
+"""
+FastF1 cache reader - raw .ff1pkl payloads without a live FastF1 session
+✅ Walks cache/<season>/<event>/<session>/ for every cached session
+✅ Loads any payload (timing, weather, track status, race control...)
+"""
+
+import os
+import pickle
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR
+
+TIMING_PAYLOAD = '_extended_timing_data'
+
+
+def iter_session_dirs(cache_dir=CACHE_DIR):
+    """Yield every cached session directory that has extended timing data"""
+    for root, dirs, files in os.walk(cache_dir):
+        dirs.sort()
+        if TIMING_PAYLOAD + '.ff1pkl' in files:
+            yield root
+
+
+def has_payload(session_dir, name):
+    return os.path.exists(os.path.join(session_dir, name + '.ff1pkl'))
+
+
+def load_payload(session_dir, name):
+    """Unpickle cache/<...>/<name>.ff1pkl and return its 'data' field"""
+    with open(os.path.join(session_dir, name + '.ff1pkl'), 'rb') as f:
+        return pickle.load(f)['data']
+
+
+def session_key(session_dir):
+    """cache/2024/2024-05-26_Monaco_Grand_Prix/2024-05-26_Race → (2024, 'Monaco_Grand_Prix', 'Race')"""
+    parts = os.path.normpath(session_dir).split(os.sep)
+    season, event, session = parts[-3], parts[-2], parts[-1]
+    return int(season), event.split('_', 1)[-1], session.split('_', 1)[-1]
+
+
+def driver_codes(session_dir):
+    """Racing number → three-letter code ('16' → 'LEC')"""
+    if not has_payload(session_dir, 'driver_info'):
+        return {}
+    return {num: info.get('Tla', num) for num, info in load_payload(session_dir, 'driver_info').items()}
+
+
+def find_session(season, event, session='Race', cache_dir=CACHE_DIR):
+    """First cached session matching season + event substring ('Monaco') + session name"""
+    for session_dir in iter_session_dirs(cache_dir):
+        s_season, s_event, s_session = session_key(session_dir)
+        if s_season == season and event.lower() in s_event.lower() and s_session == session:
+            return session_dir
+    return None
+
+
+# Track status code ↔ race control message that announces the same moment
+_T0_ANCHORS = [('5', 'RED FLAG'), ('4', 'SAFETY CAR DEPLOYED'), ('6', 'VIRTUAL SAFETY CAR DEPLOYED')]
+_T0_TOLERANCE = timedelta(minutes=10)  # scheduled-start estimate vs. the real start (formation lap, delays)
+
+
+def _scheduled_t0(session_dir):
+    """Scheduled start minus the first 'Started' status time (accurate to a few minutes)"""
+    info = load_payload(session_dir, 'session_info')
+    started = timedelta(0)
+    if has_payload(session_dir, 'session_status_data'):
+        sessions = load_payload(session_dir, 'session_status_data')
+        started = next((t for t, s in zip(sessions['Time'], sessions['Status']) if s == 'Started'), started)
+    return info['StartDate'] - info['GmtOffset'] - started
+
+
+def session_t0(session_dir):
+    """UTC wall-clock time of session time 0 (naive datetime)
+
+    Session-relative payloads (timing, weather, track status) are aligned with
+    wall-clock ones (race control, DB timestamps) by joining track-status
+    red flag / SC / VSC entries to the nearest race-control message with the
+    same meaning (on the scheduled-start clock, within 10 min). Falls back
+    to the scheduled estimate when nothing matches.
+    """
+    approx = _scheduled_t0(session_dir)
+    if not (has_payload(session_dir, 'track_status_data') and has_payload(session_dir, 'race_control_messages')):
+        return approx
+    status = load_payload(session_dir, 'track_status_data')
+    rcm = load_payload(session_dir, 'race_control_messages')
+    offsets = []
+    for code, text in _T0_ANCHORS:
+        status_times = pd.DataFrame({'at': [approx + t for t, s in zip(status['Time'], status['Status'])
+                                            if s == code]})
+        rc_times = pd.DataFrame({'at': [t for t, m in zip(rcm['Time'], rcm['Message'])
+                                        if m.strip().upper() == text]})
+        if status_times.empty or rc_times.empty:
+            continue
+        rc_times['rc'] = rc_times['at']
+        matched = pd.merge_asof(status_times.sort_values('at'), rc_times.sort_values('at'), on='at',
+                                direction='nearest', tolerance=_T0_TOLERANCE).dropna()
+        offsets += (matched['rc'] - matched['at']).tolist()
+    if not offsets:
+        return approx
+    offsets.sort()
+    return approx + offsets[len(offsets) // 2].to_pytimedelta()
+
+
+def gmt_offset(session_dir):
+    """Track-local offset from UTC (Monaco: +2h)"""
+    return load_payload(session_dir, 'session_info')['GmtOffset']
+
+
+def lap_start_times(session_dir):
+    """Session seconds at which each race lap started (index 0 = lap 1)
+
+    lap_count marks laps 2..N; lap 1 starts at the FIRST 'Started' status.
+    A red-flag restart (Monaco 2024: red on lap 1, restart at 5754s) is an
+    event inside lap 1, not its start.
+    """
+    counts = load_payload(session_dir, 'lap_count')
+    laps = {lap: t.total_seconds() for t, lap in zip(counts['Time'], counts['CurrentLap'])}
+    n_laps = max(laps)
+    starts = [laps.get(lap, float('nan')) for lap in range(1, n_laps + 1)]
+    if n_laps > 1 and has_payload(session_dir, 'session_status_data'):
+        sessions = load_payload(session_dir, 'session_status_data')
+        started = [t.total_seconds() for t, s in zip(sessions['Time'], sessions['Status'])
+                   if s == 'Started' and t.total_seconds() < starts[1]]
+        if started:
+            starts[0] = started[0]
+    return starts
+
+
+def to_session_seconds(values, t0=None, utc_offset=None):
+    """Timestamps → session seconds
+
+    Accepts float seconds, timedeltas (FastF1 'Time'/'SessionTime'), tz-aware
+    datetimes (converted to UTC) or naive datetimes (taken as track-local time,
+    like pits.in_time from generate_monaco_data.py; utc_offset = gmt_offset()).
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_timedelta64_dtype(s):
+        return s.dt.total_seconds().to_numpy()
+    if pd.api.types.is_numeric_dtype(s):
+        return s.to_numpy(dtype='float64')
+    if t0 is None:
+        raise ValueError("no session t0 - pass session seconds instead of datetimes")
+    ts = pd.to_datetime(s)
+    if ts.dt.tz is not None:
+        utc = ts.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+    else:
+        utc = ts.to_numpy() - np.timedelta64(utc_offset or timedelta(0))
+    return (utc - np.datetime64(t0, 'ns')) / np.timedelta64(1, 's')
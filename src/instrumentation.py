@@ -0,0 +1,301 @@
+"""
+Hot-path instrumentation - Prometheus-style counters + latency histograms
+✅ timed('name') works as decorator AND context manager (~1µs overhead)
+✅ stage('H6.copy') = timed + optional cProfile/pyinstrument capture
+✅ TimedCursor for every psycopg2 round trip
+✅ Real p50/p95/p99 for the dashboard (recent-sample ring per histogram)
+
+Profiling: set PIT_PROFILE=cprofile (or pyinstrument) → reports/profiles/<stage>.*
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+from config import BASE_DIR
+
+# Latency buckets in seconds (Prometheus client defaults, finer at the low end)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RECENT_SAMPLES = 2048  # ring size behind the p50/p95/p99 numbers
+
+PROFILE_MODE = os.environ.get('PIT_PROFILE', '').lower()
+PROFILE_DIR = os.path.join(BASE_DIR, 'reports', 'profiles')
+METRICS_DIR = os.path.join(BASE_DIR, 'reports', 'metrics')
+PROCESS_START = time.time()
+
+
+def _label_str(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(k, v) for k, v in items) + '}'
+
+
+class Counter:
+    """Monotonic counter"""
+
+    def __init__(self, name, labels=()):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+    def expose(self):
+        return ['{}_total{} {}'.format(self.name, _label_str(self.labels), self.value)]
+
+
+class Histogram:
+    """Cumulative-bucket histogram + ring of recent samples for exact recent quantiles"""
+
+    def __init__(self, name, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # last slot = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._recent = [0.0] * RECENT_SAMPLES
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.bucket_counts[i] += 1
+            self._recent[self.count % RECENT_SAMPLES] = value
+            self.count += 1
+            self.sum += value
+
+    def quantiles(self, qs=(0.5, 0.95, 0.99)):
+        """Quantiles over the last RECENT_SAMPLES observations (None if empty)"""
+        with self._lock:
+            n = min(self.count, RECENT_SAMPLES)
+            samples = sorted(self._recent[:n])
+        if not samples:
+            return [None] * len(qs)
+        return [samples[min(int(q * n), n - 1)] for q in qs]
+
+    def expose(self):
+        lines = []
+        cumulative = 0
+        for le, c in zip(self.buckets + ('+Inf',), self.bucket_counts):
+            cumulative += c
+            lines.append('{}_bucket{} {}'.format(
+                self.name, _label_str(self.labels, {'le': le}), cumulative))
+        lines.append('{}_sum{} {}'.format(self.name, _label_str(self.labels), self.sum))
+        lines.append('{}_count{} {}'.format(self.name, _label_str(self.labels), self.count))
+        return lines
+
+
+class Registry:
+    """Metric store keyed by (name, labels)"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, cls(name, key[1]))
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(Counter, name, labels)
+
+    def histogram(self, name, **labels):
+        return self._get(Histogram, name, labels)
+
+    def render_prometheus(self):
+        """Text exposition format (for /metrics endpoints)"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """One dict per histogram: name, labels, count, mean/p50/p95/p99 in ms"""
+        rows = []
+        for metric in list(self._metrics.values()):
+            if not isinstance(metric, Histogram) or metric.count == 0:
+                continue
+            p50, p95, p99 = metric.quantiles()
+            rows.append({
+                'name': metric.name,
+                'labels': dict(metric.labels),
+                'count': metric.count,
+                'mean_ms': metric.sum / metric.count * 1000,
+                'p50_ms': p50 * 1000,
+                'p95_ms': p95 * 1000,
+                'p99_ms': p99 * 1000
+            })
+        return rows
+
+
+REGISTRY = Registry()
+
+
+class timed:
+    """Time a block or function into histogram `name` (seconds) and count errors
+
+    with timed('model_predict_seconds', model='pit'): ...
+    @timed('fastf1_load_seconds')
+    def load(): ...
+    """
+
+    def __init__(self, name, **labels):
+        self.histogram = REGISTRY.histogram(name, **labels)
+        self.errors = REGISTRY.counter(name.replace('_seconds', '') + '_errors', **labels)
+        self._local = threading.local()
+
+    def __enter__(self):
+        starts = getattr(self._local, 'starts', None)
+        if starts is None:
+            starts = self._local.starts = []
+        starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self._local.starts.pop())
+        if exc_type is not None:
+            self.errors.inc()
+        return False
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self:
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class profiled:
+    """Capture a cProfile/pyinstrument profile of one stage when PIT_PROFILE is set"""
+
+    def __init__(self, stage_name, mode=None):
+        self.stage_name = stage_name
+        self.mode = PROFILE_MODE if mode is None else mode
+        self._profiler = None
+
+    def __enter__(self):
+        if self.mode == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print("[PROFILE] pip install pyinstrument - skipping {}".format(self.stage_name))
+                return self
+            self._profiler = Profiler()
+            self._profiler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profiler is None:
+            return False
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, self.stage_name.replace('/', '_'))
+        if self.mode == 'cprofile':
+            self._profiler.disable()
+            self._profiler.dump_stats(base + '.prof')
+            print("[PROFILE] {} → {}.prof".format(self.stage_name, base))
+        else:
+            self._profiler.stop()
+            with open(base + '.html', 'w') as f:
+                f.write(self._profiler.output_html())
+            print("[PROFILE] {} → {}.html".format(self.stage_name, base))
+        self._profiler = None
+        return False
+
+
+class stage:
+    """Pipeline stage = timed('pipeline_stage_seconds', stage=...) + optional profile"""
+
+    def __init__(self, name):
+        self.name = name
+        self._timer = timed('pipeline_stage_seconds', stage=name)
+        self._profile = profiled(name)
+
+    def __enter__(self):
+        self._profile.__enter__()
+        self._timer.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._timer.__exit__(exc_type, exc, tb)
+        self._profile.__exit__(exc_type, exc, tb)
+        return False
+
+
+_TIMED_CURSOR = None
+
+
+def timed_cursor_factory():
+    """psycopg2 cursor class timing every execute/executemany/copy round trip
+
+    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=timed_cursor_factory())
+    """
+    global _TIMED_CURSOR
+    if _TIMED_CURSOR is None:
+        import psycopg2.extensions
+
+        execute_t = timed('db_roundtrip_seconds', op='execute')
+        executemany_t = timed('db_roundtrip_seconds', op='executemany')
+        copy_t = timed('db_roundtrip_seconds', op='copy')
+
+        class TimedCursor(psycopg2.extensions.cursor):
+            def execute(self, query, vars=None):
+                with execute_t:
+                    return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                with executemany_t:
+                    return super().executemany(query, vars_list)
+
+            def copy_from(self, *args, **kwargs):
+                with copy_t:
+                    return super().copy_from(*args, **kwargs)
+
+            def copy_expert(self, *args, **kwargs):
+                with copy_t:
+                    return super().copy_expert(*args, **kwargs)
+
+        _TIMED_CURSOR = TimedCursor
+    return _TIMED_CURSOR
+
+
+def dump_snapshot(process_name, directory=METRICS_DIR):
+    """Write this process's latency snapshot to reports/metrics/<process_name>.json"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, process_name + '.json')
+    with open(path, 'w') as f:
+        json.dump({'process': process_name, 'written_at': time.time(),
+                   'metrics': REGISTRY.snapshot()}, f, indent=1)
+    return path
+
+
+def load_snapshots(directory=METRICS_DIR):
+    """All pipeline snapshots written by dump_snapshot() (for the dashboard)"""
+    if not os.path.isdir(directory):
+        return []
+    snaps = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.json'):
+            with open(os.path.join(directory, name)) as f:
+                snaps.append(json.load(f))
+    return snaps
+
+
+def uptime_seconds():
+    return time.time() - PROCESS_START
@@ -0,0 +1,243 @@
+"""
+Out-of-core lap analytics on the full FastF1 extended timing data
+✅ Every cached session → one Parquet fragment (hive-partitioned season/event/session)
+✅ Sector times, speed traps, stint, compound, tyre life per lap (vs 6 columns in monaco_combined.csv)
+✅ Aggregations run on DuckDB when installed, else chunked Arrow batch scans
+✅ Only mergeable partial sums are held in memory → multi-season safe
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR, DATA_DIR
+from ff1_cache import (iter_session_dirs, load_payload, has_payload, session_key,
+                       driver_codes, TIMING_PAYLOAD)
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+STORE_DIR = os.path.join(DATA_DIR, 'lapstore')
+SECTORS = ['sector1_s', 'sector2_s', 'sector3_s']
+SCAN_BATCH_ROWS = 256_000
+
+
+def _seconds(series):
+    return series.dt.total_seconds().astype('float64')
+
+
+def laps_from_session(session_dir):
+    """One row per driver lap from _extended_timing_data + timing_app_data (stint compound/tyre age)"""
+    laps = load_payload(session_dir, TIMING_PAYLOAD)[0]
+    season, event, session = session_key(session_dir)
+    codes = driver_codes(session_dir)
+
+    df = pd.DataFrame({
+        'season': season,
+        'event': event,
+        'session': session,
+        'driver': laps['Driver'].map(lambda d: codes.get(d, d)).astype(str),
+        'lap': laps['NumberOfLaps'].astype('int16'),
+        'stint': laps['NumberOfPitStops'].astype('int16'),
+        'session_time_s': _seconds(laps['Time']),
+        'lap_time_s': _seconds(laps['LapTime']),
+        'sector1_s': _seconds(laps['Sector1Time']),
+        'sector2_s': _seconds(laps['Sector2Time']),
+        'sector3_s': _seconds(laps['Sector3Time']),
+        'speed_i1': laps['SpeedI1'].astype('float32'),
+        'speed_i2': laps['SpeedI2'].astype('float32'),
+        'speed_fl': laps['SpeedFL'].astype('float32'),
+        'speed_st': laps['SpeedST'].astype('float32'),
+        'is_pit_in': laps['PitInTime'].notna().to_numpy(),
+        'is_pit_out': laps['PitOutTime'].notna().to_numpy(),
+        'racing_number': laps['Driver'].astype(str)
+    })
+    df = df.sort_values(['driver', 'lap'], kind='stable').reset_index(drop=True)
+    df['lap_in_stint'] = (df.groupby(['driver', 'stint']).cumcount() + 1).astype('int16')
+
+    # Stint compound + laps already on the set when fitted (timing app is 0-based per stint)
+    df['compound'] = 'UNKNOWN'
+    df['tyre_life'] = df['lap_in_stint'].astype('int16')
+    if has_payload(session_dir, 'timing_app_data'):
+        app = load_payload(session_dir, 'timing_app_data')
+        # the timing app opens each new stint with an 'UNKNOWN' placeholder (StartLaps=0) before the real set
+        known = app['Compound'].notna() & (app['Compound'] != 'UNKNOWN')
+        stints = (app[known]
+                     .groupby(['Driver', 'Stint'], as_index=False)
+                     .agg(compound=('Compound', 'first'), start_laps=('StartLaps', 'first')))
+        stints = stints.rename(columns={'Driver': 'racing_number', 'Stint': 'stint'})
+        stints['stint'] = stints['stint'].astype('int16')
+        df = df.drop(columns='compound').merge(stints, on=['racing_number', 'stint'], how='left')
+        df['compound'] = df['compound'].fillna('UNKNOWN')
+        df['tyre_life'] = (df['start_laps'].fillna(0) + df['lap_in_stint']).astype('int16')
+        df = df.drop(columns='start_laps')
+
+    return df.drop(columns='racing_number')
+
+
+def fragment_path(store_dir, season, event, session):
+    return os.path.join(store_dir, 'season={}'.format(season), 'event={}'.format(event),
+                        'session={}'.format(session), 'laps.parquet')
+
+
+def build_store(cache_dir=CACHE_DIR, store_dir=STORE_DIR, force=False):
+    """Convert every cached session into the columnar store (skips fragments newer than their source)"""
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pip install pyarrow for the lap store")
+    written, skipped = 0, 0
+    for session_dir in iter_session_dirs(cache_dir):
+        out = fragment_path(store_dir, *session_key(session_dir))
+        src = os.path.join(session_dir, TIMING_PAYLOAD + '.ff1pkl')
+        if not force and os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(src):
+            skipped += 1
+            continue
+        df = laps_from_session(session_dir)
+        # partition keys live in the directory names
+        table = pa.Table.from_pandas(df.drop(columns=['season', 'event', 'session']), preserve_index=False)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        pq.write_table(table, out)
+        written += 1
+        print("[LAPSTORE] {} laps → {}".format(len(df), out))
+    return written, skipped
+
+
+def _dataset(store_dir):
+    return ds.dataset(store_dir, format='parquet', partitioning='hive')
+
+
+def _clean_lap_filter():
+    """Green-flag racing laps only: timed, not an in/out lap"""
+    return (ds.field('lap_time_s').is_valid()
+            & ~ds.field('is_pit_in') & ~ds.field('is_pit_out'))
+
+
+def _scan(store_dir, columns, batch_rows=SCAN_BATCH_ROWS):
+    """Stream pandas chunks of clean laps - never the whole store at once"""
+    scanner = _dataset(store_dir).scanner(columns=columns, filter=_clean_lap_filter(),
+                                          batch_size=batch_rows)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _combine(partials, keys):
+    if not partials:
+        return pd.DataFrame()
+    return pd.concat(partials, ignore_index=True).groupby(keys, as_index=False).sum()
+
+
+def sector_decay(store_dir=STORE_DIR, engine='auto'):
+    """Per (season, event, driver, stint, compound): OLS slope of each sector time vs lap_in_stint (s/lap)"""
+    keys = ['season', 'event', 'driver', 'stint', 'compound']
+    if engine == 'duckdb' or (engine == 'auto' and DUCKDB_AVAILABLE):
+        glob = os.path.join(store_dir, '**', '*.parquet').replace('\\', '/')
+        slopes = ', '.join("regr_slope({0}, lap_in_stint) AS {0}_decay".format(s) for s in SECTORS)
+        return duckdb.sql("""
+            SELECT {keys}, COUNT(*) AS laps, {slopes}
+            FROM read_parquet('{glob}', hive_partitioning = true)
+            WHERE lap_time_s IS NOT NULL AND NOT is_pit_in AND NOT is_pit_out
+            GROUP BY {keys} ORDER BY {keys}
+        """.format(keys=', '.join(keys), slopes=slopes, glob=glob)).df()
+
+    # Arrow path: per-batch sufficient statistics n, Σx, Σx², Σy, Σxy (mergeable across batches)
+    partials = []
+    for chunk in _scan(store_dir, keys + ['lap_in_stint'] + SECTORS):
+        x = chunk['lap_in_stint'].astype('float64')
+        stats = chunk[keys].copy()
+        stats['n'] = 1
+        stats['sx'] = x
+        stats['sxx'] = x * x
+        for s in SECTORS:
+            y = chunk[s].fillna(0.0)
+            has_y = chunk[s].notna().astype('float64')
+            stats[s + '_n'] = has_y
+            stats[s + '_sx'] = x * has_y
+            stats[s + '_sxx'] = x * x * has_y
+            stats[s + '_sy'] = y
+            stats[s + '_sxy'] = x * y
+        partials.append(stats.groupby(keys, as_index=False, observed=True).sum())
+    sums = _combine(partials, keys)
+    if sums.empty:
+        return sums
+
+    out = sums[keys].copy()
+    out['laps'] = sums['n'].astype('int64')
+    for s in SECTORS:
+        n, sx, sxx = sums[s + '_n'], sums[s + '_sx'], sums[s + '_sxx']
+        denom = n * sxx - sx * sx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[s + '_decay'] = np.where(denom > 0, (n * sums[s + '_sxy'] - sx * sums[s + '_sy']) / denom, np.nan)
+    return out.sort_values(keys).reset_index(drop=True)
+
+
+def compound_degradation(store_dir=STORE_DIR, engine='auto'):
+    """Mean/std lap time per (compound, tyre_life) across every stored session"""
+    keys = ['compound', 'tyre_life']
+    if engine == 'duckdb' or (engine == 'auto' and DUCKDB_AVAILABLE):
+        glob = os.path.join(store_dir, '**', '*.parquet').replace('\\', '/')
+        return duckdb.sql("""
+            SELECT compound, tyre_life, COUNT(*) AS laps,
+                   AVG(lap_time_s) AS lap_time_mean, STDDEV_SAMP(lap_time_s) AS lap_time_std
+            FROM read_parquet('{glob}', hive_partitioning = true)
+            WHERE lap_time_s IS NOT NULL AND NOT is_pit_in AND NOT is_pit_out
+            GROUP BY compound, tyre_life ORDER BY compound, tyre_life
+        """.format(glob=glob)).df()
+
+    partials = []
+    for chunk in _scan(store_dir, keys + ['lap_time_s']):
+        chunk['n'] = 1
+        chunk['sq'] = chunk['lap_time_s'] ** 2
+        partials.append(chunk.groupby(keys, as_index=False).sum())
+    sums = _combine(partials, keys)
+    if sums.empty:
+        return sums
+
+    out = sums[keys].copy()
+    out['laps'] = sums['n'].astype('int64')
+    out['lap_time_mean'] = sums['lap_time_s'] / sums['n']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (sums['sq'] - sums['n'] * out['lap_time_mean'] ** 2) / (sums['n'] - 1)
+    out['lap_time_std'] = np.sqrt(var.clip(lower=0))
+    return out.sort_values(keys).reset_index(drop=True)
+
+
+def iter_rolling_sectors(store_dir=STORE_DIR, window=5):
+    """Rolling sector means within each (driver, stint), one session fragment at a time"""
+    for fragment in _dataset(store_dir).get_fragments(filter=None):
+        df = fragment.to_table(filter=_clean_lap_filter()).to_pandas()
+        if df.empty:
+            continue
+        for key, value in ds.get_partition_keys(fragment.partition_expression).items():
+            df[key] = value
+        df = df.sort_values(['driver', 'stint', 'lap'], kind='stable')
+        grouped = df.groupby(['driver', 'stint'])[SECTORS]
+        rolled = grouped.rolling(window, min_periods=1).mean().reset_index(level=[0, 1], drop=True)
+        for s in SECTORS:
+            df[s + '_roll{}'.format(window)] = rolled[s]
+        yield df
+
+
+if __name__ == '__main__':
+    written, skipped = build_store()
+    print("[LAPSTORE] {} sessions converted, {} up to date → {}".format(written, skipped, STORE_DIR))
+
+    decay = sector_decay()
+    print("\n[LAPSTORE] Sector decay per stint (s/lap, top 10 by laps):")
+    print(decay.sort_values('laps', ascending=False).head(10).round(4).to_string(index=False))
+
+    curves = compound_degradation()
+    print("\n[LAPSTORE] Compound degradation curves:")
+    print(curves.groupby('compound')[['laps', 'lap_time_mean']].agg(
+        {'laps': 'sum', 'lap_time_mean': ['min', 'max']}).round(3))
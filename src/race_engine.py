@@ -0,0 +1,160 @@
+"""
+Lap-by-lap race classification + gap engine
+✅ (cars × laps) lap-time matrix → cumulative time, position, gap-to-leader, interval
+✅ Retired cars (no laps after some point) classified by laps completed, behind every running car
+✅ Sorted-array ops only (cumsum / argsort / take_along_axis) - no per-lap Python loops
+✅ Pit-loss injection (cheaper under SC/VSC) for undercut / overcut what-ifs
+✅ Every car pair scored at once via broadcasting
+"""
+
+import numpy as np
+import pandas as pd
+
+PIT_LOSS_S = 23.3          # mean pit_delta_seconds (monaco_raw.csv)
+NEUTRALIZED_LOSS = 0.55    # pit under SC/VSC costs ~half (field is slow)
+FRESH_TYRE_GAIN_S = 1.5    # per lap on new tyres vs the old set
+
+
+def _seconds(values):
+    s = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(s):
+        return s.to_numpy(dtype='float64')
+    return pd.to_timedelta(s).dt.total_seconds().to_numpy()
+
+
+def lap_matrix(laps, driver_col='Driver', lap_col='LapNumber', time_col='LapTime', n_laps=None):
+    """Long lap table → (drivers, T[car, lap]) with duplicates averaged
+
+    Missing laps up to a car's last recorded lap are filled with its median lap
+    time; laps after it stay NaN (retired - classify() ranks by laps completed).
+    """
+    laps = laps.dropna(subset=[driver_col, lap_col, time_col])
+    codes, drivers = pd.factorize(laps[driver_col], sort=True)
+    lap_idx = laps[lap_col].to_numpy(dtype='int64') - 1
+    seconds = _seconds(laps[time_col])
+    n_cars = len(drivers)
+    n_laps = n_laps or int(lap_idx.max()) + 1
+
+    keep = (lap_idx >= 0) & (lap_idx < n_laps)
+    flat = codes[keep] * n_laps + lap_idx[keep]
+    sums = np.bincount(flat, weights=seconds[keep], minlength=n_cars * n_laps)
+    counts = np.bincount(flat, minlength=n_cars * n_laps)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        T = (sums / counts).reshape(n_cars, n_laps)
+
+    missing = np.isnan(T)
+    if missing.any():
+        last = n_laps - 1 - np.argmax(~missing[:, ::-1], axis=1)           # last recorded lap per car
+        interior = missing & (np.arange(n_laps)[None, :] <= last[:, None])
+        medians = np.nanmedian(np.where(missing.all(axis=1, keepdims=True), 0.0, T), axis=1)
+        T = np.where(interior, medians[:, None], T)
+    return np.asarray(drivers), T
+
+
+def classify(T):
+    """Position (1 = leader), cumulative time, gap to leader and interval to car ahead, per car per lap
+
+    Ranked by laps completed first, then cumulative time, so a retired car
+    (NaN laps) drops behind every running car. Times are NaN once retired.
+    """
+    running = ~np.isnan(T)
+    completed = np.cumsum(running, axis=1)
+    cum = np.cumsum(np.where(running, T, 0.0), axis=1)
+    order = np.lexsort((cum, -completed), axis=0)                       # [rank, lap] → car
+    sorted_cum = np.take_along_axis(cum, order, axis=0)
+
+    position = np.empty_like(order)
+    ranks = np.broadcast_to(np.arange(1, T.shape[0] + 1)[:, None], order.shape)
+    np.put_along_axis(position, order, ranks, axis=0)
+
+    gap = cum - sorted_cum[0]
+    interval = np.empty_like(cum)
+    np.put_along_axis(interval, order, np.diff(sorted_cum, axis=0, prepend=sorted_cum[:1]), axis=0)
+    return {'cum_time': np.where(running, cum, np.nan), 'position': position,
+            'gap_to_leader': np.where(running, gap, np.nan), 'interval': np.where(running, interval, np.nan),
+            'laps_completed': completed}
+
+
+def to_frame(drivers, state):
+    """Race state dict → long DataFrame (driver, lap, cum_time, position, gap_to_leader, interval)"""
+    n_cars, n_laps = state['cum_time'].shape
+    frame = pd.DataFrame({
+        'driver': np.repeat(drivers, n_laps),
+        'lap': np.tile(np.arange(1, n_laps + 1), n_cars)
+    })
+    for name, values in state.items():
+        frame[name] = values.ravel()
+    return frame
+
+
+def pit_loss_vector(n_laps, pit_loss=PIT_LOSS_S, neutralized=None):
+    """Pit loss if stopping on each lap; neutralized = bool per lap (track_events SC/VSC flags)"""
+    loss = np.full(n_laps, float(pit_loss))
+    if neutralized is not None:
+        loss = np.where(np.asarray(neutralized, dtype=bool), loss * NEUTRALIZED_LOSS, loss)
+    return loss
+
+
+def inject_pits(T, cars, laps, pit_loss=PIT_LOSS_S, neutralized=None, fresh_tyre_gain=0.0):
+    """Copy of T with pit stops added: loss on the stop lap, optional per-lap gain on fresh tyres after"""
+    T = np.array(T, dtype='float64', copy=True)
+    cars = np.atleast_1d(cars)
+    laps = np.atleast_1d(laps) - 1
+    loss = pit_loss_vector(T.shape[1], pit_loss, neutralized)
+    np.add.at(T, (cars, laps), loss[laps])
+    if fresh_tyre_gain:
+        after = np.arange(T.shape[1])[None, :] > laps[:, None]          # (stops, laps)
+        np.add.at(T, cars, -fresh_tyre_gain * after)
+    return T
+
+
+def pair_gaps(T, pit_lap_a, pit_lap_b, pit_loss=PIT_LOSS_S, neutralized=None,
+              fresh_tyre_gain=FRESH_TYRE_GAIN_S):
+    """gap[a, b] in seconds once both have stopped (car a on pit_lap_a, car b on pit_lap_b)
+
+    Negative = a is ahead of b. pit_lap_a < pit_lap_b is an undercut by a,
+    pit_lap_a > pit_lap_b an overcut. Laps are 1-based.
+    """
+    cum = np.cumsum(T, axis=1)
+    loss = pit_loss_vector(T.shape[1], pit_loss, neutralized)
+    end = max(pit_lap_a, pit_lap_b)
+    t_a = cum[:, end - 1] + loss[pit_lap_a - 1] - fresh_tyre_gain * (end - pit_lap_a)
+    t_b = cum[:, end - 1] + loss[pit_lap_b - 1] - fresh_tyre_gain * (end - pit_lap_b)
+    return t_a[:, None] - t_b[None, :]
+
+
+def undercut_matrix(T, lap, cover_laps=1, **kwargs):
+    """gain[a, b] > 0 → a gets ahead of b by pitting on `lap` while b covers `cover_laps` later"""
+    before = np.cumsum(T[:, :lap - 1], axis=1)[:, -1] if lap > 1 else np.zeros(T.shape[0])
+    gap_before = before[:, None] - before[None, :]
+    gap_after = pair_gaps(T, lap, lap + cover_laps, **kwargs)
+    swap = (gap_before > 0) & (gap_after < 0)
+    np.fill_diagonal(swap, False)
+    return swap, gap_after
+
+
+def positions_lost(T, car, penalty_per_lap):
+    """Final positions lost by `car` if its lap times grow by penalty_per_lap (scalar or per lap)"""
+    base = classify(T)['position'][car, -1]
+    slowed = np.array(T, dtype='float64', copy=True)
+    slowed[car] += penalty_per_lap
+    return int(classify(slowed)['position'][car, -1] - base)
+
+
+if __name__ == '__main__':
+    import os
+    import time
+
+    laps = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'raw', 'monaco_combined.csv'))
+    drivers, T = lap_matrix(laps)
+    t = time.perf_counter()
+    state = classify(T)
+    print("[RACE] {} cars × {} laps classified in {:.2f} ms".format(*T.shape, (time.perf_counter() - t) * 1000))
+    final = to_frame(drivers, state).query('lap == {}'.format(T.shape[1])).sort_values('position')
+    print(final[['driver', 'position', 'gap_to_leader', 'interval']].round(1).to_string(index=False))
+
+    t = time.perf_counter()
+    swap, gaps = undercut_matrix(T, lap=30, cover_laps=2)
+    print("\n[RACE] Lap 30 undercuts (every pair) in {:.2f} ms:".format((time.perf_counter() - t) * 1000))
+    for a, b in zip(*np.nonzero(swap)):
+        print("  {} undercuts {} → {:+.1f}s".format(drivers[a], drivers[b], gaps[a, b]))
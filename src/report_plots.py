@@ -0,0 +1,324 @@
+"""
+Report figures + background rendering service
+✅ Every pipeline figure lives here (cleaning, fatigue curves, CARLA, physics model)
+✅ Stages only queue a plot job (pickled data) - no seaborn / dpi=300 on the critical path
+✅ Detached renderer drains the queue with a process pool on the headless Agg backend
+✅ Content-addressed: data + plot code hash in a .sha256 sidecar → unchanged figures are skipped
+
+Set PIT_RENDER=inline to render in-process instead (debugging).
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import BASE_DIR
+
+QUEUE_DIR = os.path.join(BASE_DIR, 'reports', 'render_queue')
+RENDER_MODE = os.environ.get('PIT_RENDER', '').lower()
+DEFAULT_DPI = 300
+IDLE_EXIT_S = 2.0  # renderer exits once the queue has been empty this long
+
+_renderer = None   # Popen of the renderer started by this process
+
+
+# === Figures (run inside render workers) ===
+
+def plot_cleaning(style, before, after):
+    """DAY1_CLEANING.png - pit delta before/after IQR cleaning"""
+    import matplotlib.pyplot as plt
+    plt.style.use(style)
+    fig, axes = plt.subplots(1, 2, figsize=(12, 4))
+
+    # Before/After histograms
+    before.hist(ax=axes[0], bins=20, alpha=0.7, color='red')
+    axes[0].set_title('Before IQR Cleaning (Outliers in Red)')
+    axes[0].set_xlabel('Pit Delta (seconds)')
+    axes[0].set_ylabel('Frequency')
+
+    after.hist(ax=axes[1], bins=20, alpha=0.7, color='green')
+    axes[1].set_title('After IQR Cleaning (Clean Data)')
+    axes[1].set_xlabel('Pit Delta (seconds)')
+    axes[1].axvline(after.mean(), color='blue', linestyle='--', label='Mean: {:.1f}s'.format(after.mean()))
+    axes[1].legend()
+    return fig
+
+
+def plot_fatigue_curves(style, fatigue_monaco, fatigue_lemans):
+    """fatigue_proxy_curves.png - Monaco lap fatigue + Le Mans stint fatigue"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.style.use(style)
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+
+    # Monaco lap fatigue trends
+    top_drivers = fatigue_monaco[fatigue_monaco['PitStatus'] == 'Running'].nsmallest(12, 'lap_number')
+    sns.lineplot(data=top_drivers, x='lap_number', y='fatigue_pct', hue='entity', ax=axes[0, 0])
+    axes[0, 0].set_title('🏎️ Monaco F1: Lap Fatigue Progression', fontsize=14, color='white')
+    axes[0, 0].tick_params(colors='white')
+
+    # Le Mans fatigue distribution
+    sns.histplot(data=fatigue_lemans, x='fatigue_pct', bins=25, color='red', alpha=0.7, ax=axes[0, 1])
+    axes[0, 1].set_title('🏁 Le Mans: Stint Fatigue Distribution', fontsize=14, color='white')
+    axes[0, 1].tick_params(colors='white')
+
+    # Driver fatigue comparison
+    fatigue_monaco.groupby('entity')['fatigue_pct'].mean().plot(kind='bar', ax=axes[1, 0], color='gold')
+    axes[1, 0].set_title('Monaco: Driver Fatigue Averages', fontsize=14, color='white')
+    axes[1, 0].tick_params(colors='white')
+
+    fatigue_lemans.groupby('entity')['fatigue_pct'].mean().plot(kind='bar', ax=axes[1, 1], color='orange')
+    axes[1, 1].set_title('Le Mans: Driver Fatigue Averages', fontsize=14, color='white')
+    axes[1, 1].tick_params(colors='white')
+    return fig
+
+
+def plot_carla(style, df_baseline, df_fatigued):
+    """carla_fatigue_analysis.png - baseline vs fatigued CARLA laps"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.style.use(style)
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+
+    # Lap time degradation
+    sns.lineplot(data=df_baseline, x='lap_number', y='lap_time', label='BASELINE', ax=axes[0, 0], linewidth=3)
+    sns.lineplot(data=df_fatigued, x='lap_number', y='lap_time', label='FATIGUED', ax=axes[0, 0], linewidth=3)
+    axes[0, 0].set_title('🏎️ CARLA: Monaco Lap Degradation (Lap 1-78)', fontsize=14, color='white')
+    axes[0, 0].set_xlabel('Lap Number', color='white')
+    axes[0, 0].set_ylabel('Lap Time (s)', color='white')
+    axes[0, 0].tick_params(colors='white')
+    axes[0, 0].legend()
+
+    # Fatigue factor progression
+    sns.lineplot(data=df_fatigued, x='lap_number', y='fatigue_factor', ax=axes[0, 1], color='red')
+    axes[0, 1].set_title('Fatigue Factor Progression\n(0 = Fresh → 0.25 = Exhausted)', fontsize=14, color='white')
+    axes[0, 1].tick_params(colors='white')
+
+    # Throttle input degradation
+    sns.lineplot(data=df_fatigued, x='lap_number', y='throttle_input', ax=axes[1, 0], color='orange')
+    axes[1, 0].set_title('Throttle Input Drop (Fatigue)', fontsize=14, color='white')
+    axes[1, 0].tick_params(colors='white')
+
+    # Lap time DELTA (Fatigued - Baseline)
+    df_combined = pd.concat([df_baseline, df_fatigued])
+    pivot_times = df_combined.pivot(index='lap_number', columns='condition', values='lap_time')
+    pivot_times['delta'] = pivot_times['FATIGUED'] - pivot_times['BASELINE']
+    pivot_times['delta'].plot(ax=axes[1, 1], color='purple', linewidth=3)
+    axes[1, 1].set_title('Lap Time Penalty Due to Fatigue\n(Fatigued - Baseline)', fontsize=14, color='white')
+    axes[1, 1].tick_params(colors='white')
+    return fig
+
+
+def plot_physics_model(style, train_data, importances, feature_labels, rf_rmse):
+    """physics_model_analysis.png - fit quality, importances, early laps, residuals"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.style.use(style)
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+
+    # Actual vs Predicted lap times
+    axes[0, 0].scatter(train_data['lap_time'], train_data['rf_pred'], alpha=0.6, color='gold', s=20)
+    axes[0, 0].plot([train_data['lap_time'].min(), train_data['lap_time'].max()],
+                    [train_data['lap_time'].min(), train_data['lap_time'].max()], 'r--', lw=2)
+    axes[0, 0].set_xlabel('Actual Lap Time (s)', color='white')
+    axes[0, 0].set_ylabel('Predicted Lap Time (s)', color='white')
+    axes[0, 0].set_title(f'🏎️ Physics Model: RF RMSE={rf_rmse:.2f}s', fontsize=14, color='white')
+    axes[0, 0].tick_params(colors='white')
+
+    # Feature importance
+    sns.barplot(x=np.asarray(importances), y=list(feature_labels), ax=axes[0, 1], palette='Reds_r')
+    axes[0, 1].set_title('Feature Importance (RandomForest)', fontsize=14, color='white')
+    axes[0, 1].tick_params(colors='white')
+
+    # Lap progression (Lap 1-20)
+    sample_laps = train_data.nsmallest(20, 'lap_number')
+    for model_name, pred_col in [('Formula', 'physics_pred'), ('Linear', 'linear_pred'), ('RF', 'rf_pred')]:
+        axes[1, 0].scatter(sample_laps['lap_number'], sample_laps[pred_col], label=model_name, alpha=0.8, s=60)
+    axes[1, 0].scatter(sample_laps['lap_number'], sample_laps['lap_time'],
+                       color='white', label='Actual', s=80, marker='*')
+    axes[1, 0].set_title('Lap 1-20: Model Predictions vs Reality', fontsize=14, color='white')
+    axes[1, 0].set_xlabel('Lap Number', color='white')
+    axes[1, 0].set_ylabel('Lap Time (s)', color='white')
+    axes[1, 0].legend()
+    axes[1, 0].tick_params(colors='white')
+
+    # Residuals analysis
+    residuals = train_data['lap_time'] - train_data['rf_pred']
+    sns.histplot(residuals, bins=30, kde=True, color='purple', ax=axes[1, 1])
+    axes[1, 1].axvline(residuals.mean(), color='red', linestyle='--', label=f'Mean: {residuals.mean():.2f}s')
+    axes[1, 1].set_title('Prediction Residuals (RF Model)', fontsize=14, color='white')
+    axes[1, 1].tick_params(colors='white')
+    axes[1, 1].legend()
+    return fig
+
+
+PLOTS = {
+    'cleaning': plot_cleaning,
+    'fatigue_curves': plot_fatigue_curves,
+    'carla': plot_carla,
+    'physics_model': plot_physics_model
+}
+
+
+# === Content addressing ===
+
+def _hash_value(h, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(str((value.dtype, value.shape)).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    else:
+        h.update(pickle.dumps(value, protocol=4))
+
+
+def job_digest(plot, dpi, data):
+    """sha256 of plot code + dpi + every input - the figure's content address"""
+    h = hashlib.sha256()
+    h.update(inspect.getsource(PLOTS[plot]).encode())
+    h.update(str(dpi).encode())
+    for key in sorted(data):
+        h.update(key.encode())
+        _hash_value(h, data[key])
+    return h.hexdigest()
+
+
+def _sidecar(out_path):
+    return out_path + '.sha256'
+
+
+def is_current(out_path, digest):
+    """Image exists and was rendered from exactly this data"""
+    try:
+        with open(_sidecar(out_path)) as f:
+            return f.read().strip() == digest and os.path.exists(out_path)
+    except OSError:
+        return False
+
+
+# === Rendering ===
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')  # headless: no window, safe in a worker process
+
+
+def render(plot, out_path, dpi, data, digest):
+    """Render one figure → out_path (atomic) + sidecar hash"""
+    _init_worker()
+    import matplotlib.pyplot as plt
+    fig = PLOTS[plot](**data)
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    root, ext = os.path.splitext(out_path)
+    tmp = '{}.{}.tmp{}'.format(root, os.getpid(), ext)
+    fig.savefig(tmp, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    os.replace(tmp, out_path)
+    with open(_sidecar(out_path), 'w') as f:
+        f.write(digest)
+    return out_path
+
+
+def submit_plot(plot, out_path, dpi=DEFAULT_DPI, style='dark_background', **data):
+    """Queue a figure from any stage → 'skipped' (unchanged), 'queued' or 'rendered' (PIT_RENDER=inline)"""
+    data['style'] = style
+    out_path = os.path.abspath(out_path)
+    digest = job_digest(plot, dpi, data)
+    if is_current(out_path, digest):
+        print("[RENDER] {} unchanged → skipped".format(os.path.basename(out_path)))
+        return 'skipped'
+    if RENDER_MODE == 'inline':
+        render(plot, out_path, dpi, data, digest)
+        return 'rendered'
+
+    os.makedirs(QUEUE_DIR, exist_ok=True)
+    job_path = os.path.join(QUEUE_DIR, digest + '.job')
+    with open(job_path + '.tmp', 'wb') as f:
+        pickle.dump({'plot': plot, 'out_path': out_path, 'dpi': dpi, 'data': data, 'digest': digest},
+                    f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(job_path + '.tmp', job_path)
+    ensure_renderer()
+    print("[RENDER] {} queued".format(os.path.basename(out_path)))
+    return 'queued'
+
+
+def ensure_renderer():
+    """Start one detached renderer per submitting process (it exits once the queue is drained)"""
+    global _renderer
+    if _renderer is not None and _renderer.poll() is None:
+        return
+    log = open(os.path.join(QUEUE_DIR, 'renderer.log'), 'a')
+    kwargs = {'start_new_session': True} if os.name == 'posix' else \
+        {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    _renderer = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'drain'],
+                                 stdout=log, stderr=subprocess.STDOUT, **kwargs)
+    log.close()  # the renderer keeps its own handle
+
+
+def _claim_jobs():
+    """Atomically rename *.job → *.working so concurrent renderers never take the same job"""
+    claimed = []
+    for name in sorted(os.listdir(QUEUE_DIR)):
+        if not name.endswith('.job'):
+            continue
+        src = os.path.join(QUEUE_DIR, name)
+        dst = src[:-len('.job')] + '.{}.working'.format(os.getpid())
+        try:
+            os.rename(src, dst)
+        except OSError:
+            continue  # another renderer got it
+        claimed.append(dst)
+    return claimed
+
+
+def _run_job(path):
+    with open(path, 'rb') as f:
+        job = pickle.load(f)
+    try:
+        if not is_current(job['out_path'], job['digest']):
+            render(job['plot'], job['out_path'], job['dpi'], job['data'], job['digest'])
+    finally:
+        os.remove(path)
+    return job['out_path']
+
+
+def drain(max_workers=None, idle_exit_s=IDLE_EXIT_S):
+    """Render queued jobs in a process pool until the queue stays empty for idle_exit_s"""
+    os.makedirs(QUEUE_DIR, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        idle_since = time.monotonic()
+        while time.monotonic() - idle_since < idle_exit_s:
+            jobs = _claim_jobs()
+            if not jobs:
+                time.sleep(0.2)
+                continue
+            for future in [pool.submit(_run_job, job) for job in jobs]:
+                try:
+                    print("[RENDER] {} done".format(future.result()), flush=True)
+                except Exception as e:
+                    print("[RENDER] failed: {}".format(e), flush=True)
+            idle_since = time.monotonic()
+
+
+if __name__ == '__main__':
+    # python report_plots.py drain   → render everything queued (started automatically by submit_plot)
+    if len(sys.argv) > 1 and sys.argv[1] == 'drain':
+        drain()
+    else:
+        raw = pd.read_csv(os.path.join(BASE_DIR, 'data', 'raw', 'monaco_raw.csv'))
+        out = os.path.join(BASE_DIR, 'reports', 'demo_cleaning.png')
+        for _ in range(2):
+            print(submit_plot('cleaning', out, style='default',
+                              before=raw['pit_delta_seconds'], after=raw['pit_delta_seconds'].clip(15, 35)))
+            if _renderer is not None:
+                _renderer.wait()
@@ -0,0 +1,186 @@
+"""
+Result cache for dashboard queries, FastF1 loads and predictions
+✅ Bounded in-memory LRU (OrderedDict) + optional on-disk pickle tier
+✅ Keyed by sha256 of (name, inputs) - same query/inputs → same entry across reruns + users
+✅ Watermark invalidation: pits max(in_time)/count, file mtime/size - polled at most every N s
+✅ Single-flight: concurrent misses on one key run the query ONCE, everyone else waits for it
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from config import DATA_DIR
+from instrumentation import REGISTRY
+
+RESULT_CACHE_DIR = os.path.join(DATA_DIR, 'result_cache')
+MAX_ITEMS = 256
+WATERMARK_INTERVAL_S = 5.0
+
+
+def make_key(*parts):
+    """sha256 over the pickled inputs (query text, params, feature rows...)"""
+    return hashlib.sha256(pickle.dumps(parts, protocol=4)).hexdigest()
+
+
+def file_watermark(*paths):
+    """(path, mtime_ns, size) for every file under paths - changes when any file is rewritten"""
+    marks = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                marks += [os.path.join(root, f) for f in sorted(files)]
+        elif os.path.exists(path):
+            marks.append(path)
+    return tuple((p, os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in marks)
+
+
+def table_watermark(conn, table='pits', time_col='in_time'):
+    """max(time_col) + row count: one index-friendly round trip instead of re-running the aggregate"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT MAX({}), COUNT(*) FROM {}".format(time_col, table))
+        latest, count = cur.fetchone()
+    return (str(latest), int(count))
+
+
+class ResultCache:
+    """LRU memory tier → disk tier → compute, each entry stored with the watermark it was built at"""
+
+    def __init__(self, name, max_items=MAX_ITEMS, disk_dir=RESULT_CACHE_DIR,
+                 watermark_interval_s=WATERMARK_INTERVAL_S):
+        self.name = name
+        self.max_items = max_items
+        self.disk_dir = None if disk_dir is None else os.path.join(disk_dir, name)
+        self.watermark_interval_s = watermark_interval_s
+        self._memory = OrderedDict()   # key → (watermark, value)
+        self._lock = threading.Lock()
+        self._key_locks = {}           # key → Lock (single-flight)
+        self._watermarks = {}          # watermark name → (value, checked_at)
+        self._watermark_locks = {}
+        self._requests = {result: REGISTRY.counter('result_cache_requests', cache=name, result=result)
+                          for result in ('memory', 'disk', 'miss')}
+
+    # --- watermarks ---
+    def watermark(self, name, fn):
+        """Current watermark for `name`; fn() is only called once per watermark_interval_s"""
+        with self._lock:
+            lock = self._watermark_locks.setdefault(name, threading.Lock())
+        with lock:
+            value, checked_at = self._watermarks.get(name, (None, 0.0))
+            if time.monotonic() - checked_at >= self.watermark_interval_s:
+                value = fn()
+                self._watermarks[name] = (value, time.monotonic())
+            return value
+
+    # --- tiers ---
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + '.pkl')
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = '{}.{}.tmp'.format(path, threading.get_ident())
+        with open(tmp, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key, mark):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] == mark:
+                self._memory.move_to_end(key)
+                self._requests['memory'].inc()
+                return True, entry[1]
+        entry = self._read_disk(key)
+        if entry is not None and entry[0] == mark:
+            self._remember(key, entry)
+            self._requests['disk'].inc()
+            return True, entry[1]
+        return False, None
+
+    # --- public ---
+    def get_or_compute(self, key_parts, compute, watermark=None):
+        """Cached compute() for key_parts; watermark = (name, fn) or None (never invalidated)"""
+        key = make_key(self.name, key_parts)
+        mark = None if watermark is None else self.watermark(*watermark)
+        found, value = self._lookup(key, mark)
+        if found:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            found, value = self._lookup(key, mark)  # another thread may have just filled it
+            if found:
+                return value
+            self._requests['miss'].inc()
+            value = compute()
+            entry = (mark, value)
+            self._remember(key, entry)
+            self._write_disk(key, entry)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def cached(self, watermark=None):
+        """Decorator form: key = (function name, args, kwargs)"""
+        def decorator(fn):
+            def wrapper(*args, **kwargs):
+                return self.get_or_compute((fn.__name__, args, sorted(kwargs.items())),
+                                           lambda: fn(*args, **kwargs), watermark)
+            wrapper.__name__ = fn.__name__
+            wrapper.__doc__ = fn.__doc__
+            return wrapper
+        return decorator
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._watermarks.clear()
+
+    def stats(self):
+        return {'items': len(self._memory), 'max_items': self.max_items,
+                **{result: c.value for result, c in self._requests.items()}}
+
+
+if __name__ == '__main__':
+    from concurrent.futures import ThreadPoolExecutor
+
+    import pandas as pd
+
+    raw_path = os.path.join(DATA_DIR, 'raw', 'monaco_raw.csv')
+    cache = ResultCache('demo', disk_dir=None, watermark_interval_s=0.0)
+    calls = []
+
+    def fastest_crews():
+        calls.append(1)
+        time.sleep(0.2)  # stand-in for a slow aggregate query
+        pits = pd.read_csv(raw_path)
+        return pits.groupby('driver')['pit_delta_seconds'].mean().nsmallest(5)
+
+    mark = ('monaco_raw', lambda: file_watermark(raw_path))
+    with ThreadPoolExecutor(32) as pool:
+        results = list(pool.map(lambda _: cache.get_or_compute('fastest_crews', fastest_crews, mark), range(200)))
+    print("[CACHE] 200 concurrent requests → {} query | {}".format(len(calls), cache.stats()))
+    print(results[0].round(1).to_string())
@@ -0,0 +1,320 @@
+"""
+Micro-batching HTTP/JSON scoring service (pit time + lap time)
+✅ Pure asyncio HTTP/1.1 (keep-alive) - no web framework needed
+✅ Models loaded ONCE: pit_predictor_day2.pkl + physics_model.pkl
+✅ Concurrent requests collected for a few ms → ONE vectorized predict per batch
+✅ GET /stats (throughput, batch sizes, p50/p95/p99) + GET /metrics (Prometheus)
+✅ POST /events → mmap event log; GET /state → per-driver live state (snapshot every 10k records / 30 s)
+✅ Pit inputs feed a drift monitor; POST /actuals → rolling MAE; GET /drift → PSI, quantiles, alerts
+✅ --workers N: models shared with N worker processes; requests with a "session_id" sharded across them
+
+POST /predict/pit  {"features": {"pit_lap_estimate": 40, "temperature_c": 24, ...}}
+                   {"rows": [{...}, {...}]}  or  {"rows": [[40, 24, 65, 23, 1.2, 2, 0, 0]]}
+                   {"session_id": "2024_Monaco_R", "rows": [...]}  (--workers: same session → same worker)
+POST /predict/lap  {"features": {"lap_number": 40, "fatigue_factor": 0.1, "tire_degradation": 0.2,
+                    "neutralized": 0}}
+POST /events       {"events": [{"driver": "LEC", "kind": 1, "value": 22.4, "lap": 33}]}  (kind: 1 pit, 2 lap,
+                    3 fatigue, 4 prediction)
+POST /actuals      {"ids": ["LEC-33"], "actuals": [22.4]}  (ids sent earlier with /predict/pit {"ids": [...]})
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from drift_monitor import DriftMonitor
+from event_log import EventLog, RaceState
+from instrumentation import REGISTRY, timed, uptime_seconds
+from shared_models import ScoringPool, WorkerError, load_forests, load_models
+
+DEFAULT_PORT = 8502
+BATCH_WINDOW_MS = 2.0
+MAX_BATCH_ROWS = 512
+MAX_BODY_BYTES = 1 << 20
+SNAPSHOT_EVERY = 10_000  # records between race state snapshots ...
+SNAPSHOT_INTERVAL_S = 30.0  # ... or seconds, whichever comes first
+POOL_TIMEOUT_S = 5.0  # worker pool answer deadline (→ 504)
+
+
+class MicroBatcher:
+    """Queue rows from many requests, score them together every window_ms (or max_rows)"""
+
+    def __init__(self, name, predict_fn, feature_names, window_ms=BATCH_WINDOW_MS, max_rows=MAX_BATCH_ROWS):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.feature_names = list(feature_names)
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self.queue = asyncio.Queue()
+        self.batch_rows = REGISTRY.histogram('scoring_batch_rows', model=name,
+                                             buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024))
+        self.rows_scored = REGISTRY.counter('scoring_rows', model=name)
+        self.predict_timer = timed('model_predict_seconds', model=name)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def to_matrix(self, rows):
+        """Dict rows (by feature name) or positional lists → float64 matrix in model order"""
+        if len(rows) and isinstance(rows[0], dict):
+            for i, r in enumerate(rows):
+                missing = [f for f in self.feature_names if f not in r]
+                if missing:  # never score (or feed the drift monitor) a silent 0
+                    raise ValueError("row {} is missing features {}".format(i, missing))
+            return np.array([[float(r[f]) for f in self.feature_names] for r in rows], dtype='float64')
+        X = np.asarray(rows, dtype='float64')
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError("expected rows of {} features: {}".format(len(self.feature_names), self.feature_names))
+        return X
+
+    async def submit(self, rows):
+        X = self.to_matrix(rows)
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((X, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            n_rows = len(items[0][0])
+            deadline = loop.time() + self.window
+            while n_rows < self.max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                n_rows += len(item[0])
+
+            X = np.concatenate([x for x, _ in items]) if len(items) > 1 else items[0][0]
+            try:
+                preds = await loop.run_in_executor(None, self._predict, X)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batch_rows.observe(len(X))
+            self.rows_scored.inc(len(X))
+            offset = 0
+            for x, future in items:
+                if not future.done():
+                    future.set_result(preds[offset:offset + len(x)].tolist())
+                offset += len(x)
+
+    def _predict(self, X):
+        with self.predict_timer:
+            # named columns: sklearn checks them against the fitted feature order
+            return np.asarray(self.predict_fn(pd.DataFrame(X, columns=self.feature_names)), dtype='float64')
+
+
+def load_batchers(window_ms=BATCH_WINDOW_MS, max_rows=MAX_BATCH_ROWS, models=None):
+    """pit (always) + lap (if physics_model.pkl has been trained); models = load_models() to reuse"""
+    models = load_models() if models is None else models
+    batchers = {}
+    for name, (model, features) in models.items():
+        model.n_jobs = 1  # small batches: thread fan-out costs more than it saves
+        batchers[name] = MicroBatcher(name, model.predict, features, window_ms, max_rows)
+    return batchers
+
+
+class ScoringService:
+    def __init__(self, batchers, event_log=None, monitor=None, pool=None):
+        self.batchers = batchers
+        self.started = time.time()
+        self.event_log = event_log
+        self.monitor = monitor
+        self.pool = pool
+        self._monitor_errors = REGISTRY.counter('drift_monitor_errors')
+        with timed('race_state_recover_seconds'):
+            self.race_state = RaceState.recover(event_log) if event_log is not None else None
+        self._snapshot_seq = -1 if self.race_state is None else self.race_state.through_seq
+        self._snapshot_at = time.monotonic()
+
+    def _monitor_done(self, future):
+        """Drift monitor updates run unawaited - surface their failures instead of dropping them"""
+        if not future.cancelled() and future.exception() is not None:
+            self._monitor_errors.inc()
+            print("[SCORING] drift monitor update failed: {!r}".format(future.exception()))
+
+    def live_state(self):
+        """Fold in everything appended since the last call (by us or any other process)"""
+        self.race_state.apply(self.event_log.tail(self.race_state.through_seq))
+        new = self.race_state.through_seq - self._snapshot_seq
+        if new >= SNAPSHOT_EVERY or (new > 0 and time.monotonic() - self._snapshot_at >= SNAPSHOT_INTERVAL_S):
+            with timed('race_state_snapshot_seconds'):
+                self.race_state.save()
+            self._snapshot_seq, self._snapshot_at = self.race_state.through_seq, time.monotonic()
+        return self.race_state
+
+    async def snapshot_loop(self):
+        """Snapshot on a clock too (a restart replays at most ~30 s of events, polled or not)"""
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL_S)
+            try:
+                self.live_state()
+            except Exception as e:
+                print("[SCORING] race state snapshot failed: {!r}".format(e))
+
+    def stats(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        out = {'uptime_s': round(uptime_seconds(), 1), 'models': {}}
+        for name, b in self.batchers.items():
+            rows = b.rows_scored.value
+            p50, p95, p99 = REGISTRY.histogram('scoring_request_seconds', model=name).quantiles()
+            out['models'][name] = {
+                'rows_scored': rows,
+                'batches': b.batch_rows.count,
+                'mean_batch_rows': round(b.batch_rows.sum / b.batch_rows.count, 1) if b.batch_rows.count else 0,
+                'rows_per_s': round(rows / elapsed, 1),
+                'request_p50_ms': None if p50 is None else round(p50 * 1000, 2),
+                'request_p95_ms': None if p95 is None else round(p95 * 1000, 2),
+                'request_p99_ms': None if p99 is None else round(p99 * 1000, 2)
+            }
+        return out
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'models': list(self.batchers)}
+        if method == 'GET' and path == '/stats':
+            return 200, self.stats()
+        if method == 'GET' and path == '/metrics':
+            return 200, REGISTRY.render_prometheus()
+        if path in ('/events', '/state') and self.event_log is None:
+            return 404, {'error': 'event log disabled'}
+        if method == 'POST' and path == '/events':
+            events = json.loads(body or b'{}')['events']
+            first = self.event_log.append(events)
+            if first + len(events) - 1 - self._snapshot_seq >= SNAPSHOT_EVERY:
+                self.live_state()  # writers snapshot every SNAPSHOT_EVERY records, readers or not
+            return 200, {'first_seq': first, 'count': len(events)}
+        if method == 'GET' and path == '/state':
+            state = self.live_state()
+            return 200, {'through_seq': state.through_seq,
+                         'drivers': json.loads(state.to_frame().to_json(orient='records'))}
+        if path in ('/actuals', '/drift') and self.monitor is None:
+            return 404, {'error': 'drift monitor disabled'}
+        if method == 'POST' and path == '/actuals':
+            payload = json.loads(body or b'{}')
+            for pid, actual in zip(payload['ids'], payload['actuals']):
+                self.monitor.actual(pid, actual)
+            return 200, {'count': len(payload['ids']), **self.monitor.summary()}
+        if method == 'GET' and path == '/drift':
+            return 200, {**self.monitor.summary(), 'alerts': list(self.monitor.alerts),
+                         'features': json.loads(self.monitor.snapshot().to_json(orient='records'))}
+        if method == 'POST' and path.startswith('/predict/'):
+            name = path[len('/predict/'):]
+            if name not in self.batchers:
+                return 404, {'error': 'unknown model {!r}'.format(name)}
+            payload = json.loads(body or b'{}')
+            rows = payload['rows'] if 'rows' in payload else [payload.get('features', {})]
+            with timed('scoring_request_seconds', model=name):
+                X = self.batchers[name].to_matrix(rows)
+                if self.pool is not None and name in self.pool.models and 'session_id' in payload:
+                    # worker processes batch per session themselves
+                    preds = await asyncio.wait_for(
+                        asyncio.wrap_future(self.pool.submit(payload['session_id'], name, X)), POOL_TIMEOUT_S)
+                    preds = preds.tolist()
+                else:
+                    preds = await self.batchers[name].submit(X)
+            if name == 'pit' and self.monitor is not None:
+                # off the request path: the response does not wait for the sketches
+                update = asyncio.get_running_loop().run_in_executor(
+                    None, self.monitor.observe_batch, X, payload.get('ids'), preds)
+                update.add_done_callback(self._monitor_done)
+            return 200, {'model': name, 'predictions': preds}
+        return 404, {'error': 'not found'}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                method, path, version = lines[0].split(' ', 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        k, v = line.split(':', 1)
+                        headers[k.strip().lower()] = v.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    status, result = 413, {'error': 'body too large'}
+                    body = b''
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, result = await self.route(method, path.split('?', 1)[0], body)
+                    except (ValueError, KeyError, TypeError) as e:
+                        status, result = 400, {'error': str(e)}
+                    except asyncio.TimeoutError:
+                        status, result = 504, {'error': 'scoring worker timed out'}
+                    except WorkerError as e:
+                        status, result = 502, {'error': str(e)}
+                    except Exception as e:  # answer instead of dropping a keep-alive connection
+                        print("[SCORING] {} {} failed: {!r}".format(method, path, e))
+                        status, result = 500, {'error': repr(e)}
+
+                if isinstance(result, str):
+                    payload, ctype = result.encode(), 'text/plain; version=0.0.4'
+                else:
+                    payload, ctype = json.dumps(result).encode(), 'application/json'
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write('HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n'.format(
+                    status, 'OK' if status == 200 else 'ERROR', ctype, len(payload),
+                    'keep-alive' if keep_alive else 'close').encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, window_ms=BATCH_WINDOW_MS, max_rows=MAX_BATCH_ROWS,
+                workers=0):
+    models = load_models()  # one copy each for the batchers, the pool and the drift monitor
+    batchers = load_batchers(window_ms, max_rows, models)
+    for b in batchers.values():
+        b.start()
+    pool = ScoringPool(workers, load_forests(models)).start() if workers else None
+    service = ScoringService(batchers, EventLog(), DriftMonitor.from_training(models['pit'][0]), pool)
+    server = await asyncio.start_server(service.handle, host, port, backlog=1024)
+    snapshots = asyncio.create_task(service.snapshot_loop())
+    print("[SCORING] http://{}:{} | models: {} | batch window {}ms, max {} rows | {}".format(
+        host, port, ', '.join(batchers), window_ms, max_rows,
+        "{} shared-memory workers ({:.0f} KB models)".format(workers, pool.shared_bytes / 1024)
+        if pool else "in-process"))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        snapshots.cancel()
+        service.live_state().save()
+        if pool is not None:
+            pool.close()
+
+
+if __name__ == '__main__':
+    # python scoring_service.py [port] [--workers N]
+    args = sys.argv[1:]
+    workers = 0
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    port = int(args[0]) if args else DEFAULT_PORT
+    try:
+        asyncio.run(serve(port=port, workers=workers))
+    except KeyboardInterrupt:
+        print("\n[SCORING] stopped")
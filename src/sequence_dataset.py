@@ -0,0 +1,106 @@
+"""
+Zero-copy sliding-window sequences for the LSTM-ready feature set
+✅ Sort by driver + time ONCE, left-pad each driver with lookback zero rows
+✅ Window for a stop ends at the driver's previous stop (crew_rolling_mean, pit_delta_norm include y)
+✅ All windows are strided views (sliding_window_view) - nothing copied per window
+✅ Padding mask marks rows that precede a driver's first stop
+✅ Memory-bounded batches: only the batch being yielded is materialized
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import DATA_DIR
+
+LSTM_READY_PATH = os.path.join(DATA_DIR, 'features', 'monaco_lstm_ready.csv')
+FINAL_ML_PATH = os.path.join(DATA_DIR, 'features', 'monaco_final_ml.csv')
+TARGET = 'pit_delta_weather_adj'
+NON_NUMERIC = ['race_phase']
+
+
+class SequenceDataset:
+    """Per-driver lookback windows predicting every row from the stops before it
+
+    windows[i] → (lookback, n_features) view of the driver's stops before row i (row i itself excluded:
+                 its rolling features already contain its own target)
+    mask[i]    → (lookback,) True where the window holds real (non-padding) rows - all False on a first stop
+    """
+
+    def __init__(self, features, group, order_key, lookback=8, target=None, feature_names=None):
+        self.lookback = lookback
+        self.feature_names = feature_names
+
+        # one stable sort by (group, time)
+        order = np.lexsort((np.asarray(order_key), np.asarray(group)))
+        sorted_group = np.asarray(group)[order]
+        self.order = order  # sorted position → original row
+
+        starts = np.flatnonzero(np.r_[True, sorted_group[1:] != sorted_group[:-1]])
+        counts = np.diff(np.r_[starts, len(sorted_group)])
+        pad = lookback
+
+        # padded row of each sorted row: every group is shifted by pad rows per earlier group (+ its own)
+        group_idx = np.repeat(np.arange(len(starts)), counts)
+        self._padded_pos = np.arange(len(sorted_group)) + (group_idx + 1) * pad
+
+        # single copy of the data: groups laid out back to back, each behind `pad` zero rows
+        values = np.asarray(features, dtype='float32')[order]
+        n_padded = len(values) + len(starts) * pad
+        self._padded = np.zeros((n_padded, values.shape[1]), dtype='float32')
+        self._padded[self._padded_pos] = values
+        valid = np.zeros(n_padded, dtype=bool)
+        valid[self._padded_pos] = True
+
+        # views: window j covers padded rows [j, j + lookback) → row at padded p uses window p - lookback
+        self._windows = sliding_window_view(self._padded, lookback, axis=0)  # (n_win, n_feat, lookback)
+        self._mask = sliding_window_view(valid, lookback)
+        self.target = None if target is None else np.asarray(target, dtype='float32')[order]
+
+    @classmethod
+    def from_feature_store(cls, lookback=8, lstm_path=LSTM_READY_PATH, meta_path=FINAL_ML_PATH):
+        """monaco_lstm_ready.csv features + driver/in_time from monaco_final_ml.csv (same row order)"""
+        lstm = pd.read_csv(lstm_path)
+        meta = pd.read_csv(meta_path, usecols=['driver', 'in_time'])
+        if len(lstm) != len(meta):
+            raise ValueError("lstm_ready ({}) and final_ml ({}) row counts differ".format(len(lstm), len(meta)))
+        feature_names = [c for c in lstm.columns if c not in NON_NUMERIC + [TARGET]]
+        order_key = pd.to_datetime(meta['in_time'], utc=True).astype('int64').to_numpy()
+        return cls(lstm[feature_names].fillna(0).to_numpy(), meta['driver'].to_numpy(), order_key,
+                   lookback=lookback, target=lstm[TARGET].to_numpy(), feature_names=feature_names)
+
+    def __len__(self):
+        return len(self._padded_pos)
+
+    def window(self, i):
+        """(lookback, n_features) view of the stops before sorted row i (no copy)"""
+        return self._windows[self._padded_pos[i] - self.lookback].T
+
+    def mask(self, i):
+        return self._mask[self._padded_pos[i] - self.lookback]
+
+    def iter_batches(self, batch_size=1024, shuffle=False, seed=42):
+        """Yield (X, mask, y) with X (batch, lookback, n_features) - only this batch is copied"""
+        index = np.arange(len(self))
+        if shuffle:
+            np.random.default_rng(seed).shuffle(index)
+        first = self._padded_pos - self.lookback
+        for start in range(0, len(index), batch_size):
+            rows = index[start:start + batch_size]
+            w = first[rows]
+            X = self._windows[w].transpose(0, 2, 1)
+            y = None if self.target is None else self.target[rows]
+            yield X, self._mask[w], y
+
+
+if __name__ == '__main__':
+    dataset = SequenceDataset.from_feature_store(lookback=4)
+    print("[SEQ] {} windows | lookback {} | {} features: {}".format(
+        len(dataset), dataset.lookback, len(dataset.feature_names), dataset.feature_names))
+    print("[SEQ] Window view shares memory with store:",
+          np.shares_memory(dataset.window(5), dataset._padded))
+    X, mask, y = next(dataset.iter_batches(batch_size=16))
+    print("[SEQ] Batch X {} | mask {} | y {} | real rows in first window: {}".format(
+        X.shape, mask.shape, y.shape, int(mask[0].sum())))
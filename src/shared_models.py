@@ -0,0 +1,347 @@
+"""
+Multi-session scoring workers sharing the RandomForests through shared memory
+✅ Supervisor loads pit_predictor_day2.pkl + physics_model.pkl ONCE (load_models, shared with the service)
+✅ Trees flattened to plain arrays (children, feature, threshold, leaf value) → one SharedMemory block per model
+✅ Workers attach zero-copy views + vectorized traversal (all rows × all trees per depth step)
+✅ Events sharded by session_id (stable crc32) → one worker per session, per-session order kept
+✅ Dead workers detected (process sentinels) → in-flight futures fail, worker respawned on the same shard
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future, InvalidStateError
+from multiprocessing import connection, shared_memory
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR, MODELS_DIR
+from instrumentation import REGISTRY, timed
+
+PIT_MODEL_PATH = os.path.join(MODELS_DIR, 'pit_predictor_day2.pkl')
+PIT_FEATURES_PATH = os.path.join(MODELS_DIR, 'important_features.pkl')
+PHYSICS_MODEL_PATH = os.path.join(DATA_DIR, 'physics', 'physics_model.pkl')
+ARRAYS = ('left', 'right', 'feature', 'threshold', 'value', 'roots')
+ALIGN = 64
+MAX_BATCH_ROWS = 4096
+HEALTH_CHECK_S = 0.5  # collector wake-up interval (shutdown check)
+
+
+class WorkerError(RuntimeError):
+    """A worker failed to score a batch (predict raised, or the process died)"""
+
+
+def flatten_forest(rf):
+    """Fitted RandomForestRegressor → dict of concatenated node arrays (global node ids)
+
+    Leaves point to themselves, so every row can take exactly max_depth steps without branching.
+    """
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    for est in rf.estimators_:
+        t = est.tree_
+        nodes = np.arange(t.node_count)
+        leaf = t.children_left == -1
+        left.append(np.where(leaf, nodes, t.children_left) + offset)
+        right.append(np.where(leaf, nodes, t.children_right) + offset)
+        feature.append(np.where(leaf, 0, t.feature))
+        threshold.append(np.where(leaf, np.inf, t.threshold))
+        value.append(t.value[:, 0, 0])
+        roots.append(offset)
+        offset += t.node_count
+    return {
+        'left': np.concatenate(left).astype('int32'),
+        'right': np.concatenate(right).astype('int32'),
+        'feature': np.concatenate(feature).astype('int32'),
+        'threshold': np.concatenate(threshold).astype('float64'),
+        'value': np.concatenate(value).astype('float64'),
+        'roots': np.asarray(roots, dtype='int32'),
+        'max_depth': max(est.tree_.max_depth for est in rf.estimators_)
+    }
+
+
+class FlatForest:
+    """Forest predictor over flat node arrays (owned, or views onto a SharedMemory block)"""
+
+    def __init__(self, arrays, max_depth, feature_names, shm=None):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.max_depth = max_depth
+        self.feature_names = list(feature_names)
+        self._shm = shm
+        self._attached = shm is not None  # arrays are views onto the block (worker side)
+
+    @classmethod
+    def from_model(cls, rf, feature_names):
+        flat = flatten_forest(rf)
+        return cls(flat, flat['max_depth'], feature_names)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAYS)
+
+    def predict(self, X):
+        """Same result as rf.predict: float32 features (as sklearn), mean of the per-tree leaf values"""
+        X = np.asarray(X, dtype='float32').astype('float64')
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
+
+    # --- shared memory ---
+    def publish(self, name):
+        """Copy the arrays into one SharedMemory block → small picklable layout for workers"""
+        fields, size = {}, 0
+        for key in ARRAYS:
+            arr = getattr(self, key)
+            fields[key] = (size, arr.dtype.str, arr.shape)
+            size += (arr.nbytes + ALIGN - 1) // ALIGN * ALIGN
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for key, (start, dtype, shape) in fields.items():
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = getattr(self, key)
+        self._shm = shm
+        return {'model': name, 'shm_name': shm.name, 'fields': fields, 'max_depth': self.max_depth,
+                'feature_names': self.feature_names}
+
+    @classmethod
+    def attach(cls, layout):
+        """Zero-copy views onto a published block (read-only)"""
+        shm = shared_memory.SharedMemory(name=layout['shm_name'])
+        arrays = {}
+        for key, (start, dtype, shape) in layout['fields'].items():
+            arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+            arr.flags.writeable = False
+            arrays[key] = arr
+        return cls(arrays, layout['max_depth'], layout['feature_names'], shm)
+
+    def close(self, unlink=False):
+        if self._shm is None:
+            return
+        if self._attached:
+            for name in ARRAYS:
+                setattr(self, name, None)  # drop the views before closing the mapping
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+
+
+def load_models():
+    """{'pit': (RandomForest, feature names), 'lap': ...} - read from disk once per process"""
+    models = {}
+    with timed('model_load_seconds', model='pit'):
+        models['pit'] = (joblib.load(PIT_MODEL_PATH), joblib.load(PIT_FEATURES_PATH))
+    if os.path.exists(PHYSICS_MODEL_PATH):
+        with timed('model_load_seconds', model='physics'):
+            physics = joblib.load(PHYSICS_MODEL_PATH)
+        models['lap'] = (physics['rf_model'], physics['feature_names'])
+    return models
+
+
+def load_forests(models=None):
+    """pit (always) + lap (if physics_model.pkl has been trained), flattened once"""
+    models = load_models() if models is None else models
+    return {name: FlatForest.from_model(rf, features) for name, (rf, features) in models.items()}
+
+
+def shard(session_id, n_workers):
+    """Stable across processes and restarts (unlike the salted built-in hash)"""
+    return zlib.crc32(str(session_id).encode()) % n_workers
+
+
+def _worker(layouts, inbox, results_conn):
+    forests = {layout['model']: FlatForest.attach(layout) for layout in layouts}
+    try:
+        while True:
+            items = [inbox.get()]
+            if items[0] is None:
+                break
+            # drain whatever else is queued → one predict per model for the whole batch
+            n_rows, stop = len(items[0][2]), False
+            while n_rows < MAX_BATCH_ROWS:
+                try:
+                    item = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                items.append(item)
+                n_rows += len(item[2])
+            results = []
+            for model in {m for _, m, _ in items}:
+                group = [(ticket, X) for ticket, m, X in items if m == model]
+                try:
+                    preds = forests[model].predict(np.concatenate([X for _, X in group]))
+                except Exception as e:
+                    results += [(ticket, None, repr(e)) for ticket, _ in group]
+                    continue
+                offset = 0
+                for ticket, X in group:
+                    results.append((ticket, preds[offset:offset + len(X)], None))
+                    offset += len(X)
+            results_conn.send(results)
+            if stop:
+                break
+    finally:
+        for forest in forests.values():
+            forest.close()
+
+
+class ScoringPool:
+    """Supervisor: shared model blocks + one inbox / result pipe per worker + a collector thread
+
+    Each worker owns its result pipe, so a worker killed mid-send (OOM) cannot leave a
+    lock or a half-written message behind for the others. The collector waits on the
+    pipes and the process sentinels: a dead worker's in-flight futures fail and the
+    worker is respawned on the same shard, attached to the same shared model blocks.
+    """
+
+    def __init__(self, n_workers=None, forests=None):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.forests = forests if forests is not None else load_forests()
+        self.layouts = [f.publish(name) for name, f in self.forests.items()]
+        self._ctx = mp.get_context()
+        self.workers = [None] * self.n_workers
+        self.inboxes = [None] * self.n_workers
+        self._results = [None] * self.n_workers
+        self._futures = {}  # ticket → (future, worker)
+        self._closing = False
+        self._tickets = itertools.count()
+        self._lock = threading.Lock()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._sharded = [REGISTRY.counter('pool_rows', worker=str(i)) for i in range(self.n_workers)]
+        self._restarts = REGISTRY.counter('pool_worker_restarts')
+
+    @property
+    def models(self):
+        return list(self.forests)
+
+    @property
+    def shared_bytes(self):
+        return sum(f.nbytes for f in self.forests.values())
+
+    def _spawn(self, i):
+        reader, writer = self._ctx.Pipe(duplex=False)
+        inbox = self._ctx.Queue()
+        worker = self._ctx.Process(target=_worker, args=(self.layouts, inbox, writer), daemon=True)
+        worker.start()
+        writer.close()  # the worker holds the only write end → EOF once it dies
+        self.workers[i], self.inboxes[i], self._results[i] = worker, inbox, reader
+
+    def start(self):
+        for i in range(self.n_workers):
+            self._spawn(i)
+        self._collector.start()
+        return self
+
+    def submit(self, session_id, model, X):
+        """Rows for one session → Future of predictions (same session → same worker, in order)"""
+        X = np.asarray(X, dtype='float64').reshape(-1, len(self.forests[model].feature_names))
+        future = Future()
+        worker = shard(session_id, self.n_workers)
+        with self._lock:  # registered and queued atomically w.r.t. a respawn of this worker
+            ticket = next(self._tickets)
+            self._futures[ticket] = (future, worker)
+            self.inboxes[worker].put((ticket, model, X))
+        self._sharded[worker].inc(len(X))
+        return future
+
+    def _collect(self):
+        while not self._closing:
+            conns = {conn: i for i, conn in enumerate(self._results)}
+            sentinels = {w.sentinel: i for i, w in enumerate(self.workers)}
+            for ready in connection.wait(list(conns) + list(sentinels), timeout=HEALTH_CHECK_S):
+                if ready in conns:
+                    try:
+                        self._resolve(ready.recv())
+                    except (EOFError, OSError):
+                        pass  # worker gone - its sentinel fires too
+                elif not self._closing:
+                    self._respawn(sentinels[ready])
+
+    def _resolve(self, results):
+        for ticket, preds, error in results:
+            with self._lock:
+                future, _ = self._futures.pop(ticket, (None, None))
+            if future is None:
+                continue
+            try:
+                if error is None:
+                    future.set_result(preds)
+                else:
+                    future.set_exception(WorkerError(error))
+            except InvalidStateError:
+                pass  # caller gave up (timed out) and cancelled it
+
+    def _respawn(self, i):
+        """Worker i exited (crash, OOM kill): fail only its in-flight futures, start a fresh one"""
+        dead, conn = self.workers[i], self._results[i]
+        try:
+            while conn.poll():  # results it sent just before dying still count
+                self._resolve(conn.recv())
+        except (EOFError, OSError):
+            pass
+        conn.close()
+        with self._lock:
+            lost = [(t, f) for t, (f, w) in self._futures.items() if w == i]
+            for ticket, _ in lost:
+                del self._futures[ticket]
+            self._spawn(i)
+        for _, future in lost:
+            try:
+                future.set_exception(WorkerError("worker {} exited (code {})".format(i, dead.exitcode)))
+            except InvalidStateError:
+                pass
+        self._restarts.inc()
+        print("[POOL] worker {} died (code {}) - respawned, {} request(s) failed".format(
+            i, dead.exitcode, len(lost)))
+
+    def close(self):
+        self._closing = True  # workers exiting now are not respawned
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for w in self.workers:
+            w.join()
+        self._collector.join()
+        for conn in self._results:
+            conn.close()
+        for forest in self.forests.values():
+            forest.close(unlink=True)
+
+
+if __name__ == '__main__':
+    pit_model = joblib.load(PIT_MODEL_PATH)
+    forests = load_forests()
+    rng = np.random.default_rng(7)
+    X = np.column_stack([rng.integers(1, 79, 20_000), rng.uniform(18, 30, 20_000), rng.uniform(40, 90, 20_000),
+                         rng.uniform(20, 27, 20_000), rng.uniform(0, 4, 20_000), rng.integers(1, 10, 20_000),
+                         rng.integers(0, 2, 20_000), rng.integers(0, 2, 20_000)]).astype('float64')
+    exact = pit_model.predict(pd.DataFrame(X, columns=forests['pit'].feature_names))
+    print("[POOL] flat forest matches sklearn: {} | pit model {:.0f} KB shared once (pickle {:.0f} KB)".format(
+        np.allclose(forests['pit'].predict(X), exact), forests['pit'].nbytes / 1024,
+        len(pickle.dumps(pit_model)) / 1024))
+
+    # 8 concurrent sessions streaming 64-row event batches
+    sessions = ['2024_Monaco_R', '2024_Monaco_F2', '2024_LeMans', '2024_Monaco_F3',
+                '2024_Spa_R', '2024_Spa_F2', '2024_Daytona', '2024_Monza_R']
+    batches = [(sessions[i % len(sessions)], X[i * 64 % len(X):][:64]) for i in range(2000)]
+    for n_workers in sorted({1, 2, os.cpu_count() or 1}):
+        pool = ScoringPool(n_workers, forests).start()
+        t = time.perf_counter()
+        futures = [pool.submit(session, 'pit', rows) for session, rows in batches]
+        preds = np.concatenate([f.result() for f in futures])
+        elapsed = time.perf_counter() - t
+        pool.close()
+        print("[POOL] {} workers: {:,.0f} rows/s | sessions per worker: {}".format(
+            n_workers, len(preds) / elapsed,
+            np.bincount([shard(s, n_workers) for s in sessions], minlength=n_workers).tolist()))
@@ -0,0 +1,162 @@
+"""
+Similar-situation pit lookup - "the 20 most similar past stops"
+✅ Feature store pits + compound (lap file) + fatigue proxy (fatigue file), each from the same race
+✅ Standardized features + one-hot compound (explicit weight) → sklearn KDTree, sub-millisecond k-NN
+✅ Incremental appends after each race: brute-force buffer, tree rebuilt past a threshold
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from config import DATA_DIR
+from fatigue import FATIGUE_PATH, load_fatigue_lookup
+from validation import FEATURES as FEATURE_SCHEMA, validate_frame
+
+FINAL_ML_PATH = os.path.join(DATA_DIR, 'features', 'monaco_final_ml.csv')
+LAPS_PATH = os.path.join(DATA_DIR, 'raw', 'monaco_combined.csv')
+
+FEATURES = ['pit_lap_estimate', 'temperature_c', 'crew_rolling_mean', 'fatigue_factor']
+META = ['driver', 'team', 'in_time', 'pit_lap_estimate', 'temperature_c', 'crew_rolling_mean',
+        'compound', 'fatigue_factor', 'pit_delta_seconds']
+COMPOUNDS = ['SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET']
+UNKNOWN_COMPOUND = 'UNKNOWN'
+# one-hot scale in std units: another compound is √2 × 3 ≈ 4.2 away, an unknown one 3 away
+COMPOUND_WEIGHT = 3.0
+REBUILD_THRESHOLD = 256
+LEAF_SIZE = 16
+
+
+def load_compounds(path=LAPS_PATH):
+    """Most common compound per (driver, lap) from the raw lap file"""
+    laps = pd.read_csv(path, usecols=['Driver', 'LapNumber', 'Compound'])
+    return laps.groupby(['Driver', 'LapNumber'])['Compound'].agg(lambda c: c.mode().iat[0])
+
+
+def add_situation(pits, compounds=None, fatigue=None):
+    """Pits + compound on the pit lap + fatigue factor (same 0-0.25 proxy as the physics model)"""
+    compounds = load_compounds() if compounds is None else compounds
+    fatigue = load_fatigue_lookup() if fatigue is None else fatigue
+    key = pd.MultiIndex.from_arrays([pits['driver'].to_numpy(),
+                                     pits['pit_lap_estimate'].astype('int64').to_numpy()])
+    return pits.assign(compound=compounds.reindex(key).fillna(UNKNOWN_COMPOUND).to_numpy(),
+                       fatigue_factor=fatigue.reindex(key).fillna(0.0).to_numpy())
+
+
+def one_hot(compounds, weight=COMPOUND_WEIGHT):
+    """Compound names → one-hot rows × weight (unknown compound → all zeros, not a guess)"""
+    index = {c: i for i, c in enumerate(COMPOUNDS)}
+    codes = np.array([index.get(c, -1) for c in compounds], dtype='int64')
+    out = np.zeros((len(codes), len(COMPOUNDS)))
+    known = codes >= 0
+    out[np.flatnonzero(known), codes[known]] = weight
+    return out
+
+
+def load_history(path=FINAL_ML_PATH, laps_path=LAPS_PATH, fatigue_path=FATIGUE_PATH):
+    """Validated feature-store pits + compound / fatigue from the same race's lap and fatigue files"""
+    quarantine = os.path.splitext(os.path.basename(path))[0]
+    pits, _ = validate_frame(pd.read_csv(path), FEATURE_SCHEMA, quarantine=quarantine)
+    return add_situation(pits, load_compounds(laps_path), load_fatigue_lookup(fatigue_path))
+
+
+class SimilarPits:
+    """KDTree over standardized situations + a small brute-force buffer for fresh appends"""
+
+    def __init__(self, history, features=FEATURES, rebuild_threshold=REBUILD_THRESHOLD,
+                 compound_weight=COMPOUND_WEIGHT):
+        self.features = list(features)
+        self.rebuild_threshold = rebuild_threshold
+        self.compound_weight = compound_weight
+        X = history[self.features].to_numpy(dtype='float64')
+        # scale fixed at build time so distances stay comparable as races are appended
+        self.mean = X.mean(axis=0)
+        self.scale = np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+        self.medians = dict(zip(self.features, np.median(X, axis=0)))
+        self._meta = history[[c for c in META if c in history.columns]].reset_index(drop=True)
+        self._Z = self.embed(history)
+        self._tree = KDTree(self._Z, leaf_size=LEAF_SIZE)
+        self._buffer_Z = np.empty((0, self._Z.shape[1]))
+        self._buffer_meta = self._meta.iloc[:0]
+
+    @classmethod
+    def from_feature_store(cls, path=FINAL_ML_PATH):
+        return cls(load_history(path))
+
+    def __len__(self):
+        return len(self._Z) + len(self._buffer_Z)
+
+    def standardize(self, X):
+        return (np.asarray(X, dtype='float64') - self.mean) / self.scale
+
+    def embed(self, pits):
+        """Pits (DataFrame with features + compound) → standardized features | weighted one-hot compound"""
+        return np.hstack([self.standardize(pits[self.features].to_numpy()),
+                          one_hot(pits['compound'], self.compound_weight)])
+
+    def append(self, pits):
+        """Add a race's stops (already with situation features); rebuild the tree once the buffer is big"""
+        self._buffer_Z = np.vstack([self._buffer_Z, self.embed(pits)])
+        meta = pits[self._meta.columns].reset_index(drop=True)
+        self._buffer_meta = pd.concat([self._buffer_meta, meta], ignore_index=True) if len(self._buffer_meta) else meta
+        if len(self._buffer_Z) >= self.rebuild_threshold:
+            self.rebuild()
+
+    def append_race(self, path, laps_path, fatigue_path):
+        """After a race weekend: the new race's feature-store, lap and fatigue CSVs → validated + appended"""
+        self.append(load_history(path, laps_path, fatigue_path))
+
+    def rebuild(self):
+        self._Z = np.vstack([self._Z, self._buffer_Z])
+        self._meta = pd.concat([self._meta, self._buffer_meta], ignore_index=True)
+        self._tree = KDTree(self._Z, leaf_size=LEAF_SIZE)
+        self._buffer_Z = self._buffer_Z[:0]
+        self._buffer_meta = self._buffer_meta.iloc[:0]
+
+    def query_indices(self, situation, k=20):
+        """(distances, indices) into tree rows then buffer rows, nearest first"""
+        z = np.hstack([self.standardize([[situation[f] for f in self.features]]),
+                       one_hot([situation['compound']], self.compound_weight)])
+        dist, idx = self._tree.query(z, k=min(k, len(self._Z)))
+        dist, idx = dist[0], idx[0]
+        if len(self._buffer_Z):
+            buf_dist = np.sqrt(((self._buffer_Z - z) ** 2).sum(axis=1))
+            dist = np.concatenate([dist, buf_dist])
+            idx = np.concatenate([idx, np.arange(len(self._Z), len(self._Z) + len(buf_dist))])
+            top = np.argsort(dist, kind='stable')[:k]
+            dist, idx = dist[top], idx[top]
+        return dist, idx
+
+    def query(self, situation, k=20):
+        """{feature: value} → DataFrame of the k most similar stops (+ distance in std units)"""
+        dist, idx = self.query_indices(situation, k)
+        meta = pd.concat([self._meta, self._buffer_meta], ignore_index=True) if len(self._buffer_Z) else self._meta
+        out = meta.iloc[idx].reset_index(drop=True)
+        out.insert(0, 'distance', dist)
+        return out
+
+    def situation(self, lap, temperature_c, crew_rolling_mean, compound='MEDIUM', fatigue_factor=None):
+        """Dashboard inputs → query dict (fatigue defaults to the typical historical level)"""
+        return {'pit_lap_estimate': lap, 'temperature_c': temperature_c, 'crew_rolling_mean': crew_rolling_mean,
+                'compound': compound,
+                'fatigue_factor': self.medians['fatigue_factor'] if fatigue_factor is None else fatigue_factor}
+
+
+if __name__ == '__main__':
+    import time
+
+    index = SimilarPits.from_feature_store()
+    now = index.situation(lap=40, temperature_c=24.0, crew_rolling_mean=23.0, compound='MEDIUM')
+    similar = index.query(now, k=20)
+    print("[KNN] {} stops indexed | 20 most similar: median {:.1f}s (p10 {:.1f}s, p90 {:.1f}s)".format(
+        len(index), similar['pit_delta_seconds'].median(),
+        similar['pit_delta_seconds'].quantile(0.1), similar['pit_delta_seconds'].quantile(0.9)))
+    print(similar.head(5).round(2).to_string(index=False))
+
+    n = 10_000
+    t = time.perf_counter()
+    for _ in range(n):
+        index.query_indices(now, k=20)
+    print("[KNN] {:.0f} µs per query".format((time.perf_counter() - t) / n * 1e6))
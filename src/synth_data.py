@@ -0,0 +1,233 @@
+"""
+Vectorized synthetic data generators (load testing)
+✅ Pit stops / laps / weather / Le Mans stints at any scale
+✅ Same distributions as generate_monaco_data.py, complete_stage1.py and Day 2 weather
+✅ Fixed seed, chunked output → CSV, Parquet or PostgreSQL COPY
+"""
+
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DRIVER_TEAMS = {
+    'LEC': 'Ferrari', 'VER': 'RedBull', 'NOR': 'McLaren', 'HAM': 'Mercedes',
+    'SAI': 'Ferrari', 'PER': 'RedBull', 'PIA': 'McLaren', 'ALO': 'AstonMartin',
+    'RUS': 'Mercedes', 'TSU': 'AlphaTauri'
+}
+LAP_DRIVERS = ['LEC', 'VER', 'NOR', 'HAM', 'RUS', 'PER', 'SAI', 'ALO', 'STR', 'PIA']
+COMPOUNDS = ['SOFT', 'MEDIUM', 'HARD']
+PIT_STATUS = ['Running', 'Pit', 'In Lap']
+PIT_STATUS_P = [0.92, 0.04, 0.04]
+LEMANS_CARS = ['#8_Toyota', '#50_Ferrari', '#51_Ferrari', '#6_Porsche', '#7_Porsche']
+LEMANS_DRIVERS = ['Conway', 'Vergers', 'Ye', 'Lotterer', 'Rosenqvist', 'Hartley']
+
+RACE_START = np.datetime64('2024-05-26T15:00:00', 'ns')
+SESSION_SPACING = np.timedelta64(7, 'D')  # one race weekend per week
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def _chunks(total, chunk_rows):
+    """Yield (start, stop) row ranges covering [0, total)"""
+    for start in range(0, total, chunk_rows):
+        yield start, min(start + chunk_rows, total)
+
+
+def _choice(rng, categories, n, p=None):
+    """Vectorized np.random.choice straight into a pandas Categorical"""
+    if p is None:
+        codes = rng.integers(0, len(categories), n)
+    else:
+        codes = np.searchsorted(np.cumsum(p), rng.random(n), side='right')
+        codes = np.minimum(codes, len(categories) - 1)
+    return codes, pd.Categorical.from_codes(codes, categories=categories)
+
+
+def iter_pits(n_sessions, stops_per_session=72, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42):
+    """Pit stops like generate_monaco_data.py: in_time 60-180 min after start, delta N(23.3, 2.5) clipped 19-30s"""
+    rng = np.random.default_rng(seed)
+    drivers = list(DRIVER_TEAMS.keys())
+    teams = sorted(set(DRIVER_TEAMS.values()))
+    team_code = np.array([teams.index(DRIVER_TEAMS[d]) for d in drivers])
+
+    for start, stop in _chunks(n_sessions * stops_per_session, chunk_rows):
+        n = stop - start
+        row = np.arange(start, stop, dtype=np.int64)
+        session_idx = row // stops_per_session
+        codes, driver = _choice(rng, drivers, n)
+
+        in_offset_ns = (rng.uniform(60, 180, n) * 60e9).astype(np.int64)
+        pit_delta = np.clip(rng.normal(23.3, 2.5, n), 19, 30)
+        in_time = RACE_START + session_idx * SESSION_SPACING + in_offset_ns.astype('timedelta64[ns]')
+        out_time = in_time + (pit_delta * 1e9).astype(np.int64).astype('timedelta64[ns]')
+
+        yield pd.DataFrame({
+            'id': row + 1,
+            'session_id': session_idx + 1,
+            'driver': driver,
+            'team': pd.Categorical.from_codes(team_code[codes], categories=teams),
+            'in_time': in_time,
+            'out_time': out_time,
+            'pit_delta_seconds': pit_delta
+        })
+
+
+def iter_laps(n_sessions, laps_per_session=5000, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42):
+    """Laps like the complete_stage1.py fallback: LapTime N(85.5, 1.8), 12s SessionTime spacing"""
+    rng = np.random.default_rng(seed)
+
+    for start, stop in _chunks(n_sessions * laps_per_session, chunk_rows):
+        n = stop - start
+        row = np.arange(start, stop, dtype=np.int64)
+        session_idx = row // laps_per_session
+        in_session = row - session_idx * laps_per_session
+
+        yield pd.DataFrame({
+            'session_id': session_idx + 1,
+            'Driver': _choice(rng, LAP_DRIVERS, n)[1],
+            'LapNumber': rng.integers(1, 79, n),
+            'LapTime': rng.normal(85.5, 1.8, n),
+            'Compound': _choice(rng, COMPOUNDS, n)[1],
+            'PitStatus': _choice(rng, PIT_STATUS, n, p=PIT_STATUS_P)[1],
+            'SessionTime': (np.datetime64('2024-05-26T00:00:00', 'ns')
+                            + session_idx * SESSION_SPACING
+                            + (in_session * 12).astype('timedelta64[s]'))
+        })
+
+
+def iter_weather(n_sessions, samples_per_session=72, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42):
+    """Per-session weather samples with the Day 2 notebook distributions (24°C, 65% humidity)"""
+    rng = np.random.default_rng(seed)
+    step_ns = int(180 * 60e9 / samples_per_session)
+
+    for start, stop in _chunks(n_sessions * samples_per_session, chunk_rows):
+        n = stop - start
+        row = np.arange(start, stop, dtype=np.int64)
+        session_idx = row // samples_per_session
+        in_session = row - session_idx * samples_per_session
+
+        yield pd.DataFrame({
+            'session_id': session_idx + 1,
+            'time': (RACE_START + session_idx * SESSION_SPACING
+                     + (in_session * step_ns).astype('timedelta64[ns]')),
+            'temperature_c': np.clip(24.0 + rng.normal(0, 1.5, n), 20, 28),
+            'humidity_pct': np.clip(60 + rng.normal(5, 8, n), 45, 85),
+            'wind_speed_kmh': np.clip(8 + rng.normal(2, 3, n), 3, 15),
+            'pressure_hpa': np.clip(1013 + rng.normal(0, 5, n), 1005, 1020)
+        })
+
+
+def iter_lemans(n_seasons, hours=24, cars=LEMANS_CARS, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42):
+    """Le Mans hourly stints like complete_stage1.py H2: stint U(1.8, 2.8)h, ~18 laps/hour, ~3:35 laps"""
+    rng = np.random.default_rng(seed)
+    per_season = hours * len(cars)
+
+    for start, stop in _chunks(n_seasons * per_season, chunk_rows):
+        n = stop - start
+        row = np.arange(start, stop, dtype=np.int64)
+        season_idx = row // per_season
+        in_season = row - season_idx * per_season
+
+        stint_length = rng.uniform(1.8, 2.8, n)
+        yield pd.DataFrame({
+            'season': 2024 + season_idx,
+            'hour': in_season // len(cars),
+            'car_number': pd.Categorical.from_codes(in_season % len(cars), categories=cars),
+            'driver': _choice(rng, LEMANS_DRIVERS, n)[1],
+            'stint_length_hours': stint_length.round(2),
+            'driver_fatigue_proxy': np.minimum((stint_length - 1.5) / 1.5, 1.0).round(3),
+            'lap_count': (stint_length * 18).astype(np.int64),
+            'lap_time_avg': rng.normal(215, 8, n)
+        })
+
+
+GENERATORS = {
+    'pits': iter_pits,
+    'laps': iter_laps,
+    'weather': iter_weather,
+    'lemans': iter_lemans
+}
+
+
+def write_csv(chunks, path):
+    """Append chunks to one CSV (header from the first chunk only)"""
+    rows = 0
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        for chunk in chunks:
+            chunk.to_csv(f, header=(rows == 0), index=False)
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, path):
+    """Stream chunks into one Parquet file (one row group per chunk)"""
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pip install pyarrow for Parquet output")
+    rows = 0
+    writer = None
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def stream_to_db(chunks, conn, table, columns=None):
+    """COPY each chunk into PostgreSQL (same TSV path as etl_core.py), one commit per chunk"""
+    rows = 0
+    cur = conn.cursor()
+    for chunk in chunks:
+        cols = columns or list(chunk.columns)
+        buf = io.StringIO()
+        chunk[cols].to_csv(buf, sep='\t', header=False, index=False, na_rep='\\N')
+        buf.seek(0)
+        cur.copy_from(buf, table, sep='\t', columns=cols)
+        conn.commit()
+        rows += len(chunk)
+    cur.close()
+    return rows
+
+
+def generate(kind, n, out_path, fmt='parquet', chunk_rows=DEFAULT_CHUNK_ROWS, seed=42):
+    """Generate n sessions (n seasons for lemans) of `kind` into out_path; returns (rows, seconds)"""
+    chunks = GENERATORS[kind](n, chunk_rows=chunk_rows, seed=seed)
+    t0 = time.perf_counter()
+    if fmt == 'parquet':
+        rows = write_parquet(chunks, out_path)
+    elif fmt == 'csv':
+        rows = write_csv(chunks, out_path)
+    else:
+        raise ValueError("fmt must be 'parquet' or 'csv', got {!r}".format(fmt))
+    return rows, time.perf_counter() - t0
+
+
+if __name__ == '__main__':
+    # python synth_data.py pits 150000 parquet  → ~10.8M pit stops
+    kind = sys.argv[1] if len(sys.argv) > 1 else 'pits'
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    fmt = sys.argv[3] if len(sys.argv) > 3 else 'parquet'
+    out_path = os.path.join(DATA_DIR, 'synthetic', '{}_{}.{}'.format(kind, n, fmt))
+
+    rows, secs = generate(kind, n, out_path, fmt=fmt)
+    print("[SYNTH] {} {} rows → {} in {:.1f}s ({:.1f}M rows/min)".format(
+        rows, kind, out_path, secs, rows / max(secs, 1e-9) * 60 / 1e6))
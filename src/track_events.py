@@ -0,0 +1,182 @@
+"""
+Track-status + race-control event index (safety-car aware features)
+✅ track_status_data → sorted SC / VSC / red flag / yellow intervals (session seconds)
+✅ race_control_messages → sector yellow intervals (YELLOW / DOUBLE YELLOW ... CLEAR)
+✅ "Was time/lap X neutralized?" for whole batches via np.searchsorted
+✅ Per-lap flag table → labelling a season of pit stops is one gather, not a row scan
+"""
+
+import numpy as np
+import pandas as pd
+
+from ff1_cache import (find_session, load_payload, has_payload, session_t0, gmt_offset, lap_start_times,
+                       to_session_seconds)
+
+# FastF1 track status code → interval kind (7 = VSC ending, still neutralized)
+STATUS_KINDS = {'2': 'yellow', '4': 'sc', '5': 'red', '6': 'vsc', '7': 'vsc'}
+KINDS = ('sc', 'vsc', 'red', 'yellow', 'sector_yellow')
+NEUTRALIZED = ('sc', 'vsc', 'red')
+SECTOR_YELLOW_FLAGS = ('YELLOW', 'DOUBLE YELLOW')
+FLAG_COLUMNS = ['under_' + kind for kind in KINDS] + ['neutralized']
+
+
+def merge_intervals(starts, ends):
+    """Sort + merge overlapping [start, end) intervals → disjoint, sorted start/end arrays"""
+    starts = np.asarray(starts, dtype='float64')
+    ends = np.asarray(ends, dtype='float64')
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], np.maximum.accumulate(ends[order])
+    # a new block begins where the start is past every earlier end
+    new_block = np.r_[True, starts[1:] > ends[:-1]]
+    block_end = np.r_[np.flatnonzero(new_block)[1:] - 1, len(starts) - 1]
+    return starts[new_block], ends[block_end]
+
+
+def status_intervals(times_s, codes):
+    """Track status changes → {kind: (starts, ends)}; each status lasts until the next change"""
+    times_s = np.asarray(times_s, dtype='float64')
+    codes = np.asarray(codes).astype(str)
+    ends = np.r_[times_s[1:], np.inf]
+    out = {}
+    for kind in set(STATUS_KINDS.values()):
+        hit = np.isin(codes, [c for c, k in STATUS_KINDS.items() if k == kind])
+        out[kind] = merge_intervals(times_s[hit], ends[hit])
+    return out
+
+
+def sector_yellow_intervals(times_s, flags, scopes, sectors):
+    """Race control sector flags → (starts, ends) of 'some sector is under yellow'"""
+    opened, starts, ends = {}, [], []
+    for t, flag, scope, sector in zip(times_s, flags, scopes, sectors):
+        if scope != 'Sector' or pd.isna(sector):
+            continue
+        if flag in SECTOR_YELLOW_FLAGS:
+            opened.setdefault(sector, t)          # YELLOW → DOUBLE YELLOW keeps the first start
+        elif flag == 'CLEAR' and sector in opened:
+            starts.append(opened.pop(sector))
+            ends.append(t)
+    starts += list(opened.values())               # never cleared → runs to the end
+    ends += [np.inf] * len(opened)
+    return merge_intervals(starts, ends)
+
+
+class TrackEventIndex:
+    """Sorted, disjoint event intervals per kind for one session"""
+
+    def __init__(self, intervals, t0=None, utc_offset=None, lap_starts=None):
+        self.intervals = {kind: intervals.get(kind, (np.empty(0), np.empty(0))) for kind in KINDS}
+        self.t0 = None if t0 is None else np.datetime64(t0, 'ns')
+        self.utc_offset = None if utc_offset is None else np.timedelta64(utc_offset, 'ns')
+        self.lap_starts = None if lap_starts is None else np.asarray(lap_starts, dtype='float64')
+        self._lap_table = None if self.lap_starts is None else self.lap_overlaps(*self._lap_windows())
+
+    @classmethod
+    def from_session(cls, session_dir):
+        """Build from a cached FastF1 session directory"""
+        status = load_payload(session_dir, 'track_status_data')
+        intervals = status_intervals([t.total_seconds() for t in status['Time']], status['Status'])
+        t0 = session_t0(session_dir)
+        if has_payload(session_dir, 'race_control_messages'):
+            rcm = load_payload(session_dir, 'race_control_messages')
+            intervals['sector_yellow'] = sector_yellow_intervals(
+                to_session_seconds(rcm['Time'], t0), rcm['Flag'], rcm['Scope'], rcm['Sector'])
+        lap_starts = lap_start_times(session_dir) if has_payload(session_dir, 'lap_count') else None
+        return cls(intervals, t0=t0, utc_offset=gmt_offset(session_dir), lap_starts=lap_starts)
+
+    @classmethod
+    def for_race(cls, season=2024, event='Monaco', session='Race'):
+        """Convenience: TrackEventIndex.for_race(2024, 'Monaco') from the local cache (None if not cached)"""
+        session_dir = find_session(season, event, session)
+        return None if session_dir is None else cls.from_session(session_dir)
+
+    def to_session_seconds(self, values):
+        return to_session_seconds(values, self.t0, self.utc_offset)
+
+    def active(self, kind, session_seconds):
+        """Bool per time: inside an interval of `kind` (one binary search per batch)"""
+        starts, ends = self.intervals[kind]
+        t = np.asarray(session_seconds, dtype='float64')
+        if len(starts) == 0:
+            return np.zeros(t.shape, dtype=bool)
+        idx = np.searchsorted(starts, t, side='right') - 1
+        return (idx >= 0) & (t < ends[np.maximum(idx, 0)])
+
+    def overlaps(self, kind, window_start, window_end):
+        """Bool per window: [window_start, window_end) touches an interval of `kind`"""
+        starts, ends = self.intervals[kind]
+        a = np.asarray(window_start, dtype='float64')
+        if len(starts) == 0:
+            return np.zeros(a.shape, dtype=bool)
+        # last interval starting before the window ends; disjoint + sorted → ends are sorted too
+        idx = np.searchsorted(starts, np.asarray(window_end, dtype='float64'), side='left') - 1
+        return (idx >= 0) & (ends[np.maximum(idx, 0)] > a)
+
+    def _stack(self, per_kind):
+        """(rows × FLAG_COLUMNS) bool matrix: one column per kind + neutralized"""
+        neutralized = np.logical_or.reduce([per_kind[k] for k in NEUTRALIZED])
+        return np.column_stack([per_kind[k] for k in KINDS] + [neutralized])
+
+    def flags_at(self, session_seconds):
+        """DataFrame of under_<kind> + neutralized (SC | VSC | red) per time"""
+        matrix = self._stack({kind: self.active(kind, session_seconds) for kind in KINDS})
+        return pd.DataFrame(matrix, columns=FLAG_COLUMNS)
+
+    def lap_overlaps(self, window_start, window_end):
+        return self._stack({kind: self.overlaps(kind, window_start, window_end) for kind in KINDS})
+
+    def _lap_windows(self):
+        """Lap N runs from its start to lap N+1's start (last lap: one median lap long)"""
+        starts = self.lap_starts
+        last = starts[-1] + np.nanmedian(np.diff(starts)) if len(starts) > 1 else np.inf
+        return starts, np.r_[starts[1:], last]
+
+    def lap_flags(self, laps):
+        """Flags for any batch of lap numbers: a gather from the per-lap table"""
+        if self._lap_table is None:
+            raise ValueError("TrackEventIndex has no lap_count data for lap lookups")
+        idx = np.clip(np.asarray(laps, dtype='int64') - 1, 0, len(self._lap_table) - 1)
+        return pd.DataFrame(self._lap_table[idx], columns=FLAG_COLUMNS)
+
+    def neutralized_laps(self):
+        """Bool per lap (index 0 = lap 1) → race_engine.pit_loss_vector(neutralized=...)"""
+        return self._lap_table[:, -1].copy()
+
+    def join(self, df, time_col='in_time', prefix=''):
+        """Add event flag columns to df by timestamp (pits by in_time, laps by SessionTime...)"""
+        flags = self.flags_at(self.to_session_seconds(df[time_col]))
+        flags.index = df.index
+        return df.assign(**{prefix + name: flags[name] for name in flags.columns})
+
+    def join_laps(self, df, lap_col='LapNumber', prefix=''):
+        """Add event flag columns for a lap-number column (pit_lap_estimate, LapNumber...)"""
+        flags = self.lap_flags(df[lap_col].fillna(1))
+        flags.index = df.index
+        return df.assign(**{prefix + name: flags[name] for name in flags.columns})
+
+    def describe_lap(self, lap):
+        """Single lap → list of active kinds (e.g. ['sc', 'yellow'])"""
+        row = self.lap_flags([lap]).iloc[0]
+        return [kind for kind in KINDS if row['under_' + kind]]
+
+
+if __name__ == '__main__':
+    import os
+    import time
+
+    events = TrackEventIndex.for_race(2024, 'Monaco')
+    for kind in KINDS:
+        starts, ends = events.intervals[kind]
+        print("[EVENTS] {:<13} {} intervals".format(kind, len(starts)))
+    laps = np.flatnonzero(events.neutralized_laps()) + 1
+    print("[EVENTS] Neutralized laps:", laps.tolist())
+
+    pits = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'raw', 'monaco_raw.csv'))
+    labelled = events.join(pits, 'in_time')
+    print("[EVENTS] Pits under neutralization: {} / {}".format(int(labelled['neutralized'].sum()), len(labelled)))
+
+    season = np.random.default_rng(42).integers(1, 79, 5_000_000)
+    t = time.perf_counter()
+    events.lap_flags(season)
+    print("[EVENTS] 5M lap labels in {:.0f} ms".format((time.perf_counter() - t) * 1000))
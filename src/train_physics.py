@@ -0,0 +1,225 @@
+"""
+Full-dataset physics model training (replaces .head(2000) + random fatigue)
+✅ Streams monaco_combined.csv in batches + CARLA baseline/fatigued laps
+✅ Real fatigue proxy joined from fatigue_proxy_curves.csv (driver × lap)
+✅ SC / VSC / red flag laps flagged from each file's own race track status (track_events.py)
+✅ Tree models on all cores (n_jobs=-1)
+✅ Linear model = exact streaming least squares (XᵀX / Xᵀy kept in the bundle)
+✅ Warm start: new race weekends folded into XᵀX / Xᵀy → same fit as retraining on all laps
+✅ Holdout RMSE for RF, linear model and formula in the bundle
+"""
+
+import os
+import sys
+from functools import lru_cache
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import root_mean_squared_error, r2_score
+
+from config import DATA_DIR
+from fatigue import FATIGUE_PATH, load_fatigue_lookup
+from instrumentation import stage, timed, dump_snapshot
+from track_events import TrackEventIndex
+from validation import LAPS, Validator, quarantine_path
+
+FEATURES = ['lap_number', 'fatigue_factor', 'tire_degradation', 'neutralized']
+TARGET = 'lap_time'
+BASE_LAP_TIME = 85.5
+FATIGUE_FACTOR = 0.02
+BATCH_ROWS = 250_000
+HOLDOUT_FRACTION = 0.1
+
+PATHS = {
+    'laps': os.path.join(DATA_DIR, 'raw', 'monaco_combined.csv'),
+    'fatigue': FATIGUE_PATH,
+    'carla_baseline': os.path.join(DATA_DIR, 'physics', 'carla_baseline_laps.csv'),
+    'carla_fatigued': os.path.join(DATA_DIR, 'physics', 'carla_fatigued_laps.csv'),
+    'model': os.path.join(DATA_DIR, 'physics', 'physics_model.pkl')
+}
+# (path, season, event) - a session_id column in the file overrides the season per row
+LAP_SOURCES = ((PATHS['laps'], 2024, 'Monaco'),)
+
+
+@lru_cache(maxsize=None)
+def load_neutralized_laps(season, event):
+    """Bool per lap (index 0 = lap 1) under SC / VSC / red flag, None if the race is not cached"""
+    events = TrackEventIndex.for_race(season, event)
+    return None if events is None or events.lap_starts is None else events.neutralized_laps()
+
+
+def neutralized_flags(lap_numbers, seasons, event, lookup=load_neutralized_laps):
+    """1.0 where the lap ran under SC / VSC / red flag in its own season's race, else 0.0"""
+    lap_numbers, seasons = np.asarray(lap_numbers, dtype='int64'), np.asarray(seasons)
+    flags = np.zeros(len(lap_numbers))
+    for season in pd.unique(seasons):
+        laps = lookup(int(season), event)
+        if laps is None:
+            continue
+        rows = seasons == season
+        flags[rows] = laps[np.clip(lap_numbers[rows] - 1, 0, len(laps) - 1)]
+    return flags
+
+
+def iter_lap_batches(path, season, event, fatigue=None, batch_rows=BATCH_ROWS,
+                     neutralized=load_neutralized_laps):
+    """Yield physics feature batches from one race's lap file with the real fatigue proxy joined"""
+    if fatigue is None:
+        fatigue = load_fatigue_lookup()
+    # repeated (Driver, LapNumber) keys are reported, not dropped: each is still a valid lap sample
+    validator = Validator(LAPS, quarantine_path(os.path.splitext(os.path.basename(path))[0]),
+                          warn_only=['duplicate'])
+    columns = set(LAPS.names) | set(LAPS.scope)  # session_id keeps stacked seasons apart
+    for chunk in pd.read_csv(path, usecols=lambda c: c in columns, chunksize=batch_rows):
+        chunk, _ = validator.validate(chunk)
+        batch = pd.DataFrame({
+            'lap_number': chunk['LapNumber'].astype('int64').to_numpy(),
+            'lap_time': chunk['LapTime'].astype('float64').to_numpy()
+        })
+        key = pd.MultiIndex.from_arrays([chunk['Driver'].to_numpy(), batch['lap_number'].to_numpy()])
+        batch['fatigue_factor'] = fatigue.reindex(key).fillna(0.0).to_numpy()
+        batch['tire_degradation'] = 0.005 * batch['lap_number']
+        seasons = chunk['session_id'].to_numpy() if 'session_id' in chunk else np.full(len(chunk), season)
+        batch['neutralized'] = neutralized_flags(batch['lap_number'], seasons, event, neutralized)
+        yield batch[FEATURES + [TARGET]]
+    print(validator.summary())
+
+
+def load_carla(paths=PATHS):
+    """CARLA simulated laps (H1) with the same physics features"""
+    carla = pd.concat([pd.read_csv(paths['carla_baseline']), pd.read_csv(paths['carla_fatigued'])],
+                      ignore_index=True)
+    carla['tire_degradation'] = 0.006 * carla['lap_number']
+    carla['neutralized'] = 0.0  # simulated laps are always green
+    return carla[FEATURES + [TARGET]]
+
+
+def iter_training_batches(lap_sources=LAP_SOURCES, batch_rows=BATCH_ROWS, include_carla=True):
+    fatigue = load_fatigue_lookup()
+    for path, season, event in lap_sources:
+        yield from iter_lap_batches(path, season, event, fatigue, batch_rows)
+    if include_carla:
+        yield load_carla()
+
+
+def physics_formula(X):
+    """lap_time = 85.5 + 0.02×lap×fatigue + tire_degradation×lap"""
+    return (BASE_LAP_TIME + FATIGUE_FACTOR * X[:, 0] * X[:, 1] + X[:, 2] * X[:, 0])
+
+
+def _collect(batches):
+    """Stack batches into one float32 matrix (trees need every row; float32 halves RAM)"""
+    X_parts, y_parts = [], []
+    for batch in batches:
+        X_parts.append(batch[FEATURES].to_numpy(dtype='float32'))
+        y_parts.append(batch[TARGET].to_numpy(dtype='float32'))
+    return np.concatenate(X_parts), np.concatenate(y_parts)
+
+
+def least_squares_stats(X, y, stats=None):
+    """Add rows to the normal-equation sums (intercept column first); stats=None starts new sums"""
+    Z = np.column_stack([np.ones(len(X)), np.asarray(X, dtype='float64')])
+    y = np.asarray(y, dtype='float64')
+    if stats is None:
+        stats = {'xtx': np.zeros((Z.shape[1], Z.shape[1])), 'xty': np.zeros(Z.shape[1]), 'n': 0}
+    return {'xtx': stats['xtx'] + Z.T @ Z, 'xty': stats['xty'] + Z.T @ y, 'n': stats['n'] + len(y)}
+
+
+def solve_linear(stats):
+    """Exact OLS from the accumulated sums (lstsq: lap_number and tire_degradation are nearly collinear)"""
+    beta = np.linalg.lstsq(stats['xtx'], stats['xty'], rcond=None)[0]
+    linear = LinearRegression()
+    linear.intercept_, linear.coef_ = beta[0], beta[1:]
+    linear.n_features_in_ = len(beta) - 1
+    return linear
+
+
+def fit_linear_stream(batches, stats=None):
+    """One pass over lap batches → (updated sums, fitted model); memory is O(features²)"""
+    for batch in batches:
+        stats = least_squares_stats(batch[FEATURES].to_numpy(dtype='float64'), batch[TARGET], stats)
+    return stats, solve_linear(stats)
+
+
+def train_full(lap_sources=LAP_SOURCES, n_estimators=100, n_jobs=-1, batch_rows=BATCH_ROWS):
+    """Full retrain on every lap (90% fit, 10% holdout for the reported RMSEs)"""
+    with stage('physics.load'):
+        X, y = _collect(iter_training_batches(lap_sources, batch_rows))
+    holdout = np.random.default_rng(42).random(len(y)) < HOLDOUT_FRACTION
+    print("[PHYSICS] Training rows: {:,} + {:,} holdout (every validated lap + CARLA)".format(
+        int((~holdout).sum()), int(holdout.sum())))
+
+    with stage('physics.fit_rf'):
+        rf_model = RandomForestRegressor(n_estimators=n_estimators, n_jobs=n_jobs,
+                                         min_samples_leaf=5, random_state=42)
+        rf_model.fit(X[~holdout], y[~holdout])
+
+    with stage('physics.fit_linear'):
+        stats = least_squares_stats(X[~holdout], y[~holdout])
+        linear_model = solve_linear(stats)
+
+    return _bundle(rf_model, linear_model, stats, X[holdout], y[holdout])
+
+
+def warm_start(new_lap_sources, bundle_path=PATHS['model'], batch_rows=BATCH_ROWS):
+    """After a race weekend: fold new (path, season, event) laps into the linear sums (RF is kept as-is)"""
+    bundle = joblib.load(bundle_path)
+    if 'linear_stats' not in bundle:
+        raise ValueError("{} has no least-squares sums (older layout) - run a full retrain first".format(
+            bundle_path))
+    with stage('physics.warm_start'):
+        fatigue = load_fatigue_lookup()
+        new_batches = (b for path, season, event in new_lap_sources
+                       for b in iter_lap_batches(path, season, event, fatigue, batch_rows))
+        stats, linear_model = fit_linear_stream(new_batches, bundle['linear_stats'])
+    bundle.update({'linear_model': linear_model, 'linear_stats': stats, 'feature_names': list(FEATURES),
+                   'n_linear_rows': stats['n']})
+    bundle.pop('linear_scaler', None)
+    return bundle
+
+
+def _bundle(rf_model, linear_model, stats, X_holdout, y_holdout):
+    with timed('model_predict_seconds', model='physics_rf'):
+        rf_pred = rf_model.predict(X_holdout)
+    return {
+        'linear_model': linear_model,
+        'linear_stats': stats,
+        'rf_model': rf_model,
+        'feature_names': list(FEATURES),
+        'formula_rmse': root_mean_squared_error(y_holdout, physics_formula(X_holdout)),
+        'linear_rmse': root_mean_squared_error(y_holdout, linear_model.predict(X_holdout)),
+        'rf_rmse': root_mean_squared_error(y_holdout, rf_pred),
+        'rf_r2': r2_score(y_holdout, rf_pred),
+        'target_std': float(np.std(y_holdout)),
+        'n_train_rows': stats['n'],
+        'n_linear_rows': stats['n'],
+        'n_holdout_rows': len(y_holdout),
+        'base_lap_time': BASE_LAP_TIME,
+        'fatigue_factor': FATIGUE_FACTOR
+    }
+
+
+def predict_linear(bundle, X):
+    """Linear prediction (older bundles may carry a StandardScaler in front of the model)"""
+    scaler = bundle.get('linear_scaler')
+    return bundle['linear_model'].predict(scaler.transform(X) if scaler is not None else X)
+
+
+if __name__ == '__main__':
+    # python train_physics.py                 → full retrain on every lap
+    # python train_physics.py warm 2025 Monaco new.csv  → fold one race's laps into the linear model
+    if len(sys.argv) > 4 and sys.argv[1] == 'warm':
+        season, event = int(sys.argv[2]), sys.argv[3]
+        bundle = warm_start([(path, season, event) for path in sys.argv[4:]])
+        print("[PHYSICS] Linear model now fit on {:,} rows".format(bundle['n_linear_rows']))
+    else:
+        bundle = train_full()
+        print("[PHYSICS] Holdout RMSE: RF={:.2f}s (R²={:.3f}) | Linear={:.2f}s | Formula={:.2f}s | "
+              "target std={:.2f}s".format(bundle['rf_rmse'], bundle['rf_r2'], bundle['linear_rmse'],
+                                         bundle['formula_rmse'], bundle['target_std']))
+    joblib.dump(bundle, PATHS['model'])
+    dump_snapshot('train_physics')
+    print("[OK] physics_model.pkl → {}".format(PATHS['model']))
@@ -0,0 +1,307 @@
+"""
+Declarative ingest validation - one vectorized pass per chunk
+✅ Schemas for raw pits, laps, Le Mans stints and the ML feature table
+✅ Types, ranges, allowed values, row rules, uniqueness (across chunks) + time ordering
+✅ Every failed check is one bit → per-row reason bitmask, decoded only for bad rows
+✅ Bad rows → quarantine CSV with a _reasons column; good rows continue typed
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR
+from instrumentation import REGISTRY, timed
+
+QUARANTINE_DIR = os.path.join(DATA_DIR, 'quarantine')
+
+
+class Column:
+    """Expected column: dtype in {'int', 'float', 'str', 'datetime'} + optional bounds / allowed values"""
+
+    def __init__(self, name, dtype, min=None, max=None, allowed=None, nullable=False):
+        self.name = name
+        self.dtype = dtype
+        self.min = min
+        self.max = max
+        self.allowed = None if allowed is None else list(allowed)
+        self.nullable = nullable
+
+
+class Schema:
+    """Columns + table-level checks (renames, unique key, ordering column, row rules)
+
+    ordered_within = columns whose groups are each checked for ordering separately;
+    scope = optional columns (e.g. session_id) that, when present, prefix both the
+    unique key and the ordering groups - so concatenated sessions do not collide.
+    """
+
+    def __init__(self, name, columns, renames=None, unique=None, ordered_by=None, rules=None,
+                 ordered_within=None, scope=None):
+        self.name = name
+        self.columns = columns
+        self.renames = renames or {}
+        self.unique = list(unique) if unique else []
+        self.ordered_by = ordered_by
+        self.ordered_within = list(ordered_within) if ordered_within else []
+        self.scope = list(scope) if scope else []
+        self.rules = rules or {}  # reason → fn(df) returning True for GOOD rows
+
+    @property
+    def names(self):
+        return [c.name for c in self.columns]
+
+
+RAW_PITS = Schema('raw_pits', [
+    Column('session_id', 'int', min=1),
+    Column('driver', 'str'),
+    Column('team', 'str'),
+    Column('in_time', 'datetime'),
+    Column('out_time', 'datetime'),
+    Column('pit_delta_seconds', 'float', min=15, max=60)
+], renames={'pit_in': 'in_time', 'pit_out': 'out_time'},
+    unique=['session_id', 'driver', 'in_time'],
+    rules={'out_before_in': lambda df: df['out_time'] > df['in_time']})
+
+LAPS = Schema('laps', [
+    Column('Driver', 'str'),
+    Column('LapNumber', 'int', min=1, max=78),
+    Column('LapTime', 'float', min=60, max=180),
+    Column('Compound', 'str', allowed=['SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET'], nullable=True),
+    Column('PitStatus', 'str', allowed=['Running', 'Pit', 'In Lap'], nullable=True),
+    Column('SessionTime', 'datetime', nullable=True)
+], unique=['Driver', 'LapNumber'], ordered_by='SessionTime', ordered_within=['Driver'], scope=['session_id'])
+
+LEMANS_STINTS = Schema('lemans_stints', [
+    Column('hour', 'int', min=0, max=24),
+    Column('car_number', 'str'),
+    Column('driver', 'str'),
+    Column('stint_length_hours', 'float', min=0, max=6),
+    Column('driver_fatigue_proxy', 'float', min=0, max=1),
+    Column('lap_count', 'int', min=0),
+    Column('lap_time_avg', 'float', min=180, max=400)
+], unique=['hour', 'car_number'], ordered_by='hour')
+
+FEATURES = Schema('features', [
+    Column('session_id', 'int', min=1),
+    Column('driver', 'str'),
+    Column('in_time', 'datetime'),
+    Column('pit_delta_seconds', 'float', min=15, max=60),
+    Column('pit_lap_estimate', 'int', min=0, max=78),
+    Column('temperature_c', 'float', min=-10, max=50),
+    Column('humidity_pct', 'float', min=0, max=100),
+    Column('crew_rolling_mean', 'float', min=15, max=60),
+    Column('crew_rolling_std', 'float', min=0),
+    Column('pit_frequency', 'int', min=0),
+    Column('pit_hour_peak', 'int', allowed=[0, 1]),
+    Column('is_fast_pit', 'int', allowed=[0, 1])
+], unique=['session_id', 'driver', 'in_time'])
+
+
+class Validator:
+    """Stateful across chunks (seen keys, last ordering value, counts) for one schema
+
+    warn_only = reasons that are counted (and reported) but do not reject the row,
+    e.g. 'duplicate' on the training path where repeated laps are still valid samples.
+    """
+
+    def __init__(self, schema, quarantine_path=None, warn_only=()):
+        self.schema = schema
+        self.quarantine_path = quarantine_path
+        self.reasons = self._reason_names()
+        unknown = set(warn_only) - set(self.reasons)
+        if unknown:
+            raise ValueError("{}: unknown reasons {}".format(schema.name, sorted(unknown)))
+        self.warn_only = set(warn_only)
+        self._reject_bits = np.uint64(sum(1 << bit for bit, r in enumerate(self.reasons) if r not in warn_only))
+        self._seen_keys = np.empty(0, dtype='uint64')
+        self._order_max = None  # running max of ordered_by (ungrouped)
+        self._group_max = pd.Series(dtype='float64')  # ... per ordering group (hashed group key)
+        self._quarantine_header = True
+        if quarantine_path and os.path.exists(quarantine_path):
+            os.remove(quarantine_path)  # each ingest run rewrites its own quarantine file
+        self.rows = 0
+        self.bad_rows = 0
+        self.reason_counts = dict.fromkeys(self.reasons, 0)
+        self._rejected = REGISTRY.counter('validation_rejected_rows', schema=schema.name)
+        self._timer = timed('validation_seconds', schema=schema.name)
+
+    def _reason_names(self):
+        names = []
+        for col in self.schema.columns:
+            names += [col.name + ':missing', col.name + ':type']
+            if col.min is not None or col.max is not None:
+                names.append(col.name + ':range')
+            if col.allowed is not None:
+                names.append(col.name + ':allowed')
+        names += list(self.schema.rules)
+        if self.schema.unique:
+            names.append('duplicate')
+        if self.schema.ordered_by:
+            names.append('out_of_order')
+        if len(names) > 64:
+            raise ValueError("{}: more than 64 checks do not fit the reason bitmask".format(self.schema.name))
+        return names
+
+    @staticmethod
+    def _coerce(values, dtype):
+        if dtype in ('int', 'float'):
+            return pd.to_numeric(values, errors='coerce')
+        if dtype == 'datetime':
+            stamps = pd.to_datetime(values, errors='coerce', format='mixed')
+            if stamps.isna().all() and values.notna().any():
+                # FastF1 CSVs write session-relative times ("0 days 01:02:03.456")
+                durations = pd.to_timedelta(values, errors='coerce')
+                if durations.notna().any():
+                    return durations
+            return stamps
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values
+        return values.astype('string')
+
+    def validate(self, chunk):
+        """One pass → (good rows typed, bad rows with _reasons); bad rows are appended to quarantine"""
+        with self._timer:
+            df = chunk.rename(columns=self.schema.renames)
+            n = len(df)
+            failed = {}
+            for col in self.schema.columns:
+                raw = df[col.name] if col.name in df.columns else pd.Series(np.nan, index=df.index)
+                missing = raw.isna().to_numpy()
+                values = self._coerce(raw, col.dtype)
+                df[col.name] = values
+                bad_type = values.isna().to_numpy() & ~missing
+                if col.dtype == 'int':
+                    bad_type |= (values.to_numpy(dtype='float64', na_value=0) % 1) != 0
+                failed[col.name + ':missing'] = missing if not col.nullable else np.zeros(n, dtype=bool)
+                failed[col.name + ':type'] = bad_type
+                if col.min is not None or col.max is not None:
+                    v = values.to_numpy(dtype='float64', na_value=np.nan)
+                    with np.errstate(invalid='ignore'):
+                        out = np.zeros(n, dtype=bool)
+                        if col.min is not None:
+                            out |= v < col.min
+                        if col.max is not None:
+                            out |= v > col.max
+                    failed[col.name + ':range'] = out
+                if col.allowed is not None:
+                    failed[col.name + ':allowed'] = ~values.isin(col.allowed).to_numpy() & values.notna().to_numpy()
+
+            for reason, rule in self.schema.rules.items():
+                failed[reason] = ~np.asarray(rule(df).fillna(False), dtype=bool)
+            scope = [c for c in self.schema.scope if c in df.columns]
+            if self.schema.unique:
+                failed['duplicate'] = self._duplicates(df, scope + self.schema.unique)
+            if self.schema.ordered_by:
+                within = scope + self.schema.ordered_within
+                failed['out_of_order'] = self._out_of_order(df[self.schema.ordered_by], df[within] if within else None)
+
+            mask = np.zeros(n, dtype='uint64')
+            for bit, reason in enumerate(self.reasons):
+                hit = failed[reason]
+                mask |= hit.astype('uint64') << np.uint64(bit)
+                self.reason_counts[reason] += int(hit.sum())
+
+            bad = (mask & self._reject_bits) != 0
+            good_df, bad_df = df[~bad], chunk[bad].copy()
+            if len(bad_df):
+                bad_df['_reasons'] = [self.decode(m) for m in mask[bad]]
+                self._quarantine(bad_df)
+            self.rows += n
+            self.bad_rows += int(bad.sum())
+            self._rejected.inc(int(bad.sum()))
+            return good_df, bad_df
+
+    def _duplicates(self, df, key_cols):
+        """Within the chunk and against every key seen in earlier chunks; rows with a null key part are skipped"""
+        dup = np.zeros(len(df), dtype=bool)
+        complete = df[key_cols].notna().all(axis=1).to_numpy()
+        keys = pd.util.hash_pandas_object(df.loc[complete, key_cols], index=False).to_numpy()
+        dup[complete] = pd.Series(keys).duplicated().to_numpy() | np.isin(keys, self._seen_keys)
+        self._seen_keys = np.union1d(self._seen_keys, keys)
+        return dup
+
+    def _out_of_order(self, values, groups=None):
+        """Earlier than some previous row of the same group (this chunk or an earlier one) → out of order"""
+        nan = values.isna().to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(values) or pd.api.types.is_timedelta64_dtype(values):
+            v = values.to_numpy(dtype='int64', na_value=0).astype('float64')
+        else:
+            v = values.to_numpy(dtype='float64', na_value=np.nan)
+        v = np.where(nan, -np.inf, v)
+        if groups is None:
+            start = -np.inf if self._order_max is None else self._order_max
+            running = np.maximum.accumulate(np.r_[start, v])
+            self._order_max = running[-1]
+            return ~nan & (v < running[:-1])
+
+        g = pd.util.hash_pandas_object(groups, index=False).to_numpy()
+        v = pd.Series(v)
+        # max of everything before each row in its group: earlier chunks, then earlier rows here
+        before = v.groupby(g).cummax().groupby(g).shift(1).fillna(-np.inf).to_numpy()
+        carried = self._group_max.reindex(g).fillna(-np.inf).to_numpy()
+        out = ~nan & (v.to_numpy() < np.maximum(before, carried))
+        chunk_max = v.groupby(g).max()
+        self._group_max = (chunk_max if self._group_max.empty else
+                           pd.concat([self._group_max, chunk_max]).groupby(level=0).max())
+        return out
+
+    def decode(self, mask):
+        mask = int(mask)
+        return '|'.join(r for bit, r in enumerate(self.reasons) if mask >> bit & 1)
+
+    def _quarantine(self, bad_df):
+        if not self.quarantine_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.quarantine_path)), exist_ok=True)
+        bad_df.to_csv(self.quarantine_path, mode='a', header=self._quarantine_header, index=False)
+        self._quarantine_header = False
+
+    def summary(self):
+        reasons = {r: c for r, c in self.reason_counts.items() if c and r not in self.warn_only}
+        warned = {r: c for r, c in self.reason_counts.items() if c and r in self.warn_only}
+        return "[VALIDATE] {}: {:,} rows | {:,} quarantined{}{}".format(
+            self.schema.name, self.rows, self.bad_rows, " {}".format(reasons) if reasons else '',
+            " | kept, flagged {}".format(warned) if warned else '')
+
+
+def quarantine_path(name):
+    return os.path.join(QUARANTINE_DIR, name + '.csv')
+
+
+def validate_frame(df, schema, quarantine=None, warn_only=()):
+    """Whole DataFrame → (good, bad); quarantine = file name under data/quarantine/ (optional)"""
+    validator = Validator(schema, quarantine_path(quarantine) if quarantine else None, warn_only)
+    good, bad = validator.validate(df)
+    print(validator.summary())
+    return good, bad
+
+
+def iter_validated(chunks, schema, quarantine=None):
+    """Validate a chunk iterator (pd.read_csv(..., chunksize=...)) → good chunks only"""
+    validator = Validator(schema, quarantine_path(quarantine) if quarantine else None)
+    for chunk in chunks:
+        yield validator.validate(chunk)[0]
+    print(validator.summary())
+
+
+if __name__ == '__main__':
+    import time
+
+    from synth_data import iter_laps
+
+    for path, schema in [('raw/monaco_raw.csv', RAW_PITS), ('raw/monaco_combined.csv', LAPS),
+                         ('lemans/lemans_2024_hourly.csv', LEMANS_STINTS),
+                         ('features/monaco_final_ml.csv', FEATURES)]:
+        validate_frame(pd.read_csv(os.path.join(DATA_DIR, path)), schema)
+
+    validator = Validator(LAPS)
+    check_s = 0.0
+    for chunk in iter_laps(400, chunk_rows=500_000):  # 2M synthetic laps
+        t = time.perf_counter()
+        validator.validate(chunk)
+        check_s += time.perf_counter() - t
+    print(validator.summary())
+    print("[VALIDATE] {:,} laps checked in {:.2f}s ({:,.0f} rows/s)".format(
+        validator.rows, check_s, validator.rows / check_s))
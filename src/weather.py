@@ -0,0 +1,127 @@
+"""
+Weather feature join engine - real FastF1 weather instead of np.random.normal
+✅ weather_data.ff1pkl loaded ONCE into a sorted session-time index
+✅ As-of (nearest prior sample) lookups via np.searchsorted - millions of rows in ms
+✅ Same features as the Day 2 notebook: temperature_c, humidity_pct, wind_speed_kmh, pressure_hpa
+✅ Single live-event lookups: at(session_seconds) / at_lap(lap)
+"""
+
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from ff1_cache import (find_session, load_payload, session_t0, gmt_offset, lap_start_times, has_payload,
+                       to_session_seconds)
+
+# FastF1 column → feature store name (WindSpeed is m/s, features use km/h)
+WEATHER_FEATURES = {
+    'AirTemp': 'temperature_c',
+    'Humidity': 'humidity_pct',
+    'WindSpeed': 'wind_speed_kmh',
+    'Pressure': 'pressure_hpa',
+    'TrackTemp': 'track_temp_c',
+    'WindDirection': 'wind_direction_deg',
+    'Rainfall': 'rainfall'
+}
+MS_TO_KMH = 3.6
+
+
+class WeatherIndex:
+    """Sorted weather samples for one session, joined by nearest-prior time"""
+
+    def __init__(self, times_s, features, t0=None, utc_offset=None, lap_starts=None):
+        order = np.argsort(times_s, kind='stable')
+        self.times_s = np.asarray(times_s, dtype='float64')[order]
+        self._times_list = self.times_s.tolist()  # bisect on a list for single events
+        self.columns = list(features)
+        # one (samples × features) block → a lookup is a single row gather
+        self._matrix = np.column_stack([np.asarray(features[c], dtype='float64')[order] for c in self.columns])
+        self.t0 = None if t0 is None else np.datetime64(t0, 'ns')
+        self.utc_offset = None if utc_offset is None else np.timedelta64(utc_offset, 'ns')
+        self.lap_starts = None if lap_starts is None else np.asarray(lap_starts, dtype='float64')
+
+    @classmethod
+    def from_session(cls, session_dir):
+        """Build from a cached FastF1 session directory"""
+        raw = load_payload(session_dir, 'weather_data')
+        features = {}
+        for src, name in WEATHER_FEATURES.items():
+            values = np.asarray(raw[src], dtype='float64')
+            features[name] = values * MS_TO_KMH if src == 'WindSpeed' else values
+        times_s = np.array([t.total_seconds() for t in raw['Time']])
+        lap_starts = lap_start_times(session_dir) if has_payload(session_dir, 'lap_count') else None
+        return cls(times_s, features, t0=session_t0(session_dir),
+                   utc_offset=gmt_offset(session_dir), lap_starts=lap_starts)
+
+    @classmethod
+    def for_race(cls, season=2024, event='Monaco', session='Race'):
+        """Convenience: WeatherIndex.for_race(2024, 'Monaco') from the local cache (None if not cached)"""
+        session_dir = find_session(season, event, session)
+        return None if session_dir is None else cls.from_session(session_dir)
+
+    def __len__(self):
+        return len(self.times_s)
+
+    def to_session_seconds(self, values):
+        """Timestamps → session seconds (see ff1_cache.to_session_seconds)"""
+        return to_session_seconds(values, self.t0, self.utc_offset)
+
+    def positions(self, session_seconds):
+        """Index of the nearest prior sample (times before the first sample use the first one)"""
+        idx = np.searchsorted(self.times_s, session_seconds, side='right') - 1
+        return np.clip(idx, 0, len(self.times_s) - 1)
+
+    def lookup(self, session_seconds, columns=None):
+        """Vectorized as-of lookup → DataFrame aligned with session_seconds"""
+        idx = self.positions(np.asarray(session_seconds, dtype='float64'))
+        if columns is None:
+            return pd.DataFrame(self._matrix[idx], columns=self.columns)
+        cols = [self.columns.index(c) for c in columns]
+        return pd.DataFrame(self._matrix[idx][:, cols], columns=columns)
+
+    def join(self, df, time_col='in_time', columns=None, prefix=''):
+        """Add weather feature columns to df (pits by in_time, laps by SessionTime/Time...)"""
+        weather = self.lookup(self.to_session_seconds(df[time_col]), columns)
+        weather.index = df.index
+        return df.assign(**{prefix + name: weather[name] for name in weather.columns})
+
+    def lap_seconds(self, laps):
+        """Session seconds at the start of each lap number (clipped to the race distance)"""
+        if self.lap_starts is None:
+            raise ValueError("WeatherIndex has no lap_count data for lap lookups")
+        idx = np.clip(np.asarray(laps, dtype='int64') - 1, 0, len(self.lap_starts) - 1)
+        return self.lap_starts[idx]
+
+    def join_laps(self, df, lap_col='LapNumber', columns=None, prefix=''):
+        """Add weather at lap start for a lap-number column (pit_lap_estimate, LapNumber...)"""
+        weather = self.lookup(self.lap_seconds(df[lap_col].fillna(1)), columns)
+        weather.index = df.index
+        return df.assign(**{prefix + name: weather[name] for name in weather.columns})
+
+    def at(self, session_seconds):
+        """Single live event → {feature: value} (bisect, no array allocation)"""
+        i = bisect.bisect_right(self._times_list, session_seconds) - 1
+        i = min(max(i, 0), len(self.times_s) - 1)
+        return dict(zip(self.columns, self._matrix[i].tolist()))
+
+    def at_lap(self, lap):
+        return self.at(float(self.lap_seconds([lap])[0]))
+
+
+if __name__ == '__main__':
+    import os
+    import time
+
+    weather = WeatherIndex.for_race(2024, 'Monaco')
+    print("[WEATHER] {} samples | t0 = {} UTC".format(len(weather), weather.t0))
+    print("[WEATHER] Lap 40:", {k: round(v, 1) for k, v in weather.at_lap(40).items()})
+
+    pits = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'raw', 'monaco_raw.csv'))
+    joined = weather.join(pits, 'in_time')
+    print(joined[['driver', 'in_time', 'temperature_c', 'humidity_pct', 'wind_speed_kmh', 'pressure_hpa']].head())
+
+    many = np.random.default_rng(42).uniform(0, weather.times_s[-1], 5_000_000)
+    t = time.perf_counter()
+    weather.lookup(many)
+    print("[WEATHER] 5M as-of lookups in {:.0f} ms".format((time.perf_counter() - t) * 1000))
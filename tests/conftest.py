@@ -0,0 +1,5 @@
+import os
+import sys
+
+# flat src/ modules, imported the same way the notebooks and app.py do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
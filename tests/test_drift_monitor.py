@@ -0,0 +1,61 @@
+import numpy as np
+
+from drift_monitor import MIN_EVENTS, DecayedMoments, DriftMonitor, P2Quantiles, RollingMAE
+
+
+def test_p2_quantiles_track_exact_quantiles():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(24, 2, 5_000), rng.exponential(3, 5_000), rng.uniform(1, 78, 5_000)])
+    sketch = P2Quantiles(X.shape[1], qs=(0.5, 0.95))
+    for x in X:
+        sketch.update(x)
+    exact = np.quantile(X, [0.5, 0.95], axis=0).T
+    spread = X.std(axis=0)[:, None]
+    assert np.all(np.abs(sketch.values() - exact) < 0.05 * spread)
+
+
+def test_p2_quantiles_exact_before_five_events():
+    sketch = P2Quantiles(1, qs=(0.5,))
+    for x in (3.0, 1.0, 2.0):
+        sketch.update([x])
+    assert sketch.values()[0, 0] == 2.0
+
+
+def test_decayed_moments_single_and_batch_agree():
+    X = np.random.default_rng(1).normal(5, 3, (1000, 2))
+    one, batch = DecayedMoments(2, half_life=200), DecayedMoments(2, half_life=200)
+    for x in X:
+        one.update(x)
+    batch.update_batch(X[:400])
+    batch.update_batch(X[400:])
+    assert np.allclose(one.mean, batch.mean) and np.allclose(one.std, batch.std)
+    flat = DecayedMoments(2, half_life=1e12)                  # no decay → plain mean / std
+    flat.update_batch(X)
+    assert np.allclose(flat.mean, X.mean(axis=0)) and np.allclose(flat.std, X.std(axis=0))
+
+
+def test_rolling_mae_window():
+    mae = RollingMAE(window=3)
+    for error in (10, -1, 2, -3):
+        mae.update(error)
+    assert mae.value == 2.0
+
+
+def test_shift_alerts_once_then_clears():
+    rng = np.random.default_rng(2)
+    monitor = DriftMonitor(rng.normal(0, 1, (2000, 1)), ['temperature_c'])
+    monitor.observe_batch(rng.normal(0, 1, (MIN_EVENTS, 1)))
+    assert monitor.active_alerts == []
+    monitor.observe_batch(rng.normal(4, 1, (4 * MIN_EVENTS, 1)))
+    assert monitor.active_alerts == ['mean:temperature_c', 'psi:temperature_c']
+    monitor.observe_batch(rng.normal(4, 1, (MIN_EVENTS, 1)))
+    assert len(monitor.alerts) == 2                    # edge-triggered: no repeat while active
+
+
+def test_late_drift_is_not_diluted_by_history():
+    rng = np.random.default_rng(3)
+    monitor = DriftMonitor(rng.normal(0, 1, (2000, 1)), ['temperature_c'])
+    monitor.observe_batch(rng.normal(0, 1, (20_000, 1)))
+    assert monitor.active_alerts == []
+    monitor.observe_batch(rng.normal(4, 1, (2000, 1)))     # cumulative mean would move only ~0.36 std
+    assert monitor.active_alerts == ['mean:temperature_c', 'psi:temperature_c']
@@ -0,0 +1,38 @@
+import numpy as np
+
+from event_log import FATIGUE, LAP, PIT, RECORD_DTYPE, EventLog, RaceState
+
+
+def _records(n, seed=0):
+    rng = np.random.default_rng(seed)
+    records = np.zeros(n, dtype=RECORD_DTYPE)
+    records['driver'] = np.array([b'LEC', b'PIA', b'SAI', b'NOR'])[rng.integers(0, 4, n)]
+    records['kind'] = rng.choice([PIT, LAP, FATIGUE], n)
+    records['lap'] = rng.integers(1, 79, n)
+    records['value'] = rng.normal(40, 10, n)
+    records['ts'] = np.arange(n, dtype='float64')
+    return records
+
+
+def test_snapshot_plus_tail_equals_full_replay(tmp_path):
+    log = EventLog(str(tmp_path / 'race.log'), initial_capacity=64)
+    log.append(_records(500))
+    RaceState.recover(log, str(tmp_path / 'none.pkl')).save(str(tmp_path / 'state.pkl'))
+    log.append(_records(700, seed=1))           # grows the file past its capacity
+
+    resumed = RaceState.recover(log, str(tmp_path / 'state.pkl'))
+    full = RaceState().apply(log.view())
+    assert resumed.through_seq == full.through_seq == 1199
+    assert np.array_equal(resumed.keys, full.keys)
+    assert np.allclose(resumed.table, full.table, equal_nan=True)
+
+
+def test_last_record_per_driver_wins():
+    records = _records(10_000)
+    state = RaceState().apply(records)
+    frame = state.to_frame().set_index('driver')
+    for driver in ('LEC', 'PIA', 'SAI', 'NOR'):
+        mine = records[(records['driver'] == driver.encode()) & (records['kind'] == LAP)]
+        assert frame.loc[driver, 'last_lap'] == mine['lap'][-1]
+        assert frame.loc[driver, 'last_lap_time'] == np.float32(mine['value'][-1])
+        assert frame.loc[driver, 'last_ts'] == records['ts'][records['driver'] == driver.encode()][-1]
@@ -0,0 +1,34 @@
+import pickle
+from datetime import timedelta
+
+import pytest
+
+from ff1_cache import lap_start_times
+
+
+def _write(session_dir, name, data):
+    with open(session_dir / (name + '.ff1pkl'), 'wb') as f:
+        pickle.dump({'data': data}, f)
+
+
+@pytest.fixture
+def red_flag_session(tmp_path):
+    """Monaco 2024 shape: start, red flag on lap 1, standing restart, lap counter resumes at lap 2"""
+    s = timedelta(seconds=1)
+    _write(tmp_path, 'session_status_data', {
+        'Time': [10.67 * s, 3305.68 * s, 3362.17 * s, 5754.73 * s, 11901.5 * s],
+        'Status': ['Inactive', 'Started', 'Aborted', 'Started', 'Finished']})
+    _write(tmp_path, 'lap_count', {
+        'Time': [7.37 * s, 5762.28 * s, 5940.40 * s],
+        'CurrentLap': [1, 2, 3]})
+    return tmp_path
+
+
+def test_lap_one_starts_at_first_start_not_restart(red_flag_session):
+    starts = lap_start_times(red_flag_session)
+    assert starts == [3305.68, 5762.28, 5940.40]
+
+
+def test_red_flag_falls_inside_lap_one(red_flag_session):
+    starts = lap_start_times(red_flag_session)
+    assert starts[0] < 3362.17 < 5754.73 < starts[1]
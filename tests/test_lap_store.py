@@ -0,0 +1,15 @@
+import pytest
+
+from ff1_cache import find_session
+from lap_store import laps_from_session
+
+MONACO_2024 = find_session(2024, 'Monaco')
+
+
+@pytest.mark.skipif(MONACO_2024 is None, reason="Monaco 2024 race not in the FastF1 cache")
+def test_stint_compound_skips_timing_app_placeholder():
+    laps = laps_from_session(MONACO_2024)
+    assert (laps['compound'] != 'UNKNOWN').all()
+    nor = laps[(laps['driver'] == 'NOR') & (laps['stint'] == 1)]     # one HARD set after the red flag
+    assert set(nor['compound']) == {'HARD'}
+    assert nor['tyre_life'].tolist() == list(range(2, 2 + len(nor)))
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from race_engine import classify, lap_matrix
+
+
+def _laps():
+    # A finishes 3 laps, B retires after lap 1 (fastest lap of the race), C has a missing lap 2 time
+    return pd.DataFrame({
+        'Driver': ['A', 'A', 'A', 'B', 'C', 'C', 'C'],
+        'LapNumber': [1, 2, 3, 1, 1, 2, 3],
+        'LapTime': [80.0, 80.0, 80.0, 70.0, 81.0, np.nan, 81.0]
+    })
+
+
+def test_interior_gap_filled_trailing_laps_left_missing():
+    drivers, T = lap_matrix(_laps())
+    assert list(drivers) == ['A', 'B', 'C']
+    assert T[2, 1] == 81.0                       # C's missing lap 2 → driver median
+    assert np.isnan(T[1, 1:]).all()              # B did not get a full race distance
+
+
+def test_retired_car_classified_behind_running_cars():
+    _, T = lap_matrix(_laps())
+    state = classify(T)
+    assert state['position'][:, 0].tolist() == [2, 1, 3]     # B leads after lap 1
+    assert state['position'][:, -1].tolist() == [1, 3, 2]    # ... then is last once retired
+    assert state['laps_completed'][:, -1].tolist() == [3, 1, 3]
+    assert np.isnan(state['gap_to_leader'][1, -1])
+    assert state['gap_to_leader'][2, -1] == 3.0
@@ -0,0 +1,12 @@
+import numpy as np
+import pytest
+
+from scoring_service import MicroBatcher
+
+
+def test_dict_rows_missing_a_feature_are_rejected():
+    batcher = MicroBatcher('pit', None, ['pit_lap_estimate', 'temperature_c'])
+    with pytest.raises(ValueError, match="temperature_c"):
+        batcher.to_matrix([{'pit_lap_estimate': 40}])
+    X = batcher.to_matrix([{'temperature_c': 24, 'pit_lap_estimate': 40}])
+    assert np.array_equal(X, [[40.0, 24.0]])
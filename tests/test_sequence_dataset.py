@@ -0,0 +1,30 @@
+import numpy as np
+
+from sequence_dataset import SequenceDataset
+
+
+def _dataset(lookback=3):
+    # column 0 = the target itself (a stand-in for crew_rolling_mean / pit_delta_norm, which include it)
+    group = np.array(['B', 'A', 'A', 'B', 'A', 'A'])
+    order_key = np.array([2, 4, 1, 1, 3, 2])
+    target = np.arange(6, dtype='float64') * 10
+    features = np.column_stack([target, order_key])
+    return SequenceDataset(features, group, order_key, lookback=lookback, target=target)
+
+
+def test_windows_hold_only_earlier_stops_of_the_same_driver():
+    dataset = _dataset()
+    X, mask, y = next(dataset.iter_batches(batch_size=len(dataset)))
+    for i in range(len(dataset)):
+        real = X[i][mask[i]]
+        assert y[i] not in real[:, 0]
+        assert np.array_equal(real, dataset.window(i)[dataset.mask(i)])
+    # sorted rows: A@1, A@2, A@3, A@4, B@1, B@2 → A@4 sees A@1..3, B@1 sees nothing
+    assert X[3][:, 1].tolist() == [1, 2, 3] and mask[3].all()
+    assert not mask[0].any() and not mask[4].any()
+    assert X[5][mask[5]][:, 1].tolist() == [1]
+
+
+def test_windows_are_views_of_one_padded_copy():
+    dataset = _dataset()
+    assert np.shares_memory(dataset.window(2), dataset._padded)
@@ -0,0 +1,53 @@
+import os
+import signal
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from shared_models import FlatForest, ScoringPool, WorkerError
+
+
+@pytest.fixture(scope='module')
+def forest():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 80, (2000, 4))
+    y = 20 + 0.1 * X[:, 0] + np.sin(X[:, 1]) + rng.normal(0, 0.5, 2000)
+    rf = RandomForestRegressor(n_estimators=20, min_samples_leaf=3, random_state=0).fit(X, y)
+    return rf, rng.uniform(-10, 90, (500, 4))
+
+
+def test_flat_forest_matches_sklearn(forest):
+    rf, X = forest
+    # same leaves per tree; only the order of the final mean differs from sklearn
+    assert np.allclose(FlatForest.from_model(rf, list('abcd')).predict(X), rf.predict(X), rtol=1e-12)
+
+
+def test_shared_memory_round_trip(forest):
+    rf, X = forest
+    owner = FlatForest.from_model(rf, list('abcd'))
+    attached = FlatForest.attach(owner.publish('pit'))
+    try:
+        assert np.allclose(attached.predict(X), rf.predict(X), rtol=1e-12)
+    finally:
+        attached.close()
+        owner.close(unlink=True)
+
+
+def test_dead_worker_fails_in_flight_futures_and_is_respawned(forest):
+    rf, X = forest
+    pool = ScoringPool(1, {'pit': FlatForest.from_model(rf, list('abcd'))}).start()
+    try:
+        preds = pool.submit('2024_Monaco_R', 'pit', X).result(timeout=10)
+        assert np.allclose(preds, rf.predict(X), rtol=1e-12)
+        dead = pool.workers[0]
+        os.kill(dead.pid, signal.SIGSTOP)                                  # stuck mid-race ...
+        in_flight = pool.submit('2024_Monaco_R', 'pit', X)
+        os.kill(dead.pid, signal.SIGKILL)                                  # ... then OOM-killed
+        with pytest.raises(WorkerError):
+            in_flight.result(timeout=10)                                   # would hang forever before
+        preds = pool.submit('2024_Monaco_R', 'pit', X).result(timeout=10)  # same shard, fresh worker
+        assert np.allclose(preds, rf.predict(X), rtol=1e-12)
+        assert pool.workers[0] is not dead
+    finally:
+        pool.close()
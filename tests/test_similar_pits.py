@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from similar_pits import COMPOUNDS, SimilarPits
+
+
+def _pits(n, seed, driver='P'):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'driver': ['{}{}'.format(driver, i) for i in range(n)],
+        'pit_lap_estimate': rng.integers(1, 78, n), 'temperature_c': rng.normal(24, 3, n),
+        'crew_rolling_mean': rng.normal(24, 2, n), 'fatigue_factor': rng.uniform(0, 0.25, n),
+        'compound': rng.choice(COMPOUNDS + ['UNKNOWN'], n), 'pit_delta_seconds': rng.normal(24, 2, n)
+    })
+
+
+def _brute_force(index, pits, situation, k):
+    z = index.embed(pd.DataFrame([situation]))
+    dist = np.sqrt(((index.embed(pits) - z) ** 2).sum(axis=1))
+    return pits['driver'].to_numpy()[np.argsort(dist, kind='stable')[:k]], np.sort(dist)[:k]
+
+
+def test_tree_plus_buffer_matches_brute_force_before_and_after_rebuild():
+    history = _pits(300, 0)
+    index = SimilarPits(history, rebuild_threshold=50)
+    situation = index.situation(lap=40, temperature_c=24.0, crew_rolling_mean=23.0, compound='MEDIUM')
+
+    for seed, driver, buffered in [(1, 'A', 30), (2, 'B', 0)]:    # 30 buffered, then 60 ≥ 50 → rebuild
+        index.append(_pits(30, seed, driver))
+        assert len(index._buffer_Z) == buffered
+        every = pd.concat([history, _pits(30, 1, 'A')] + ([_pits(30, 2, 'B')] if seed == 2 else []),
+                          ignore_index=True)
+        assert len(index) == len(every)
+        drivers, dist = _brute_force(index, every, situation, k=25)
+        similar = index.query(situation, k=25)
+        assert similar['driver'].tolist() == drivers.tolist()
+        assert np.allclose(similar['distance'], dist)
+
+
+def test_append_race_reads_the_races_own_laps_and_fatigue(tmp_path):
+    index = SimilarPits(_pits(50, 0))
+    race = pd.DataFrame({'session_id': 1, 'driver': ['NEW'], 'in_time': ['2025-07-06 14:30:00+00:00'],
+                         'pit_delta_seconds': [22.5], 'pit_lap_estimate': [12], 'temperature_c': [19.0],
+                         'humidity_pct': [60.0], 'crew_rolling_mean': [23.0], 'crew_rolling_std': [0.5],
+                         'pit_frequency': [1], 'pit_hour_peak': [0], 'is_fast_pit': [1]})
+    laps = pd.DataFrame({'Driver': ['NEW', 'NEW'], 'LapNumber': [11, 12], 'Compound': ['SOFT', 'HARD']})
+    fatigue = pd.DataFrame({'entity': ['NEW'], 'lap_number': [12], 'fatigue_pct': [8.0], 'PitStatus': ['Pit']})
+    for name, df in [('race', race), ('laps', laps), ('fatigue', fatigue)]:
+        df.to_csv(tmp_path / (name + '.csv'), index=False)
+
+    index.append_race(str(tmp_path / 'race.csv'), str(tmp_path / 'laps.csv'), str(tmp_path / 'fatigue.csv'))
+    added = index._buffer_meta.iloc[-1]
+    assert added['compound'] == 'HARD' and np.isclose(added['fatigue_factor'], 0.08)
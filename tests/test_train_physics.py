@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from train_physics import iter_lap_batches
+
+NO_FATIGUE = pd.Series(dtype='float64', index=pd.MultiIndex.from_tuples([], names=['entity', 'lap_number']))
+
+
+def _laps():
+    return pd.DataFrame({'Driver': ['LEC'] * 10 + ['PIA'] * 10, 'LapNumber': list(range(1, 11)) * 2,
+                         'LapTime': 80.0, 'Compound': 'HARD', 'PitStatus': 'Running'})
+
+
+def test_stacked_seasons_keep_every_lap(tmp_path):
+    path = tmp_path / 'monaco_combined.csv'
+    pd.concat([_laps().assign(session_id=2024), _laps().assign(session_id=2025)]).to_csv(path, index=False)
+    batches = list(iter_lap_batches(str(path), 2024, 'Monaco', NO_FATIGUE,
+                                    neutralized=lambda season, event: None))
+    assert sum(len(b) for b in batches) == 40
+
+
+def test_neutralized_laps_come_from_each_rows_own_race(tmp_path):
+    races = {(2024, 'Monaco'): np.arange(10) == 0,      # red flag on lap 1
+             (2025, 'Monaco'): np.arange(10) >= 7}      # SC from lap 8
+    lookups = []
+
+    def lookup(season, event):
+        lookups.append((season, event))
+        return races.get((season, event))
+
+    stacked = tmp_path / 'monaco_combined.csv'
+    pd.concat([_laps().assign(session_id=2024), _laps().assign(session_id=2025)]).to_csv(stacked, index=False)
+    batch = pd.concat(iter_lap_batches(str(stacked), 2024, 'Monaco', NO_FATIGUE, neutralized=lookup))
+    assert batch['neutralized'].tolist() == ([1.0] + [0.0] * 9) * 2 + ([0.0] * 7 + [1.0] * 3) * 2
+
+    weekend = tmp_path / 'silverstone.csv'                # new weekend, no session_id column
+    _laps().to_csv(weekend, index=False)
+    batch = pd.concat(iter_lap_batches(str(weekend), 2025, 'Silverstone', NO_FATIGUE, neutralized=lookup))
+    assert batch['neutralized'].sum() == 0 and lookups[-1] == (2025, 'Silverstone')
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from validation import LAPS, Validator
+
+
+def _race(drivers=('LEC', 'PIA', 'SAI'), n_laps=5):
+    """Realistic lap table: sorted by driver, SessionTime increasing within each driver only"""
+    rows = [{'Driver': d, 'LapNumber': lap, 'LapTime': 80.0 + i, 'Compound': 'HARD', 'PitStatus': 'Running',
+             'SessionTime': '0 days 00:{:02d}:{:02d}'.format(lap + 1, i)}
+            for i, d in enumerate(drivers) for lap in range(1, n_laps + 1)]
+    return pd.DataFrame(rows)
+
+
+def test_driver_sorted_laps_pass():
+    good, bad = Validator(LAPS).validate(_race())
+    assert len(bad) == 0 and len(good) == 15
+
+
+def test_null_or_missing_session_time_is_not_a_duplicate():
+    laps = _race()
+    laps['SessionTime'] = np.nan
+    assert len(Validator(LAPS).validate(laps)[1]) == 0
+    assert len(Validator(LAPS).validate(laps.drop(columns='SessionTime'))[1]) == 0
+
+
+def test_duplicates_and_ordering_carried_across_chunks():
+    laps = _race()
+    validator = Validator(LAPS)
+    validator.validate(laps[laps['LapNumber'] <= 3])
+    late = laps[laps['LapNumber'] > 3].copy()
+    late.loc[late.index[0], 'SessionTime'] = '0 days 00:00:30'     # LEC lap 4 before his lap 3
+    repeat = laps[(laps['Driver'] == 'PIA') & (laps['LapNumber'] == 2)]
+    _, bad = validator.validate(pd.concat([late, repeat]))
+    assert bad['_reasons'].tolist() == ['out_of_order', 'duplicate|out_of_order']
+
+
+def test_session_id_scopes_the_lap_key():
+    laps = pd.concat([_race().assign(session_id=2024), _race().assign(session_id=2025)])
+    assert len(Validator(LAPS).validate(laps)[1]) == 0
+    assert len(Validator(LAPS).validate(laps.drop(columns='session_id'))[1]) == 15
+
+
+def test_warn_only_reasons_are_counted_but_kept():
+    laps = pd.concat([_race(), _race().iloc[:2].assign(SessionTime='0 days 00:59:00')])  # LEC re-sends laps 1-2
+    validator = Validator(LAPS, warn_only=['duplicate'])
+    good, bad = validator.validate(laps)
+    assert len(good) == 17 and len(bad) == 0
+    assert validator.reason_counts['duplicate'] == 2